@@ -0,0 +1,227 @@
+"""
+analyse student and course networks without gephi
+networks are stored as compressed sparse rows (CSR), every edge is stored in both directions
+run with: python3 analyse_network.py [--network periods|courses|shared_slots] [--min-weight N]
+requires numpy
+"""
+
+from typing import Callable, List, Dict, Sequence, Tuple
+import argparse
+import numpy as np
+
+import sort_data
+import create_gephi
+import contact_graph
+import snapshot
+
+
+class Graph:
+    # connections[i] contains the connections of node i, key: connected node id, value: weight
+    # like the output of create_gephi.get_student_connections each edge only has to be given once
+    def __init__(self, connections: Sequence[Dict[int, int]]):
+        self.node_amount = len(connections)
+        sources = np.fromiter((source for source, connected in enumerate(connections) for _ in connected),
+                              dtype=np.int64)
+        targets = np.fromiter((target for connected in connections for target in connected), dtype=np.int64)
+        weights = np.fromiter((weight for connected in connections for weight in connected.values()),
+                              dtype=np.int64)
+        self.set_edges(np.concatenate((sources, targets)), np.concatenate((targets, sources)),
+                       np.concatenate((weights, weights)))
+
+    # edges in both directions
+    def set_edges(self, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> None:
+        order = np.lexsort((targets, sources))
+        # sources[indptr[i]:indptr[i + 1]] == i
+        self.sources = sources[order]
+        self.indices = targets[order]
+        self.weights = weights[order]
+        self.indptr = np.zeros(self.node_amount + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=self.node_amount), out=self.indptr[1:])
+
+    def get_neighbours(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    # sum of the weights of all edges of each node
+    def get_weighted_degrees(self) -> np.ndarray:
+        return np.bincount(self.sources, weights=self.weights, minlength=self.node_amount).astype(np.int64)
+
+    # sum of the weights of all edges between nodes with different labels
+    def get_cut_weight(self, labels: np.ndarray) -> int:
+        return int(self.weights[labels[self.sources] != labels[self.indices]].sum()) // 2
+
+
+# relabel to 0, 1, 2... in order of the first node of each label
+def compact_labels(labels: np.ndarray) -> np.ndarray:
+    _, first_idxs, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first_idxs, kind="stable"), kind="stable")
+    return order[inverse.ravel()]
+
+
+# connected components of the edges of at least min_weight, component ids start at 0 in order of their first node
+# union-find on all edges at once: each root is hooked to the smallest root of its neighbours,
+# then the paths are compressed by pointer jumping until every node points to its root
+def get_components(graph: Graph, min_weight: int = 1) -> np.ndarray:
+    # every edge is stored in both directions
+    mask = (graph.weights >= min_weight) & (graph.sources < graph.indices)
+    return get_edge_components(graph.node_amount, graph.sources[mask], graph.indices[mask])
+
+
+# connected components of the given edges, each edge is needed in one direction only
+def get_edge_components(node_amount: int, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    parents = np.arange(node_amount)
+    while True:
+        hooked = parents.copy()
+        np.minimum.at(hooked, parents[sources], parents[targets])
+        np.minimum.at(hooked, parents[targets], parents[sources])
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, parents):
+            return compact_labels(parents)
+        parents = hooked
+
+
+# amount of components and size of the largest one for each threshold
+def get_component_stats(graph: Graph, min_weights: List[int]) -> Dict[int, Tuple[int, int]]:
+    stats: Dict[int, Tuple[int, int]] = {}
+    for min_weight in min_weights:
+        sizes = np.bincount(get_components(graph, min_weight))
+        stats[min_weight] = (len(sizes), int(sizes.max(initial=0)))
+    return stats
+
+
+# label of the highest total edge weight among the neighbours of each node
+# nodes without neighbours keep their label, ties keep the current label or take the smallest one
+def get_dominant_labels(graph: Graph, labels: np.ndarray) -> np.ndarray:
+    if len(graph.sources) == 0:
+        return labels.copy()
+    # sum the weights of each (node, neighbour label) pair, sorted by node and label
+    label_amount = int(labels.max()) + 1
+    keys = graph.sources * label_amount + labels[graph.indices]
+    order = np.argsort(keys)
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    pair_sources = keys[starts] // label_amount
+    pair_labels = keys[starts] % label_amount
+    # the current label wins ties
+    pair_weights = np.add.reduceat(graph.weights[order], starts) * 2 + (pair_labels == labels[pair_sources])
+    # first pair with the highest weight of each node
+    node_starts = np.flatnonzero(np.concatenate(([True], pair_sources[1:] != pair_sources[:-1])))
+    node_maxima = np.maximum.reduceat(pair_weights, node_starts)
+    best = np.flatnonzero(pair_weights == np.repeat(node_maxima, np.diff(np.append(node_starts, len(pair_weights)))))
+    best = best[np.concatenate(([True], pair_sources[best][1:] != pair_sources[best][:-1]))]
+    dominant = labels.copy()
+    dominant[pair_sources[best]] = pair_labels[best]
+    return dominant
+
+
+# communities by weighted label propagation
+# only a random half of the nodes is updated at once, updating all nodes at the same time can oscillate
+def get_communities(graph: Graph, max_iterations: int = 50, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    labels = np.arange(graph.node_amount)
+    for _ in range(max_iterations):
+        dominant = get_dominant_labels(graph, labels)
+        if np.array_equal(dominant, labels):
+            break
+        labels = np.where(rng.random(graph.node_amount) < 0.5, dominant, labels)
+    return compact_labels(labels)
+
+
+# lower cut weight when moving each node to the other cohort on its own
+def get_gains(graph: Graph, cohorts: np.ndarray) -> np.ndarray:
+    same = graph.weights * (cohorts[graph.sources] == cohorts[graph.indices])
+    internal = np.bincount(graph.sources, weights=same, minlength=graph.node_amount)
+    external = np.bincount(graph.sources, weights=graph.weights - same, minlength=graph.node_amount)
+    return external - internal
+
+
+# split all nodes into two cohorts of about the same size with a low weight of edges between both cohorts
+# whole communities are assigned to the smaller cohort, largest first,
+# afterwards single nodes switch cohorts as long as this lowers the cut weight and keeps the balance
+# balance is the maximum difference of the cohort sizes relative to the amount of nodes
+def get_cohort_split(graph: Graph, communities: np.ndarray, balance: float = 0.1, max_iterations: int = 20) -> np.ndarray:
+    community_sizes = np.bincount(communities, minlength=1)
+    community_cohorts = np.zeros(len(community_sizes), dtype=np.int64)
+    cohort_sizes = [0, 0]
+    for community in np.argsort(-community_sizes, kind="stable"):
+        cohort = 0 if cohort_sizes[0] <= cohort_sizes[1] else 1
+        community_cohorts[community] = cohort
+        cohort_sizes[cohort] += int(community_sizes[community])
+    cohorts = community_cohorts[communities]
+
+    max_difference = max(1, int(balance * graph.node_amount))
+    # a single community can be too large for the balance, move the nodes losing the least
+    sizes = np.bincount(cohorts, minlength=2)
+    larger = int(sizes.argmax())
+    excess = -(-(int(sizes[larger] - sizes[1 - larger]) - max_difference) // 2)
+    if excess > 0:
+        gains = get_gains(graph, cohorts)
+        candidates = np.flatnonzero(cohorts == larger)
+        cohorts[candidates[np.argsort(-gains[candidates], kind="stable")[:excess]]] = 1 - larger
+
+    for _ in range(max_iterations):
+        gains = get_gains(graph, cohorts)
+        moved = False
+        for cohort in (0, 1):
+            # nodes moving from this cohort, best gains first
+            candidates = np.flatnonzero((cohorts == cohort) & (gains > 0))
+            candidates = candidates[np.argsort(-gains[candidates], kind="stable")]
+            size = int((cohorts == cohort).sum())
+            allowed = (size - (graph.node_amount - size) + max_difference) // 2
+            # only move nodes without a neighbour being moved at the same time, their gains would be wrong
+            blocked = np.zeros(graph.node_amount, dtype=bool)
+            amount = 0
+            for node in candidates.tolist():
+                if amount >= allowed:
+                    break
+                if blocked[node]:
+                    continue
+                cohorts[node] = 1 - cohort
+                blocked[graph.get_neighbours(node)] = True
+                amount += 1
+                moved = True
+            if moved:
+                break
+        if not moved:
+            break
+    return cohorts
+
+
+# student ids ordered by their weighted degree, highest first
+def get_risk_ranking(graph: Graph) -> np.ndarray:
+    return np.argsort(-graph.get_weighted_degrees(), kind="stable")
+
+
+# key: network name, value: function returning the connections of the students
+NETWORKS: Dict[str, Callable[[List[sort_data.Student]], Sequence[Dict[int, int]]]] = {
+    "periods": lambda students: create_gephi.get_student_connections(students)[0],
+    "courses": lambda students: create_gephi.get_student_connections(students)[1],
+    "shared_slots": lambda students: contact_graph.ContactGraph(students).week_connections,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--network", choices=list(NETWORKS.keys()), default="shared_slots",
+                        help="weight of the student network")
+    parser.add_argument("--min-weight", type=int, nargs="+", default=[1, 2, 5, 10],
+                        help="thresholds for the connected components")
+    parser.add_argument("--top", type=int, default=10, help="amount of students with the highest weighted degree to show")
+    args = parser.parse_args()
+    students = list(snapshot.get_students(snapshot.SNAPSHOT_PATH).values())
+    graph = Graph(NETWORKS[args.network](students))
+    for min_weight, (amount, largest) in get_component_stats(graph, args.min_weight).items():
+        print(f"weight >= {min_weight}: {amount} components, largest with {largest} students")
+    communities = get_communities(graph)
+    print(f"{communities.max(initial=-1) + 1} communities")
+    degrees = graph.get_weighted_degrees()
+    print("highest weighted degree:")
+    for node in get_risk_ranking(graph)[:args.top]:
+        print(f"  {students[node].name}: {degrees[node]}")
+    groups = np.array([0 if student.group == "A" else 1 for student in students], dtype=np.int64)
+    cohorts = get_cohort_split(graph, communities)
+    print(f"suggested cohorts of {np.bincount(cohorts, minlength=2).tolist()} students share {graph.get_cut_weight(cohorts)}, "
+          f"groups A and B share {graph.get_cut_weight(groups)}")
@@ -0,0 +1,782 @@
+"""
+benchmark single stages of the pipeline with synthetic data
+run with: python3 benchmark.py [stage ...]
+"""
+
+from typing import Callable, List, Dict, Optional, Tuple
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import read_course_file
+import read_time_table
+import sort_data
+import create_gephi
+import contact_graph
+import write_gexf
+import snapshot
+import diagnostics
+
+
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Emil", "Frieda", "Greta", "Hannes", "Ida", "Jonas",
+               "Klara", "Lukas", "Mila", "Noah", "Oskar", "Paula", "Quirin", "Rosa", "Simon", "Tilda"]
+
+
+# create a time table course with random time slots
+def get_synthetic_course(rng: random.Random, idx: int) -> read_time_table.Course:
+    course = read_time_table.Course(f"T{idx % 300}", f"s{idx}")
+    course.full_label = f"Course {idx}"
+    course.teacher = f"Teacher {idx % 300}"
+    for day, period in rng.sample([(day, period) for day in range(5) for period in range(1, 11)], rng.randint(2, 5)):
+        course.add_time_slot(day, period, f"R{idx}")
+    return course
+
+
+# create resolved students attending about 20 students per course
+def get_synthetic_students(amount: int, seed: int = 0) -> List[sort_data.Student]:
+    rng = random.Random(seed)
+    # five p-levels and one pool of cover courses
+    pools = [[get_synthetic_course(rng, pool * amount + idx) for idx in range(max(2, amount // 20))]
+             for pool in range(6)]
+    students: List[sort_data.Student] = []
+    for idx in range(amount):
+        student = sort_data.Student(f"Student {idx}", "AB"[idx % 2])
+        for p_level in range(1, 6):
+            student.p_courses[p_level] = rng.choice(pools[p_level - 1])
+        student.cover_courses = rng.sample(
+            pools[5], min(len(pools[5]), rng.randint(3, 7)))
+        student.tutor = f"Teacher {idx % 300}"
+        student.tutor_abbreviation = f"T{idx % 300}"
+        student.count_stuff()
+        students.append(student)
+    return students
+
+
+# run function and return the elapsed wall time in seconds
+def measure(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def benchmark_student_connections(sizes: List[int]) -> None:
+    for size in sizes:
+        students = get_synthetic_students(size)
+        connections: List[Tuple[List[Dict[int, int]], List[Dict[int, int]]]] = []
+        elapsed = measure(lambda: connections.append(
+            create_gephi.get_student_connections(students)))
+        edge_amount = sum(len(connected)
+                          for connected in connections[0][0])
+        print(f"student connections: {size} students, {edge_amount} edges in {elapsed:.3f}s")
+
+
+# compare the vectorized backend with the pure python implementation
+def benchmark_incidence_matrix(sizes: List[int]) -> None:
+    import incidence_matrix
+
+    for size in sizes:
+        students = get_synthetic_students(size)
+        results: List[Tuple[List[Dict[int, int]], List[Dict[int, int]]]] = []
+        python_elapsed = measure(lambda: results.append(
+            create_gephi.get_student_connections(students)))
+        matrix_elapsed = measure(lambda: results.append(
+            incidence_matrix.get_student_connections(students)))
+        if [[list(connected.items()) for connected in connections] for connections in results[0]] != \
+                [[list(connected.items()) for connected in connections] for connections in results[1]]:
+            print(f"Critical: backends differ for {size} students.")
+            sys.exit(1)
+        courses = create_gephi.get_courses(students)
+        python_course_elapsed = measure(
+            lambda: create_gephi.get_course_connections(courses))
+        matrix_course_elapsed = measure(
+            lambda: incidence_matrix.get_course_connections(courses))
+        if [list(connected.items()) for connected in create_gephi.get_course_connections(courses)] != \
+                [list(connected.items()) for connected in incidence_matrix.get_course_connections(courses)]:
+            print(f"Critical: course backends differ for {size} students.")
+            sys.exit(1)
+        print(f"incidence matrix: {size} students, python {python_elapsed:.3f}s, matrix {matrix_elapsed:.3f}s, "
+              f"courses python {python_course_elapsed:.3f}s, matrix {matrix_course_elapsed:.3f}s")
+
+
+def benchmark_contact_graph(sizes: List[int]) -> None:
+    for size in sizes:
+        students = get_synthetic_students(size)
+        graphs: List[contact_graph.ContactGraph] = []
+        elapsed = measure(lambda: graphs.append(
+            contact_graph.ContactGraph(students)))
+        query_elapsed = measure(
+            lambda: graphs[0].get_connections_without([1]))
+        print(f"contact graph: {size} students in {elapsed:.3f}s, without tuesday in {query_elapsed:.3f}s")
+
+
+# run function and return the peak of memory allocated meanwhile in bytes
+def measure_memory(function: Callable[[], object]) -> int:
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+# compare the streaming gexf writer with rendering the jinja template
+def benchmark_gexf(sizes: List[int]) -> None:
+    import create_print_out
+
+    today = "2021-01-01"
+    with tempfile.TemporaryDirectory() as out_dir:
+        template_file = os.path.join(out_dir, "template.gexf")
+        stream_file = os.path.join(out_dir, "stream.gexf")
+        for size in sizes:
+            students = get_synthetic_students(size)
+            connections = create_gephi.get_student_connections(students)[0]
+            graph_students = create_gephi.create_graph_students(
+                students, connections)
+            courses = create_gephi.get_courses(students)
+            course_connections = create_gephi.get_course_connections(courses)
+            graph_courses = create_gephi.create_graph_courses(
+                courses, course_connections)
+
+            template_memory = measure_memory(lambda: create_print_out.write_template(
+                "files/gephi_students_template.gexf", template_file, today=today,
+                students=graph_students, edges=create_gephi.get_student_edges(graph_students)))
+            stream_memory = measure_memory(lambda: write_gexf.write_gexf(
+                stream_file, today, write_gexf.STUDENT_ATTRIBUTES, graph_students, connections))
+            if not filecmp.cmp(template_file, stream_file, shallow=False):
+                print(f"Critical: streamed student network differs for {size} students.")
+                sys.exit(1)
+            template_elapsed = measure(lambda: create_print_out.write_template(
+                "files/gephi_students_template.gexf", template_file, today=today,
+                students=graph_students, edges=create_gephi.get_student_edges(graph_students)))
+            stream_elapsed = measure(lambda: write_gexf.write_gexf(
+                stream_file, today, write_gexf.STUDENT_ATTRIBUTES, graph_students, connections))
+
+            create_print_out.write_template(
+                "files/gephi_courses_template.gexf", template_file, today=today,
+                courses=graph_courses, edges=create_gephi.get_course_edges(graph_courses))
+            write_gexf.write_gexf(
+                stream_file, today, write_gexf.COURSE_ATTRIBUTES, graph_courses, course_connections)
+            if not filecmp.cmp(template_file, stream_file, shallow=False):
+                print(f"Critical: streamed course network differs for {size} students.")
+                sys.exit(1)
+            print(f"gexf: {size} students, {os.path.getsize(stream_file)} bytes, "
+                  f"template {template_elapsed:.3f}s {template_memory // 1024}KiB peak, "
+                  f"stream {stream_elapsed:.3f}s {stream_memory // 1024}KiB peak")
+
+
+# typical ocr errors, key: correct text, value: misread text
+OCR_ERRORS = {"l": "1", "i": "ı", "ü": "u", "m": "rn", "e": "c", "S": "5", "o": "0"}
+
+
+# misread a single character of the text
+def get_ocr_error(rng: random.Random, text: str) -> str:
+    idxs = [idx for idx, character in enumerate(text) if character in OCR_ERRORS]
+    if len(idxs) == 0:
+        return text + "_"
+    idx = rng.choice(idxs)
+    return text[:idx] + OCR_ERRORS[text[idx]] + text[idx + 1:]
+
+
+# sizes are the amount of replacement rules
+def benchmark_replacements(sizes: List[int]) -> None:
+    rng = random.Random(0)
+    words = [f"{rng.choice(FIRST_NAMES)}{idx}" for idx in range(max(sizes) * 2)]
+    for size in sizes:
+        # rules fixing misread words, the text contains correct and misread words
+        replacements: Dict[str, str] = {}
+        while len(replacements) < size:
+            word = rng.choice(words)
+            replacements[get_ocr_error(rng, word)] = word
+        text = "\n".join(f"  {rng.choice(words)}   {rng.choice(list(replacements.keys()))}   P{rng.randint(1, 5)}"
+                         for _ in range(100))
+        replacers: List[read_course_file.Replacer] = []
+        build_elapsed = measure(lambda: replacers.append(
+            read_course_file.Replacer(replacements)))
+        replacer = replacers[0]
+        if replacer.apply(text) != read_course_file.apply_replacements(text, replacements):
+            print(f"Critical: replacer differs for {size} rules.")
+            sys.exit(1)
+        loop_elapsed = measure(lambda: [read_course_file.apply_replacements(
+            text, replacements) for _ in range(100)])
+        replacer_elapsed = measure(
+            lambda: [replacer.apply(text) for _ in range(100)])
+        print(f"replacements: {size} rules in {len(replacer.stages)} passes, {len(replacer.chains)} chains, "
+              f"build {build_elapsed:.3f}s, 100 pages loop {loop_elapsed:.3f}s, replacer {replacer_elapsed:.3f}s")
+
+
+# unique synthetic student names in the format of students.csv
+def get_synthetic_names(amount: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    names: Dict[str, None] = {}
+    while len(names) < amount:
+        last_name = "".join(rng.choice("bdfghklmnprstwz") + rng.choice("aeiou")
+                            for _ in range(rng.randint(2, 4))).capitalize()
+        names[f"{last_name}, {rng.choice(FIRST_NAMES)}"] = None
+    return list(names.keys())
+
+
+# result of matching the query, None when the match is ambiguous and the program would stop,
+# and the messages of all warnings and critical problems found meanwhile
+def get_decision(match: Callable[[str], str], query: str) -> Tuple[Optional[str], List[str]]:
+    diagnostics.sink = diagnostics.Sink()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            decision: Optional[str] = match(query)
+        except SystemExit:
+            decision = None
+    return decision, [diagnostic.message for diagnostic in diagnostics.sink.diagnostics]
+
+
+# sizes are the amount of names in the roster
+def benchmark_matcher(sizes: List[int]) -> None:
+    rng = random.Random(0)
+    for size in sizes:
+        names = get_synthetic_names(size)
+        queries = [get_ocr_error(rng, rng.choice(names)) for _ in range(20)]
+        matchers: List[sort_data.Matcher] = []
+        build_elapsed = measure(
+            lambda: matchers.append(sort_data.Matcher(names)))
+        decisions: List[Tuple[Optional[str], List[str]]] = []
+        matcher_elapsed = measure(lambda: decisions.extend(
+            get_decision(matchers[0].match, query) for query in queries))
+        full_decisions: List[Tuple[Optional[str], List[str]]] = []
+        full_elapsed = measure(lambda: full_decisions.extend(get_decision(
+            lambda query: sort_data.get_match(query, names), query) for query in queries))
+        for query, decision, full_decision in zip(queries, decisions, full_decisions):
+            if decision != full_decision:
+                print(f"Critical: matcher differs from get_match for '{query}' in {size} names: "
+                      f"{decision} instead of {full_decision}")
+                sys.exit(1)
+        print(f"matcher: {size} names, build {build_elapsed:.3f}s, "
+              f"{len(queries)} queries {matcher_elapsed:.3f}s, full scan {full_elapsed:.3f}s")
+
+
+# compare loading the snapshot with the students it has been written from
+def benchmark_snapshot(sizes: List[int]) -> None:
+    input_hashes = {"files/students.csv": "synthetic"}
+    with tempfile.TemporaryDirectory() as out_dir:
+        snapshot_file = os.path.join(out_dir, "students.snapshot")
+        for size in sizes:
+            students = {student.name: student for student in get_synthetic_students(size)}
+            save_elapsed = measure(lambda: snapshot.save(
+                snapshot_file, students, input_hashes))
+            loaded: List[Optional[Dict[str, sort_data.Student]]] = []
+            load_elapsed = measure(lambda: loaded.append(
+                snapshot.load(snapshot_file, input_hashes)))
+            loaded_students = loaded[0]
+            if loaded_students is None or [repr(student.get_all_courses()) for student in loaded_students.values()] != \
+                    [repr(student.get_all_courses()) for student in students.values()]:
+                print(f"Critical: loaded snapshot differs for {size} students.")
+                sys.exit(1)
+            if snapshot.load(snapshot_file, {"files/students.csv": "changed"}) is not None:
+                print("Critical: stale snapshot has been loaded.")
+                sys.exit(1)
+            print(f"snapshot: {size} students, {os.path.getsize(snapshot_file)} bytes, "
+                  f"save {save_elapsed:.3f}s, load {load_elapsed:.3f}s")
+
+
+# compare compiling the template for every student with batch rendering
+def benchmark_print_outs(sizes: List[int]) -> None:
+    import create_print_out
+    import renderer
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for size in sizes:
+            students = get_synthetic_students(size)
+            jobs = [(os.path.join(out_dir, f"{idx}.md"), create_print_out.get_student_print_out_variables(student))
+                    for idx, student in enumerate(students)]
+            template_elapsed = measure(lambda: [create_print_out.write_template(
+                "files/student_print_out_template.md", out_file, **variables) for out_file, variables in jobs])
+            template_out = [open(out_file, encoding="utf-8").read() for out_file, _ in jobs]
+            results: List[str] = []
+            for workers, use_processes in [(1, False), (4, False), (4, True)]:
+                batch_renderer = renderer.Renderer(bytecode_cache_dir=os.path.join(out_dir, "cache"))
+                elapsed = measure(lambda: batch_renderer.write_batch(
+                    "student_print_out_template.md", jobs, workers, use_processes))
+                if [open(out_file, encoding="utf-8").read() for out_file, _ in jobs] != template_out:
+                    print(f"Critical: batch rendering differs for {size} students.")
+                    sys.exit(1)
+                results.append(f"{workers} {'processes' if use_processes else 'threads'} {elapsed:.3f}s "
+                               f"({batch_renderer.timings})")
+            print(f"print-outs: {size} students, template per student {template_elapsed:.3f}s, "
+                  f"batch {'; '.join(results)}")
+
+
+# compare the columnar course table with walking the course objects
+def benchmark_course_table(sizes: List[int]) -> None:
+    import numpy as np
+    import course_table
+
+    for size in sizes:
+        students = get_synthetic_students(size)
+        tables: List[course_table.CourseTable] = []
+        build_elapsed = measure(lambda: tables.append(course_table.CourseTable(
+            course for student in students for course in student.get_all_courses())))
+        table = tables[0]
+        course_ids = table.get_student_course_ids(students)
+
+        def count_students() -> None:
+            for student in students:
+                student.count_stuff()
+        python_elapsed = measure(count_students)
+        weekly_periods: List[np.ndarray] = []
+        table_elapsed = measure(lambda: weekly_periods.append(table.get_weekly_periods(course_ids)))
+        if list(weekly_periods[0]) != [student.weekly_periods for student in students] or \
+                list(table.get_amount_courses(course_ids)) != [student.amount_courses for student in students]:
+            print(f"Critical: course table counts differ for {size} students.")
+            sys.exit(1)
+        occupancies = table.get_occupancies(course_ids)
+        conflicts = table.get_conflicts(course_ids)
+        for idx, student in enumerate(students):
+            occupancy = 0
+            conflict = 0
+            for course in student.get_all_courses():
+                conflict |= occupancy & course.occupancy
+                occupancy |= course.occupancy
+            if int(occupancies[idx]) != occupancy or int(conflicts[idx]) != conflict:
+                print(f"Critical: course table masks differ for {size} students.")
+                sys.exit(1)
+        print(f"course table: {size} students, {len(table.courses)} courses, build {build_elapsed:.3f}s, "
+              f"weekly periods python {python_elapsed:.3f}s, table {table_elapsed:.4f}s")
+
+
+# compare the vectorized conflict report with checking each student on its own
+def benchmark_conflicts(sizes: List[int]) -> None:
+    import detect_conflicts
+
+    for size in sizes:
+        students = get_synthetic_students(size)
+        reports: List[detect_conflicts.ConflictReport] = []
+        elapsed = measure(lambda: reports.append(
+            detect_conflicts.ConflictReport(students)))
+        report = reports[0]
+        # key: pair of course objects, value: amount of students
+        pairs: Dict[Tuple[int, int], int] = {}
+        python_conflicts: List[int] = []
+
+        def check_students() -> None:
+            for student in students:
+                courses = student.get_all_courses()
+                occupancy = 0
+                conflict = 0
+                for idx, course in enumerate(courses):
+                    conflict |= occupancy & course.occupancy
+                    occupancy |= course.occupancy
+                    for other in courses[:idx]:
+                        if course.occupancy & other.occupancy:
+                            ids = (report.table.get_id(course), report.table.get_id(other))
+                            key = (min(ids), max(ids))
+                            pairs[key] = pairs.get(key, 0) + 1
+                python_conflicts.append(contact_graph.count_bits(conflict))
+        python_elapsed = measure(check_students)
+        report_pairs = {(int(first), int(second)): int(amount)
+                        for (first, second), amount in zip(report.pair_courses, report.pair_students)}
+        if python_conflicts != list(report.student_conflicts) or pairs != report_pairs:
+            print(f"Critical: conflict report differs for {size} students.")
+            sys.exit(1)
+        print(f"conflicts: {size} students, {len(report_pairs)} conflicting pairs, "
+              f"python {python_elapsed:.3f}s, report {elapsed:.3f}s")
+
+
+def benchmark_room_index(sizes: List[int]) -> None:
+    import room_index
+
+    for size in sizes:
+        students = get_synthetic_students(size)
+        indices: List[room_index.RoomIndex] = []
+        build_elapsed = measure(lambda: indices.append(room_index.RoomIndex(students)))
+        index = indices[0]
+        # count the students in the rooms of a few courses one by one
+        for course in students[0].get_all_courses():
+            time_slot = course.time_slots[0]
+            headcount = sum(1 for student in students if any(
+                other_slot == time_slot and other_slot.room == time_slot.room
+                for other in student.get_all_courses() for other_slot in other.time_slots))
+            if index.get_headcount(time_slot.room, time_slot.day, time_slot.period) != headcount:
+                print(f"Critical: room index headcount differs for {size} students.")
+                sys.exit(1)
+        cells = [(room, day, period) for room in index.rooms for day in range(5) for period in range(1, 11)]
+        lookup_elapsed = measure(lambda: [index.get_headcount(*cell) for cell in cells])
+        print(f"room index: {size} students, {len(index.rooms)} rooms, build {build_elapsed:.3f}s, "
+              f"{len(cells)} lookups {lookup_elapsed:.3f}s")
+
+
+# component ids by a plain breadth first search
+def get_python_components(connections: List[Dict[int, int]], min_weight: int) -> List[int]:
+    neighbours: List[List[int]] = [[] for _ in connections]
+    for source, connected in enumerate(connections):
+        for target, weight in connected.items():
+            if weight >= min_weight:
+                neighbours[source].append(target)
+                neighbours[target].append(source)
+    components = [-1] * len(connections)
+    component = 0
+    for start in range(len(connections)):
+        if components[start] != -1:
+            continue
+        components[start] = component
+        queue = [start]
+        while queue:
+            node = queue.pop()
+            for neighbour in neighbours[node]:
+                if components[neighbour] == -1:
+                    components[neighbour] = component
+                    queue.append(neighbour)
+        component += 1
+    return components
+
+
+def benchmark_network(sizes: List[int]) -> None:
+    import numpy as np
+    import analyse_network
+
+    for size in sizes:
+        students = get_synthetic_students(size)
+        connections = contact_graph.ContactGraph(students).week_connections
+        graphs: List[analyse_network.Graph] = []
+        build_elapsed = measure(lambda: graphs.append(analyse_network.Graph(connections)))
+        graph = graphs[0]
+        results: List[np.ndarray] = []
+        components_elapsed = measure(lambda: results.append(analyse_network.get_components(graph, 3)))
+        python_components: List[List[int]] = []
+        python_elapsed = measure(lambda: python_components.append(get_python_components(connections, 3)))
+        if list(results[0]) != python_components[0]:
+            print(f"Critical: components differ for {size} students.")
+            sys.exit(1)
+        communities_elapsed = measure(lambda: results.append(analyse_network.get_communities(graph)))
+        communities = results[1]
+        split_elapsed = measure(lambda: results.append(analyse_network.get_cohort_split(graph, communities)))
+        groups = np.array([0 if student.group == "A" else 1 for student in students])
+        print(f"network: {size} students, {len(graph.sources) // 2} edges, build {build_elapsed:.3f}s, "
+              f"components {components_elapsed:.3f}s (python {python_elapsed:.3f}s), "
+              f"{communities.max() + 1} communities {communities_elapsed:.3f}s, "
+              f"cohort split {split_elapsed:.3f}s cut {graph.get_cut_weight(results[2])} "
+              f"(groups {graph.get_cut_weight(groups)})")
+
+
+# apply changes incrementally and compare with recomputing all students
+def benchmark_what_if(sizes: List[int]) -> None:
+    import what_if
+
+    rng = random.Random(0)
+    for size in sizes:
+        students = get_synthetic_students(size)
+        scenarios: List[what_if.WhatIf] = []
+        build_elapsed = measure(lambda: scenarios.append(what_if.WhatIf(students)))
+        scenario = scenarios[0]
+        if scenario.get_connections() != contact_graph.ContactGraph(students).week_connections:
+            print(f"Critical: what-if contact graph differs for {size} students.")
+            sys.exit(1)
+        changed = scenario.copy()
+        courses = [course for course in students[0].get_all_courses()]
+        elapsed = [
+            measure(lambda: changed.remove_course(courses[0])),
+            measure(lambda: changed.drop_time_slot(
+                courses[1], courses[1].time_slots[0].day, courses[1].time_slots[0].period)),
+            measure(lambda: changed.move_time_slot(
+                courses[2], courses[2].time_slots[0].day, courses[2].time_slots[0].period,
+                rng.randrange(5), rng.randint(1, 10), courses[3].time_slots[0].room)),
+            measure(lambda: changed.exclude_group("B", [0])),
+        ]
+        stats: List[Dict[str, float]] = []
+        stats_elapsed = measure(lambda: stats.append(changed.get_stats()))
+        recomputed = changed.copy()
+        recomputed.update_students(range(len(students)))
+        if changed.get_connections() != recomputed.get_connections() or \
+                list(changed.degrees) != list(recomputed.degrees):
+            print(f"Critical: incremental what-if differs for {size} students.")
+            sys.exit(1)
+        print(f"what-if: {size} students, build {build_elapsed:.3f}s, remove course {elapsed[0]:.4f}s, "
+              f"drop slot {elapsed[1]:.4f}s, move slot {elapsed[2]:.4f}s, group home monday {elapsed[3]:.3f}s, "
+              f"stats {stats_elapsed:.3f}s {stats[0]}")
+
+
+# write time and size of all available network formats
+def benchmark_export(sizes: List[int]) -> None:
+    import export_graph
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for size in sizes:
+            students = get_synthetic_students(size)
+            connections = contact_graph.ContactGraph(students).week_connections
+            graph_students = create_gephi.create_graph_students(students, connections)
+            results: List[str] = []
+            for format in export_graph.EXPORTERS:
+                if format == "npz" and export_graph.np is None or format == "parquet" and export_graph.pyarrow is None:
+                    continue
+                out_base = os.path.join(out_dir, f"network_{size}")
+                elapsed = measure(lambda: export_graph.export(
+                    out_base, [format], write_gexf.STUDENT_ATTRIBUTES, graph_students, connections))
+                out_size = sum(os.path.getsize(os.path.join(out_dir, file_name)) for file_name in os.listdir(out_dir)
+                               if file_name.startswith(f"network_{size}"))
+                for file_name in os.listdir(out_dir):
+                    os.remove(os.path.join(out_dir, file_name))
+                results.append(f"{format} {elapsed:.3f}s {out_size // 1024}KiB")
+            edge_amount = sum(len(connected) for connected in connections)
+            print(f"export: {size} students, {edge_amount} edges, {', '.join(results)}")
+
+
+# the page parser before the patterns were precompiled, as reference
+LEGACY_STUDENT_PATTERN = r"  +(\S{3,}(?:\S{2,}|(?: \S| {,15}\S{4}))+) +(?:(\w*) *([Pp]+\S)|(\w*))"
+
+
+def get_legacy_matches(text: str) -> List[Tuple[Optional[str], ...]]:
+    return [match.groups() for match in re.finditer(LEGACY_STUDENT_PATTERN, text)]
+
+
+def get_legacy_file(text: str) -> List[object]:
+    header: List[object] = [list(list(re.finditer(pattern, text, re.MULTILINE))[0].groups()) for pattern in [
+        r"Kursliste(?:\n.*\n)?\n?\s*?([\w\d]{2,4}) *- *(.+?\S)(?:   +| *?\n)",
+        r"Kursleiter:(?:\n.*\n)?\n?\s*?(\S.*?\S)(?:   +| *?\n)",
+        r"GRUPPE *([A-Z])"]]
+    lines = text.split("\n")
+    name_line_idx = [idx for idx, line in enumerate(lines) if "name" in line.lower()][0]
+    return header + get_legacy_matches("\n".join(lines[name_line_idx + 1:]))
+
+
+def get_file(text: str) -> List[object]:
+    header = [read_course_file.get_element(text, pattern) for pattern in [
+        read_course_file.COURSE_PATTERN, read_course_file.TEACHER_PATTERN, read_course_file.GROUP_PATTERN]]
+    return header + [match.groups() for match in read_course_file.STUDENT_PATTERN.finditer(
+        text, read_course_file.get_student_rows_start(text))]
+
+
+# random student row made of words of 1 to 7 characters, separated by 1 to 17 spaces
+def get_random_row(rng: random.Random) -> str:
+    parts: List[str] = []
+    for _ in range(rng.randint(1, 6)):
+        parts.append(" " * rng.choice([1, 1, 2, 2, 3, 5, 14, 15, 16, 17]))
+        parts.append("".join(rng.choice("aAP1,pı") for _ in range(rng.randint(1, 7))))
+    if rng.random() < 0.5:
+        parts.append(" " * rng.randint(1, 3))
+    if rng.random() < 0.2:
+        parts.insert(rng.randrange(len(parts)), "\t")
+    return "".join(parts)
+
+
+# compare the page parser with the legacy patterns on generated pages
+# random rows are compared in tests/test_page_parser.py
+# sizes are the amount of students of the generated school
+def benchmark_page_parser(sizes: List[int]) -> None:
+    import generate_school
+
+    # a long word without a following space, the legacy pattern tries every way to split it
+    for length in [16, 20, 24]:
+        row = "  " + "a" * length
+        legacy_elapsed = measure(lambda: get_legacy_matches(row))
+        elapsed = measure(lambda: list(read_course_file.STUDENT_PATTERN.finditer(row)))
+        print(f"page parser: word of {length} characters, legacy {legacy_elapsed:.6f}s, precompiled {elapsed:.6f}s")
+    row = "  " + "a" * 100000
+    print(f"page parser: word of {len(row) - 2} characters, "
+          f"precompiled {measure(lambda: list(read_course_file.STUDENT_PATTERN.finditer(row))):.6f}s")
+
+    template_dir = os.path.abspath("files")
+    work_dir = os.getcwd()
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as school_dir:
+            generate_school.generate(school_dir, max(1, size // len(generate_school.GROUPS)), template_dir=template_dir)
+            # the page paths are relative to the generated school
+            os.chdir(school_dir)
+            try:
+                replacer = read_course_file.Replacer(read_course_file.get_replacements())
+                texts = [replacer.apply(read_course_file.read_file(file_path))
+                         for file_path in sort_data.get_page_paths()]
+            finally:
+                os.chdir(work_dir)
+        legacy_files: List[List[object]] = []
+        legacy_elapsed = measure(lambda: legacy_files.extend(get_legacy_file(text) for text in texts))
+        files: List[List[object]] = []
+        elapsed = measure(lambda: files.extend(get_file(text) for text in texts))
+        if files != legacy_files:
+            print(f"Critical: page parser differs on the pages of {size} students.")
+            sys.exit(1)
+        print(f"page parser: {len(texts)} pages of {size} students, legacy {legacy_elapsed:.3f}s, "
+              f"precompiled {elapsed:.3f}s")
+
+
+# generate a school and run the pipeline on its files, sizes are the amount of students in the school
+def benchmark_pipeline(sizes: List[int]) -> None:
+    import generate_school
+    import create_print_out
+
+    template_dir = os.path.abspath("files")
+    work_dir = os.getcwd()
+    for size in sizes:
+        students_per_group = max(1, size // len(generate_school.GROUPS))
+        with tempfile.TemporaryDirectory() as school_dir:
+            generate_elapsed = measure(lambda: generate_school.generate(
+                school_dir, students_per_group, template_dir=template_dir))
+            for out_dir in ["out/students", "out/gephi"]:
+                os.makedirs(os.path.join(school_dir, out_dir))
+            students: Dict[str, sort_data.Student] = {}
+            # warnings of the pipeline aren't of interest here, only when it stops
+            output = io.StringIO()
+            os.chdir(school_dir)
+            try:
+                with contextlib.redirect_stdout(output):
+                    replacer = read_course_file.Replacer(read_course_file.get_replacements())
+                    parse_elapsed = measure(lambda: [read_course_file.parse_file(file_path, replacer)
+                                                     for file_path in sort_data.get_page_paths()])
+                    students_elapsed = measure(lambda: students.update(sort_data.get_students()))
+                    gephi_elapsed = measure(lambda: create_gephi.create_gefx(list(students.values())))
+                    print_outs_elapsed = measure(lambda: create_print_out.create_student_print_outs(
+                        list(students.values())))
+            except SystemExit:
+                print(output.getvalue().rstrip().split("\n")[-1])
+                print(f"Critical: pipeline stopped on the synthetic school of {size} students.")
+                sys.exit(1)
+            finally:
+                os.chdir(work_dir)
+            if len(students) != students_per_group * len(generate_school.GROUPS):
+                print(f"Critical: {len(students)} of {students_per_group * len(generate_school.GROUPS)} "
+                      f"synthetic students resolved.")
+                sys.exit(1)
+        print(f"pipeline: {len(students)} students, generate {generate_elapsed:.3f}s, parse_file {parse_elapsed:.3f}s, "
+              f"get_students {students_elapsed:.3f}s, create_gefx {gephi_elapsed:.3f}s, "
+              f"create_print_out {print_outs_elapsed:.3f}s")
+
+
+# load test the query server on localhost with a mix of student, contact, course, room and slot queries
+# every query is sent twice, the second time it is answered from the cache
+def benchmark_query_server(sizes: List[int]) -> None:
+    import concurrent.futures
+    import http.client
+    import threading
+    import urllib.parse
+    import query_server
+
+    for size in sizes:
+        students = get_synthetic_students(size)
+        indices: List[query_server.QueryIndex] = []
+        build_elapsed = measure(lambda: indices.append(query_server.QueryIndex(students, cache_size=4 * size)))
+        index = indices[0]
+        rng = random.Random(0)
+        paths = [f"/students/{urllib.parse.quote(student.name, safe='')}" for student in rng.sample(students, min(size, 500))] + \
+            [f"/students/{urllib.parse.quote(student.name, safe='')}/contacts?day={rng.randrange(5)}"
+             for student in rng.sample(students, min(size, 500))] + \
+            [f"/courses/{urllib.parse.quote(label, safe='')}"
+             for label in rng.sample(list(index.courses.keys()), min(100, len(index.courses)))] + \
+            [f"/rooms/{urllib.parse.quote(room, safe='')}" for room in rng.sample(index.rooms, min(100, len(index.rooms)))] + \
+            [f"/slots/{day}/{period}" for day in range(5) for period in range(1, 11)]
+        rng.shuffle(paths)
+        server = query_server.create_server(index, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        host, port = server.server_address[:2]
+        host = str(host)
+        connections = threading.local()
+
+        def get(path: str) -> Tuple[int, bytes]:
+            if not hasattr(connections, "connection"):
+                connections.connection = http.client.HTTPConnection(host, port)
+            connections.connection.request("GET", path)
+            response = connections.connection.getresponse()
+            return response.status, response.read()
+
+        responses: List[List[Tuple[int, bytes]]] = []
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                cold_elapsed = measure(lambda: responses.append(list(executor.map(get, paths))))
+                hot_elapsed = measure(lambda: responses.append(list(executor.map(get, paths))))
+        finally:
+            server.shutdown()
+            server.server_close()
+        for path, cold, hot in zip(paths, *responses):
+            if cold[0] != 200 or cold != hot or cold != index.get_uncached_response(path):
+                print(f"Critical: wrong answer of the query server for {path} with {size} students.")
+                sys.exit(1)
+        print(f"query server: {size} students, build {build_elapsed:.3f}s, {len(paths)} queries, "
+              f"cold {len(paths) / cold_elapsed:.0f}/s, cached {len(paths) / hot_elapsed:.0f}/s")
+
+
+# course labels and tutor of each student, to compare differently processed datasets
+def get_student_summaries(students: Dict[str, sort_data.Student]) -> Dict[str, Tuple]:
+    return {key: (student.tutor, [course.full_label for course in student.get_all_courses()])
+            for key, student in students.items()}
+
+
+# the same synthetic school as a single cohort and split into two cohorts, one per group, matched serially and in parallel
+def benchmark_shards(sizes: List[int]) -> None:
+    import generate_school
+
+    template_dir = os.path.abspath("files")
+    work_dir = os.getcwd()
+    for size in sizes:
+        students_per_group = max(1, size // len(generate_school.GROUPS))
+        results: List[Dict[str, sort_data.Student]] = []
+        with tempfile.TemporaryDirectory() as school_dir:
+            generate_school.generate(school_dir, students_per_group, template_dir=template_dir)
+            output = io.StringIO()
+            os.chdir(school_dir)
+            try:
+                with contextlib.redirect_stdout(output):
+                    single_elapsed = measure(lambda: results.append(sort_data.get_students()))
+                    # cohort 11 is group A, cohort 12 is group B
+                    os.rename("files/12_A", "files/11_A")
+                    with open("files/students.csv", "r", encoding="utf-8") as file:
+                        rows = file.readlines()
+                    for label, group in [("11", "A"), ("12", "B")]:
+                        with open(f"files/students_{label}.csv", "w+", encoding="utf-8") as file:
+                            file.writelines(row for row in rows if row.startswith(f"{group};"))
+                    serial_elapsed = measure(lambda: results.append(sort_data.get_students()))
+                    parallel_elapsed = measure(lambda: results.append(sort_data.get_students(workers=4)))
+            except SystemExit:
+                print(output.getvalue().rstrip().split("\n")[-1])
+                print(f"Critical: pipeline stopped on the synthetic school of {size} students.")
+                sys.exit(1)
+            finally:
+                os.chdir(work_dir)
+        summaries = [get_student_summaries(students) for students in results]
+        if any(summary != summaries[0] for summary in summaries) or \
+                len(summaries[0]) != students_per_group * len(generate_school.GROUPS):
+            print(f"Critical: sharded students differ for {size} students.")
+            sys.exit(1)
+        print(f"shards: {len(summaries[0])} students, one cohort {single_elapsed:.3f}s, "
+              f"two cohorts {serial_elapsed:.3f}s, two cohorts with 4 workers {parallel_elapsed:.3f}s")
+
+
+BENCHMARKS: Dict[str, Callable[[List[int]], None]] = {
+    "student_connections": benchmark_student_connections,
+    "incidence_matrix": benchmark_incidence_matrix,
+    "contact_graph": benchmark_contact_graph,
+    "gexf": benchmark_gexf,
+    "replacements": benchmark_replacements,
+    "matcher": benchmark_matcher,
+    "snapshot": benchmark_snapshot,
+    "print_outs": benchmark_print_outs,
+    "course_table": benchmark_course_table,
+    "conflicts": benchmark_conflicts,
+    "room_index": benchmark_room_index,
+    "network": benchmark_network,
+    "what_if": benchmark_what_if,
+    "export": benchmark_export,
+    "pipeline": benchmark_pipeline,
+    "page_parser": benchmark_page_parser,
+    "query_server": benchmark_query_server,
+    "shards": benchmark_shards,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("stages", nargs="*",
+                        help=f"stages to benchmark, all by default: {', '.join(BENCHMARKS.keys())}")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 20000],
+                        help="problem sizes, amount of synthetic students for most stages")
+    args = parser.parse_args()
+    for stage in args.stages:
+        if stage not in BENCHMARKS:
+            parser.error(f"unknown stage '{stage}'")
+    for stage in args.stages or BENCHMARKS.keys():
+        BENCHMARKS[stage](args.sizes)
+
+
+if __name__ == "__main__":
+    main()
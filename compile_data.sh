@@ -3,20 +3,44 @@ set -euo pipefail
 IFS=$' \n\t'
 DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" >/dev/null 2>&1 && pwd)"
 
+# with --incremental existing output is kept and only changed files are converted
+# with --profile REPORT the pdf conversion is added to the report of main.py
+INCREMENTAL=false
+PROFILE=""
+previous=""
+for arg in "$@"; do
+    if [ "$arg" = "--incremental" ]; then
+        INCREMENTAL=true
+    elif [ "$previous" = "--profile" ]; then
+        PROFILE="$arg"
+    elif [[ "$arg" == --profile=* ]]; then
+        PROFILE="${arg#--profile=}"
+    fi
+    previous="$arg"
+done
+
 function create_folder() {
+    if [ "$INCREMENTAL" = true ]; then
+        echo "creating $1..."
+        mkdir -p "$1"
+        return
+    fi
     echo "creating and clearing $1..."
     mkdir -p "$1"
     touch "$1/dummy"
     rm $1/*
 }
 
+# all files are converted by a pool of pandoc processes
 function mdtopdf() {
-    for file in "$@"; do
-        file_name="${file##*/}"
-        file_no_extension="${file%.*}"
-        echo "converting $file_name to pdf..."
-        pandoc $file -o "$file_no_extension.pdf"
-    done
+    local args=(--workers "$(nproc)")
+    if [ "$INCREMENTAL" = true ]; then
+        args+=(--incremental)
+    fi
+    if [ -n "$PROFILE" ]; then
+        args+=(--profile "$PROFILE")
+    fi
+    python3 "$DIR/convert_print_outs.py" "${args[@]}" "$@"
 }
 
 create_folder "$DIR/out/students"
@@ -25,8 +49,8 @@ create_folder "$DIR/out/gephi"
 
 echo "loading data, creating markdown..."
 cd $DIR
-python3 "$DIR/main.py"
+python3 "$DIR/main.py" "$@"
 
-mdtopdf $DIR/out/students/*
+mdtopdf $DIR/out/students/*.md
 
 echo "all done, enjoy!"
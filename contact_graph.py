@@ -0,0 +1,106 @@
+"""
+connect students by the time slots they actually spend in the same room
+each student has a weekly occupancy mask per room, one bit per period (see read_time_table.SlotLayout.get_slot_bit)
+the time slots of a student are laid out like all time slots of the school, rooms of different schools with the same name are different rooms, see dataset.get_school_key
+two students are in contact in a time slot when they are in the same room at that time,
+being in the same room twice at the same time (every other week courses) counts only once
+"""
+
+from typing import Iterable, List, Dict, Optional
+
+import dataset
+import sort_data
+import read_time_table
+
+
+# key: room id, value: weekly mask of all time slots this student spends in this room
+# room_ids, key: room key (see dataset.get_school_key), value: room id
+def get_occupancy(student: sort_data.Student, room_ids: Dict[str, int]) -> Dict[int, int]:
+    occupancy: Dict[int, int] = {}
+    for course in student.get_all_courses():
+        for time_slot in course.time_slots:
+            room_id = room_ids.setdefault(dataset.get_school_key(course.school, time_slot.room), len(room_ids))
+            occupancy[room_id] = occupancy.get(room_id, 0) | (
+                1 << course.layout.get_slot_bit(time_slot.day, time_slot.period))
+    return occupancy
+
+
+def count_bits(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+class ContactGraph:
+    def __init__(self, students: List[sort_data.Student]):
+        self.students = students
+        # key: room key, value: room id
+        self.room_ids: Dict[str, int] = {}
+        self.occupancies = [get_occupancy(student, self.room_ids)
+                            for student in students]
+        # time slots of each student, students in contact are of the same school
+        self.layouts = [read_time_table.get_courses_layout(student.get_all_courses()) for student in students]
+        # days of the longest week of all schools
+        self.days = max((layout.days for layout in self.layouts), default=0)
+        # key: connected student id with lower id, value: weekly mask of shared time slots
+        self.contacts: List[Dict[int, int]] = []
+        # key: room id, value: ids of all already processed students using this room, ascending
+        room_index: Dict[int, List[int]] = {}
+        for id, occupancy in enumerate(self.occupancies):
+            contacts: Dict[int, int] = {}
+            for room_id, mask in occupancy.items():
+                for other_id in room_index.get(room_id, []):
+                    shared = mask & self.occupancies[other_id][room_id]
+                    if shared != 0:
+                        contacts[other_id] = contacts.get(other_id, 0) | shared
+                room_index.setdefault(room_id, []).append(id)
+            self.contacts.append(
+                {other_id: contacts[other_id] for other_id in sorted(contacts)})
+
+        # key: connected student id with lower id, value: amount of shared periods in the whole week or on a single day
+        self.week_connections: List[Dict[int, int]] = []
+        self.day_connections: List[List[Dict[int, int]]] = [
+            [] for _ in range(self.days)]
+        day_bits = [count_bits(mask)
+                    for mask in range(1 << max((layout.periods_per_day for layout in self.layouts), default=0))]
+        for contacts, layout in zip(self.contacts, self.layouts):
+            week_connected: Dict[int, int] = {}
+            days_connected: List[Dict[int, int]] = [
+                {} for _ in range(self.days)]
+            for other_id, shared in contacts.items():
+                week_connected[other_id] = count_bits(shared)
+                for day in range(layout.days):
+                    amount = day_bits[shared >> (
+                        day * layout.periods_per_day) & ((1 << layout.periods_per_day) - 1)]
+                    if amount != 0:
+                        days_connected[day][other_id] = amount
+            self.week_connections.append(week_connected)
+            for day, day_connected in enumerate(days_connected):
+                self.day_connections[day].append(day_connected)
+
+    # key: connected student id with lower id, value: amount of shared periods on the given days, on all days when not given
+    def get_connections(self, days: Optional[Iterable[int]] = None) -> List[Dict[int, int]]:
+        days = None if days is None else list(days)
+        # key: layout, value: mask of the given days
+        days_masks: Dict[read_time_table.SlotLayout, int] = {}
+        connections: List[Dict[int, int]] = []
+        for contacts, layout in zip(self.contacts, self.layouts):
+            if layout not in days_masks:
+                days_masks[layout] = layout.get_days_mask(days)
+            connected: Dict[int, int] = {}
+            for other_id, shared in contacts.items():
+                amount = count_bits(shared & days_masks[layout])
+                if amount != 0:
+                    connected[other_id] = amount
+            connections.append(connected)
+        return connections
+
+    # connections without the given days, e.g. when a day is split into groups
+    # only the connections of the removed days have to be subtracted
+    def get_connections_without(self, days: Iterable[int]) -> List[Dict[int, int]]:
+        connections = [dict(connected) for connected in self.week_connections]
+        for day in set(days) & set(range(self.days)):
+            for connected, day_connected in zip(connections, self.day_connections[day]):
+                for other_id, amount in day_connected.items():
+                    connected[other_id] -= amount
+                    if connected[other_id] == 0:
+                        del connected[other_id]
+        return connections
@@ -0,0 +1,73 @@
+"""
+convert markdown print-outs to pdf with a pool of pandoc processes
+run with: python3 convert_print_outs.py [--workers N] [--incremental] [--profile REPORT] file.md ...
+"""
+
+from typing import List, Optional
+import argparse
+import os
+import sys
+import shutil
+import subprocess
+import concurrent.futures
+
+import profiler
+
+
+def get_pdf_path(file_path: str) -> str:
+    return f"{os.path.splitext(file_path)[0]}.pdf"
+
+
+# pandoc runs in its own process, threads only wait for it
+def convert(file_path: str) -> Optional[str]:
+    result = subprocess.run(["pandoc", file_path, "-o", get_pdf_path(file_path)],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, encoding="utf-8")
+    if result.returncode != 0:
+        return f"Critical: pandoc failed for {file_path}:\n{result.stdout}"
+    return None
+
+
+# with incremental only files newer than their pdf are converted
+def convert_all(file_paths: List[str], workers: int = 1, incremental: bool = False) -> None:
+    if shutil.which("pandoc") is None:
+        print("Critical: pandoc not found.")
+        sys.exit(1)
+    if incremental:
+        file_paths = [file_path for file_path in file_paths
+                      if not os.path.isfile(get_pdf_path(file_path)) or
+                      os.path.getmtime(get_pdf_path(file_path)) <= os.path.getmtime(file_path)]
+    profiler.count("pandoc conversions", len(file_paths))
+    errors: List[str] = []
+    with profiler.stage("pandoc"), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for file_path, error in zip(file_paths, executor.map(convert, file_paths)):
+            if error is not None:
+                errors.append(error)
+            else:
+                print(f"converted {os.path.basename(file_path)} to pdf")
+    for error in errors:
+        print(error)
+    if len(errors) != 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", help="markdown files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="amount of pandoc processes running at the same time")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only convert files newer than their pdf")
+    parser.add_argument("--profile", default=None, metavar="REPORT",
+                        help="time the conversion and add it to this json report of main.py --profile, "
+                             "a new report is written when it doesn't exist")
+    args = parser.parse_args()
+    if args.profile is not None:
+        profiler.enable()
+        if os.path.isfile(args.profile):
+            profiler.merge_report(args.profile)
+    try:
+        convert_all(args.files, args.workers, args.incremental)
+    finally:
+        if args.profile is not None:
+            profiler.write_report(args.profile)
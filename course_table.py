@@ -0,0 +1,101 @@
+"""
+columnar store of all courses for vectorized queries over many students
+every course gets an integer id, all time slots are stored in numpy arrays
+and each course has a weekly occupancy mask (see read_time_table.SlotLayout.get_slot_bit)
+used for queries over all students at once, e.g. detect_conflicts.py and what_if.py
+Student.count_stuff and the print-out grids stay per object, they are cheap per student and run without numpy
+requires numpy
+"""
+
+from typing import Iterable, List, Dict
+import numpy as np
+
+import dataset
+import read_time_table
+import sort_data
+
+# amount of set bits of every byte
+BYTE_BITS = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+
+
+# amount of set bits of each mask
+def count_bits(masks: np.ndarray) -> np.ndarray:
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    return BYTE_BITS[masks.view(np.uint8)].reshape(masks.shape + (8,)).sum(axis=-1)
+
+
+class CourseTable:
+    def __init__(self, courses: Iterable[read_time_table.Course]):
+        # key: id of course object, value: course id
+        self.course_ids: Dict[int, int] = {}
+        self.courses: List[read_time_table.Course] = []
+        # key: room key (see dataset.get_school_key), value: room id
+        self.room_ids: Dict[str, int] = {}
+        slot_courses: List[int] = []
+        slot_days: List[int] = []
+        slot_periods: List[int] = []
+        slot_rooms: List[int] = []
+        for course in courses:
+            if id(course) in self.course_ids:
+                continue
+            course_id = len(self.courses)
+            self.course_ids[id(course)] = course_id
+            self.courses.append(course)
+            for time_slot in course.time_slots:
+                slot_courses.append(course_id)
+                slot_days.append(time_slot.day)
+                slot_periods.append(time_slot.period)
+                slot_rooms.append(self.room_ids.setdefault(
+                    dataset.get_school_key(course.school, time_slot.room), len(self.room_ids)))
+        self.rooms = list(self.room_ids.keys())
+        # one entry per time slot, ordered by course id
+        self.slot_courses = np.array(slot_courses, dtype=np.int32)
+        self.slot_days = np.array(slot_days, dtype=np.int8)
+        self.slot_periods = np.array(slot_periods, dtype=np.int8)
+        self.slot_rooms = np.array(slot_rooms, dtype=np.int32)
+        # one entry per course
+        self.masks = np.array([course.occupancy for course in self.courses], dtype=np.uint64)
+        self.slot_counts = np.bincount(self.slot_courses, minlength=len(self.courses))
+
+    def get_id(self, course: read_time_table.Course) -> int:
+        return self.course_ids[id(course)]
+
+    # course ids of all students, row i contains the courses of student i, padded with -1
+    def get_student_course_ids(self, students: List[sort_data.Student]) -> np.ndarray:
+        rows = [[self.get_id(course) for course in student.get_all_courses()]
+                for student in students]
+        width = max((len(row) for row in rows), default=0)
+        course_ids = np.full((len(rows), width), -1, dtype=np.int32)
+        for idx, row in enumerate(rows):
+            course_ids[idx, :len(row)] = row
+        return course_ids
+
+    # occupancy mask of each course, 0 for padding
+    def get_masks(self, course_ids: np.ndarray) -> np.ndarray:
+        return np.where(course_ids >= 0, self.masks[course_ids], np.uint64(0))
+
+    # same as sort_data.Student.count_stuff for all students at once
+    def get_weekly_periods(self, course_ids: np.ndarray) -> np.ndarray:
+        return np.where(course_ids >= 0, self.slot_counts[course_ids], 0).sum(axis=1)
+
+    def get_amount_courses(self, course_ids: np.ndarray) -> np.ndarray:
+        return (course_ids >= 0).sum(axis=1)
+
+    # weekly mask of all time slots with at least one course per student
+    def get_occupancies(self, course_ids: np.ndarray) -> np.ndarray:
+        return np.bitwise_or.reduce(self.get_masks(course_ids), axis=1) if course_ids.shape[1] != 0 \
+            else np.zeros(len(course_ids), dtype=np.uint64)
+
+    # weekly mask of all time slots with more than one course per student
+    def get_conflicts(self, course_ids: np.ndarray) -> np.ndarray:
+        masks = self.get_masks(course_ids)
+        seen = np.zeros(len(masks), dtype=np.uint64)
+        conflicts = np.zeros(len(masks), dtype=np.uint64)
+        for column in masks.T:
+            conflicts |= seen & column
+            seen |= column
+        return conflicts
+
+    # indices of all time slots of the given courses, for filling a time table grid
+    def get_slot_idxs(self, course_ids: Iterable[int]) -> np.ndarray:
+        return np.flatnonzero(np.isin(self.slot_courses, np.fromiter(course_ids, dtype=np.int32)))
@@ -1,11 +1,19 @@
 from read_time_table import load_time_table
-from typing import cast, List, Dict, Tuple, Optional
+from typing import cast, List, Dict, Sequence, Tuple, Optional, Set, TypeVar
+import itertools
 import sys
-from datetime import date
 
 import sort_data
-import create_print_out
 import read_time_table
+import contact_graph
+import write_gexf
+import export_graph
+import profiler
+# optional, requires numpy and scipy
+try:
+    import incidence_matrix
+except ImportError:
+    incidence_matrix = None  # type: ignore
 
 
 # representing all the information of a single student shown in the gephi graph
@@ -62,8 +70,33 @@ def add_or_increment(dict: Dict[int, int], new_key, add_value) -> Dict[int, int]
     return dict
 
 
-# todo: a lot of code duplication coming up, too bad
-def get_graph_students(students: List[sort_data.Student], use_period_amount: bool) -> List[GraphStudent]:
+# connect every student with all students with a lower id sharing a course
+# single pass over an inverted index instead of comparing all pairs of students
+# key: connected student id, value: amount of connected periods (first list) or courses (second list)
+def get_student_connections(students: List[sort_data.Student]) -> Tuple[List[Dict[int, int]], List[Dict[int, int]]]:
+    # key: course label, value: ids of all already processed students in this course, ascending
+    course_index: Dict[str, List[int]] = {}
+    period_connections: List[Dict[int, int]] = []
+    course_connections: List[Dict[int, int]] = []
+    for id, student in enumerate(students):
+        connected_periods: Dict[int, int] = {}
+        connected_courses: Dict[int, int] = {}
+        courses = student.get_all_courses()
+        # only students already in the index are connected
+        for course in courses:
+            period_amount = len(course.time_slots)
+            for other_id in course_index.get(course.full_label, []):
+                add_or_increment(connected_periods, other_id, period_amount)
+                add_or_increment(connected_courses, other_id, 1)
+        # add this student to the index, each course only once
+        for label in dict.fromkeys(course.full_label for course in courses):
+            course_index.setdefault(label, []).append(id)
+        period_connections.append(connected_periods)
+        course_connections.append(connected_courses)
+    return period_connections, course_connections
+
+
+def create_graph_students(students: List[sort_data.Student], connections: List[Dict[int, int]]) -> List[GraphStudent]:
     graph_students: List[GraphStudent] = []
     for id, student in enumerate(students):
         graph_student = GraphStudent(
@@ -74,23 +107,36 @@ def get_graph_students(students: List[sort_data.Student], use_period_amount: boo
             student.amount_courses,
             student.weekly_periods
         )
-        # add connections
-        for course in student.get_all_courses():
-            # find all other students in this course
-            for other_student in graph_students:
-                # are connected?
-                if course.full_label in other_student.courses:
-                    if use_period_amount:
-                        add_amount = len(course.time_slots)
-                    else:
-                        add_amount = 1
-                    add_or_increment(
-                        graph_student.connected_students, other_student.id, add_amount)
+        graph_student.connected_students = connections[id]
         graph_students.append(graph_student)
     return graph_students
 
 
-def get_graph_courses(courses: List[read_time_table.Course]) -> List[GraphCourse]:
+def get_graph_students(students: List[sort_data.Student], use_period_amount: bool) -> List[GraphStudent]:
+    period_connections, course_connections = get_student_connections(students)
+    if use_period_amount:
+        return create_graph_students(students, period_connections)
+    return create_graph_students(students, course_connections)
+
+
+# connect every course with all courses with a lower id sharing a student
+# key: connected course id, value: amount of students with both courses
+def get_course_connections(courses: List[read_time_table.Course]) -> List[Dict[int, int]]:
+    # key: student name, value: ids of all already processed courses with this student, ascending
+    student_index: Dict[str, List[int]] = {}
+    connections: List[Dict[int, int]] = []
+    for id, course in enumerate(courses):
+        connected_courses: Dict[int, int] = {}
+        for student in course.students:
+            for other_id in student_index.get(student.name, []):
+                add_or_increment(connected_courses, other_id, 1)
+        for name in dict.fromkeys(student.name for student in course.students):
+            student_index.setdefault(name, []).append(id)
+        connections.append(connected_courses)
+    return connections
+
+
+def create_graph_courses(courses: List[read_time_table.Course], connections: List[Dict[int, int]]) -> List[GraphCourse]:
     graph_courses: List[GraphCourse] = []
     for id, course in enumerate(courses):
         graph_course = GraphCourse(
@@ -100,18 +146,15 @@ def get_graph_courses(courses: List[read_time_table.Course]) -> List[GraphCourse
             f"{course.teacher} ({course.teacher_abbreviation})",
             len(course.time_slots)
         )
-        # add connections
-        for student in course.students:
-            # find all other courses with this student
-            for other_course in graph_courses:
-                # are connected?
-                if student.name in other_course.students:
-                    add_or_increment(
-                        graph_course.connected_courses, other_course.id, 1)
+        graph_course.connected_courses = connections[id]
         graph_courses.append(graph_course)
     return graph_courses
 
 
+def get_graph_courses(courses: List[read_time_table.Course]) -> List[GraphCourse]:
+    return create_graph_courses(courses, get_course_connections(courses))
+
+
 # get all connections between all students
 def get_student_edges(graph_students: List[GraphStudent]) -> List[Edge]:
     edges: List[Edge] = []
@@ -130,31 +173,82 @@ def get_course_edges(graph_courses: List[GraphCourse]) -> List[Edge]:
     return edges
 
 
-def create_gefx(students: List[sort_data.Student]) -> None:
-    today = date.today().strftime("%Y-%m-%d")
-
-    # with periods amount
-    graph_students = get_graph_students(students, True)
-    student_edges = get_student_edges(graph_students)
-    create_print_out.write_template(
-        "files/gephi_students_template.gexf", "out/gephi/students_network_periods_amount.gexf",
-        today=today, students=graph_students, edges=student_edges)
-    # with courses amount
-    graph_students = get_graph_students(students, False)
-    student_edges = get_student_edges(graph_students)
-    create_print_out.write_template(
-        "files/gephi_students_template.gexf", "out/gephi/students_network_courses_amount.gexf",
-        today=today, students=graph_students, edges=student_edges)
-
+# all courses attended by any student, in order of first appearance
+# the students of each course are stored in the course
+def get_courses(students: List[sort_data.Student]) -> List[read_time_table.Course]:
     courses: List[read_time_table.Course] = []
+    seen: Set[int] = set()
     for student in students:
         for course in student.get_all_courses():
             course.students.append(student)
-            if course not in courses:
+            if id(course) not in seen:
+                seen.add(id(course))
                 courses.append(course)
+    return courses
+
+
+SchoolItem = TypeVar("SchoolItem", sort_data.Student, read_time_table.Course)
+
 
-    graph_courses = get_graph_courses(courses)
-    course_edges = get_course_edges(graph_courses)
-    create_print_out.write_template(
-        "files/gephi_courses_template.gexf", "out/gephi/courses_network.gexf",
-        today=today, courses=graph_courses, edges=course_edges)
+# students and courses of different schools never share a course, a room or a student, so they are connected per school
+# items are expected in order of their schools like the students of sort_data.get_students, otherwise a school is split
+def get_school_groups(items: Sequence[SchoolItem]) -> List[List[SchoolItem]]:
+    return [list(group) for _, group in itertools.groupby(items, key=lambda item: item.school)]
+
+
+# connections of consecutive groups as one list, the ids of each group are shifted by the size of the groups before
+def merge_connections(parts: List[List[Dict[int, int]]]) -> List[Dict[int, int]]:
+    if len(parts) == 1:
+        return parts[0]
+    connections: List[Dict[int, int]] = []
+    for part in parts:
+        offset = len(connections)
+        connections.extend({other_id + offset: weight for other_id, weight in connected.items()}
+                           for connected in part)
+    return connections
+
+
+# formats: any of export_graph.EXPORTERS
+def create_gefx(students: List[sort_data.Student], use_incidence_matrix: bool = False,
+                formats: Sequence[str] = ("gexf",)) -> None:
+    if use_incidence_matrix and incidence_matrix is None:
+        print("Warning: the incidence matrix requires numpy and scipy, using pure python instead.")
+    # use vectorized backend when requested and available
+    if use_incidence_matrix and incidence_matrix is not None:
+        connect_students = incidence_matrix.get_student_connections
+        connect_courses = incidence_matrix.get_course_connections
+    else:
+        connect_students = get_student_connections
+        connect_courses = get_course_connections
+
+    school_students = get_school_groups(students)
+    # both weightings are computed in a single pass
+    with profiler.stage("student connections"):
+        school_connections = [connect_students(group) for group in school_students]
+        period_connections = merge_connections([connections[0] for connections in school_connections])
+        course_connections = merge_connections([connections[1] for connections in school_connections])
+    with profiler.stage("write networks"):
+        # with periods amount
+        export_graph.export(
+            "out/gephi/students_network_periods_amount", formats, write_gexf.STUDENT_ATTRIBUTES,
+            create_graph_students(students, period_connections), period_connections)
+        # with courses amount
+        export_graph.export(
+            "out/gephi/students_network_courses_amount", formats, write_gexf.STUDENT_ATTRIBUTES,
+            create_graph_students(students, course_connections), course_connections)
+    # with time slots spent in the same room
+    with profiler.stage("contact graph"):
+        shared_slot_connections = merge_connections(
+            [contact_graph.ContactGraph(group).week_connections for group in school_students])
+    with profiler.stage("write networks"):
+        export_graph.export(
+            "out/gephi/students_network_shared_slots", formats, write_gexf.STUDENT_ATTRIBUTES,
+            create_graph_students(students, shared_slot_connections), shared_slot_connections)
+
+    with profiler.stage("course connections"):
+        courses = get_courses(students)
+        connections = merge_connections([connect_courses(group) for group in get_school_groups(courses)])
+    with profiler.stage("write networks"):
+        export_graph.export(
+            "out/gephi/courses_network", formats, write_gexf.COURSE_ATTRIBUTES,
+            create_graph_courses(courses, connections), connections)
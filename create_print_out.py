@@ -1,9 +1,11 @@
-from typing import cast, List, Dict, Tuple, ItemsView
+from typing import cast, Any, List, Dict, Tuple, ItemsView
 import sys
+import time
 from jinja2 import Template, StrictUndefined
 
 import read_time_table
 import sort_data
+import renderer
 
 
 def write_template(in_file: str, out_file: str, **variables):
@@ -19,17 +21,42 @@ def add_course_to_time_table(time_table: Dict[int, Dict[int, str]], course: read
         rendered_time_slot = f"{course.full_label} </br>{time_slot.room}"
         if time_table[time_slot.period][time_slot.day] != "":
             sort_data.print_warning(
-                f"Warning: conflicting time slots on {time_slot.day}. day {time_slot.period}. period: {time_table[time_slot.period][time_slot.day]} {rendered_time_slot}")
+                f"Warning: conflicting time slots on {time_slot.day}. day {time_slot.period}. period: {time_table[time_slot.period][time_slot.day]} {rendered_time_slot}",
+                "time-slot-conflict")
             time_table[time_slot.period][
                 time_slot.day] += f" </br>-- or -- </br>{rendered_time_slot}"
         else:
             time_table[time_slot.period][time_slot.day] = rendered_time_slot
 
 
-def create_student_print_out(student: sort_data.Student) -> None:
-    # can be accessed with [period][day]
+# students of a named school get its name as prefix, all print-outs stay in one folder
+def get_print_out_path(student: sort_data.Student, extension: str = "md") -> str:
+    prefix = f"{student.school}_" if student.school != "" else ""
+    return f"out/students/{prefix}{student.name.replace(' ', '_').lower()}.{extension}"
+
+
+COHORT_PRINT_OUT_PATH = "out/students/all_students.html"
+
+
+# can be accessed with [period][day], each cell contains the full label and room of all courses in that time slot
+# sized like the week of the school of the student
+def get_time_table_cells(student: sort_data.Student) -> Dict[int, List[List[Tuple[str, str]]]]:
+    layout = read_time_table.get_courses_layout(student.get_all_courses())
+    time_table: Dict[int, List[List[Tuple[str, str]]]] = {
+        period_idx: [[] for _ in range(layout.days)] for period_idx in range(1, layout.periods_per_day + 1)}
+    for course in student.get_all_courses():
+        for time_slot in course.time_slots:
+            time_table[time_slot.period][time_slot.day].append(
+                (course.full_label, time_slot.room))
+    return time_table
+
+
+# can be accessed with [period][day], each cell contains the full labels and rooms of all courses in that time slot
+# conflicting time slots are reported as warnings
+def get_time_table(student: sort_data.Student) -> Dict[int, Dict[int, str]]:
+    layout = read_time_table.get_courses_layout(student.get_all_courses())
     time_table = {period_idx: {day_idx: "" for day_idx in range(
-        5)} for period_idx in range(1, 11)}
+        layout.days)} for period_idx in range(1, layout.periods_per_day + 1)}
 
     # go over all courses
     for course in student.cover_courses:
@@ -37,22 +64,73 @@ def create_student_print_out(student: sort_data.Student) -> None:
 
     for p_level, course in cast("ItemsView[int, read_time_table.Course]", student.p_courses.items()):
         add_course_to_time_table(time_table, course)
+    return time_table
+
+
+# all variables of the print-out template
+def get_student_print_out_variables(student: sort_data.Student) -> Dict[str, Any]:
+    time_table = get_time_table(student)
 
     time_table_print_out = {period_idx: " | ".join(
         time_slots.values()) for period_idx, time_slots in time_table.items()}
 
+    return {"name": student.name,
+            "aliases": set(student.fuzzy_names),
+            "tutor": student.tutor,
+            "tutor_abbreviation": student.tutor_abbreviation,
+            "group": student.group,
+            "amount_courses": student.amount_courses,
+            "weekly_periods": student.weekly_periods,
+            "time_table_print_out": time_table_print_out,
+            "time_table_cells": get_time_table_cells(student),
+            "p_courses": student.p_courses,
+            "cover_courses": student.cover_courses}
+
+
+def create_student_print_out(student: sort_data.Student) -> None:
     write_template("files/student_print_out_template.md",
-                   f"out/students/{student.name.replace(' ', '_').lower()}.md",
-                   name=student.name,
-                   aliases=set(student.fuzzy_names),
-                   tutor=student.tutor,
-                   tutor_abbreviation=student.tutor_abbreviation,
-                   group=student.group,
-                   amount_courses=student.amount_courses,
-                   weekly_periods=student.weekly_periods,
-                   time_table_print_out=time_table_print_out,
-                   p_courses=student.p_courses,
-                   cover_courses=student.cover_courses)
+                   get_print_out_path(student),
+                   **get_student_print_out_variables(student))
+
+
+# render the print-outs of all students with a single compiled template
+# workers > 1 renders with threads or, when use_processes is set, processes
+def create_student_print_outs(students: List[sort_data.Student], workers: int = 1,
+                              use_processes: bool = False) -> renderer.Timings:
+    print_out_renderer = renderer.Renderer()
+    start = time.perf_counter()
+    # warnings are printed here, in order and only once
+    jobs = [(get_print_out_path(student), get_student_print_out_variables(student))
+            for student in students]
+    print_out_renderer.timings.add("variables", time.perf_counter() - start)
+    print_out_renderer.write_batch(
+        "student_print_out_template.md", jobs, workers, use_processes)
+    return print_out_renderer.timings
+
+
+# self-contained html print-outs, they can be printed to pdf by any browser
+def create_student_html_print_outs(students: List[sort_data.Student], workers: int = 1,
+                                   use_processes: bool = False) -> renderer.Timings:
+    print_out_renderer = renderer.Renderer()
+    start = time.perf_counter()
+    jobs = [(get_print_out_path(student, "html"), {"student": get_student_print_out_variables(student)})
+            for student in students]
+    print_out_renderer.timings.add("variables", time.perf_counter() - start)
+    print_out_renderer.write_batch(
+        "student_print_out_template.html", jobs, workers, use_processes)
+    return print_out_renderer.timings
+
+
+# all print-outs in one html document, one page per student
+def create_cohort_print_out(students: List[sort_data.Student]) -> renderer.Timings:
+    print_out_renderer = renderer.Renderer()
+    start = time.perf_counter()
+    variables = [get_student_print_out_variables(student)
+                 for student in students]
+    print_out_renderer.timings.add("variables", time.perf_counter() - start)
+    print_out_renderer.write("cohort_print_out_template.html",
+                             COHORT_PRINT_OUT_PATH, students=variables)
+    return print_out_renderer.timings
 
 
 # todo: finish
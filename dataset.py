@@ -0,0 +1,162 @@
+"""
+find the schools, cohorts and pages to process
+without a manifest the files folder is a single school and its cohorts are found in folders named COHORT_GROUP, e.g. 12_A
+each cohort is resolved on its own as a shard against its own list of students, the courses of a school are shared
+students, rooms and course labels of different schools are kept apart by the school name in their key, see get_school_key
+a manifest (files/manifest.json) lists several schools, all paths are relative to the folder of the manifest:
+{"schools": [{"name": "north", "dir": "north",
+              "min_time_slots": 2, "max_time_slots": 5, "days": 6, "periods_per_day": 10,
+              "cohorts": [{"label": "12", "students": "students_12.csv", "pages": ["12_A/pg_*.txt", "12_B/pg_*.txt"]},
+                          {"label": "11"}]}]}
+everything but the dir of a school is optional, missing cohorts and pages are found like without a manifest
+the time slots of a week have to fit into the bits of a weekly mask, days * periods_per_day <= MAX_SLOTS
+"""
+
+from typing import Any, Dict, List, Optional
+import glob
+import json
+import os
+import re
+
+import diagnostics
+
+MANIFEST_PATH = "files/manifest.json"
+# a page folder is named after its cohort and group
+PAGE_DIR_PATTERN = re.compile(r"^(.+)_([A-Z])$")
+PAGE_PATTERN = "pg_*.txt"
+# time table files are named after the day, starting with 0
+DAY_PATTERN = re.compile(r"^(\d+)\.csv$")
+MIN_TIME_SLOTS = 2
+MAX_TIME_SLOTS = 5
+DAYS = 5
+PERIODS_PER_DAY = 10
+# bits of a weekly mask
+MAX_SLOTS = 64
+
+
+# pages are processed page by page, each page in all groups
+def sort_page_paths(page_paths: List[str]) -> List[str]:
+    return sorted(page_paths, key=lambda page_path: (os.path.basename(page_path), os.path.dirname(page_path)))
+
+
+class Cohort:
+    def __init__(self, label: str, students_path: str, page_paths: List[str]):
+        self.label = label
+        # group and name of all students
+        self.students_path = students_path
+        # in processing order
+        self.page_paths = page_paths
+
+    def __repr__(self):
+        return f"{self.label}: {len(self.page_paths)} pages, students in {self.students_path}"
+
+
+class School:
+    def __init__(self, name: str, dir: str, min_time_slots: int = MIN_TIME_SLOTS, max_time_slots: int = MAX_TIME_SLOTS,
+                 days: int = DAYS, periods_per_day: int = PERIODS_PER_DAY):
+        # empty for the school of the files folder
+        self.name = name
+        self.dir = dir
+        self.replacements_path = os.path.join(dir, "replace_list.csv")
+        self.course_corrections_path = os.path.join(dir, "course_corrections.csv")
+        self.time_table_dir = os.path.join(dir, "time_table")
+        # allowed amount of time slots of a course in the time table
+        self.min_time_slots = min_time_slots
+        self.max_time_slots = max_time_slots
+        # time slots of a week, days are counted from 0 and periods from 1
+        self.days = days
+        self.periods_per_day = periods_per_day
+        self.cohorts: List[Cohort] = []
+
+    def get_page_paths(self) -> List[str]:
+        return [page_path for cohort in self.cohorts for page_path in cohort.page_paths]
+
+    # time table files by day, sorted by day
+    def get_day_paths(self) -> Dict[int, str]:
+        day_paths: Dict[int, str] = {}
+        if os.path.isdir(self.time_table_dir):
+            for file_name in os.listdir(self.time_table_dir):
+                match = DAY_PATTERN.match(file_name)
+                if match is not None:
+                    day_paths[int(match.group(1))] = os.path.join(self.time_table_dir, file_name)
+        return {day: day_paths[day] for day in sorted(day_paths)}
+
+    # all inputs but the pages
+    def get_input_paths(self) -> List[str]:
+        return [self.replacements_path, self.course_corrections_path] + \
+            list(dict.fromkeys(cohort.students_path for cohort in self.cohorts)) + list(self.get_day_paths().values())
+
+    def __repr__(self):
+        return f"{self.name or self.dir}: {', '.join(str(cohort) for cohort in self.cohorts)}"
+
+
+# names of the files folder stay plain, e.g. R101 in the files folder and north/R101 in the school north
+def get_school_key(school: str, name: str) -> str:
+    return name if school == "" else f"{school}/{name}"
+
+
+def get_student_key(school: str, name: str) -> str:
+    return get_school_key(school, name)
+
+
+# students_LABEL.csv when there are students of several cohorts, else students.csv
+def get_students_path(dir: str, label: str) -> str:
+    cohort_path = os.path.join(dir, f"students_{label}.csv")
+    return cohort_path if os.path.isfile(cohort_path) else os.path.join(dir, "students.csv")
+
+
+# cohorts of all page folders, in order of their labels
+def discover_cohorts(dir: str) -> List[Cohort]:
+    # key: cohort label, value: page paths of all groups
+    cohort_pages: Dict[str, List[str]] = {}
+    for dir_name in sorted(os.listdir(dir)):
+        match = PAGE_DIR_PATTERN.match(dir_name)
+        if match is None or not os.path.isdir(os.path.join(dir, dir_name)):
+            continue
+        page_paths = glob.glob(os.path.join(dir, dir_name, PAGE_PATTERN))
+        if len(page_paths) != 0:
+            cohort_pages.setdefault(match.group(1), []).extend(page_paths)
+    return [Cohort(label, get_students_path(dir, label), sort_page_paths(page_paths))
+            for label, page_paths in cohort_pages.items()]
+
+
+def load_cohort(dir: str, stored: Dict[str, Any]) -> Cohort:
+    label = str(stored["label"])
+    students_path = os.path.join(dir, stored["students"]) if "students" in stored else get_students_path(dir, label)
+    page_patterns = stored.get("pages", [f"{label}_*/{PAGE_PATTERN}"])
+    page_paths = [page_path for page_pattern in page_patterns
+                  for page_path in glob.glob(os.path.join(dir, page_pattern))]
+    return Cohort(label, students_path, sort_page_paths(list(dict.fromkeys(page_paths))))
+
+
+def load_school(manifest_dir: str, stored: Dict[str, Any]) -> School:
+    school = School(stored.get("name", ""), os.path.normpath(os.path.join(manifest_dir, stored["dir"])),
+                    stored.get("min_time_slots", MIN_TIME_SLOTS), stored.get("max_time_slots", MAX_TIME_SLOTS),
+                    stored.get("days", DAYS), stored.get("periods_per_day", PERIODS_PER_DAY))
+    if not (0 < school.days and 0 < school.periods_per_day and school.days * school.periods_per_day <= MAX_SLOTS):
+        diagnostics.critical("time-slot-range", f"{school.days} days with {school.periods_per_day} periods of "
+                                                f"{school.name or school.dir} don't fit into {MAX_SLOTS} time slots.")
+    if "cohorts" in stored:
+        school.cohorts = [load_cohort(school.dir, stored_cohort) for stored_cohort in stored["cohorts"]]
+    else:
+        school.cohorts = discover_cohorts(school.dir)
+    return school
+
+
+def load_manifest(file_path: str) -> List[School]:
+    with open(file_path, "r", encoding="utf-8") as file:
+        stored = json.load(file)
+    schools = [load_school(os.path.dirname(file_path), stored_school) for stored_school in stored["schools"]]
+    names = [school.name for school in schools]
+    if len(set(names)) != len(names):
+        diagnostics.critical("duplicate", f"school names in {file_path} aren't unique.")
+    return schools
+
+
+# schools of the manifest when there is one, else the files folder
+def get_schools(manifest_path: Optional[str] = MANIFEST_PATH) -> List[School]:
+    if manifest_path is not None and os.path.isfile(manifest_path):
+        return load_manifest(manifest_path)
+    school = School("", "files")
+    school.cohorts = discover_cohorts(school.dir)
+    return [school]
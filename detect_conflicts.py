@@ -0,0 +1,171 @@
+"""
+find time table conflicts of all students at once
+a conflict is a time slot in which a student has more than one course
+after a change of the time tables only these are parsed again, the course choices are taken from the snapshot
+run with: python3 detect_conflicts.py [--max-conflicts N] [--json out.json]
+requires numpy
+"""
+
+from typing import Any, List, Dict
+import argparse
+import json
+import sys
+import numpy as np
+
+import dataset
+import read_time_table
+import sort_data
+import course_table
+import incremental_build
+import snapshot
+
+# a conflicting pair of courses is likely taking place every other week
+# when at least this share of the students of the smaller course take both courses
+# and the courses only share a single time slot
+ALTERNATING_SHARE = 0.5
+# pairs of fewer students are too likely to be a coincidence
+ALTERNATING_MIN_STUDENTS = 3
+
+
+class ConflictReport:
+    def __init__(self, students: List[sort_data.Student]):
+        self.students = students
+        self.table = course_table.CourseTable(
+            course for student in students for course in student.get_all_courses())
+        course_ids = self.table.get_student_course_ids(students)
+        masks = self.table.get_masks(course_ids)
+        # weekly mask of all conflicting time slots per student
+        self.conflicts = self.table.get_conflicts(course_ids)
+        # amount of conflicting time slots per student
+        self.student_conflicts = course_table.count_bits(self.conflicts)
+        # key: school name, value: time slots of the school
+        self.layouts = {course.school: course.layout for course in self.table.courses}
+        # key: school name, value: amount of students with a conflict per time slot,
+        # indexed by read_time_table.SlotLayout.get_slot_bit of the school
+        student_schools = np.array([student.school for student in students], dtype=object)
+        self.slot_conflicts: Dict[str, np.ndarray] = {}
+        for school in sorted(set(student.school for student in students)):
+            slot_bits = np.arange(self.get_layout(school).slots, dtype=np.uint64)
+            self.slot_conflicts[school] = \
+                ((self.conflicts[student_schools == school, None] >> slot_bits) & np.uint64(1)).sum(axis=0)
+
+        course_amount = len(self.table.courses)
+        # amount of students per course
+        self.course_students = np.bincount(course_ids[course_ids >= 0], minlength=course_amount)
+        # all conflicting pairs of courses of all students, one entry per student and pair
+        pair_students: List[np.ndarray] = []
+        pair_codes: List[np.ndarray] = []
+        pair_masks: List[np.ndarray] = []
+        for first in range(course_ids.shape[1]):
+            for second in range(first + 1, course_ids.shape[1]):
+                shared = masks[:, first] & masks[:, second]
+                rows = np.flatnonzero(shared)
+                low = np.minimum(course_ids[rows, first], course_ids[rows, second]).astype(np.int64)
+                high = np.maximum(course_ids[rows, first], course_ids[rows, second]).astype(np.int64)
+                pair_students.append(rows)
+                pair_codes.append(low * course_amount + high)
+                pair_masks.append(shared[rows])
+        students_of_pairs = np.concatenate(pair_students) if pair_students else np.zeros(0, dtype=np.int64)
+        codes = np.concatenate(pair_codes) if pair_codes else np.zeros(0, dtype=np.int64)
+        shared_masks = np.concatenate(pair_masks) if pair_masks else np.zeros(0, dtype=np.uint64)
+
+        # each conflicting pair once with the amount of students having it
+        self.pair_codes, first_idxs, pair_inverse, self.pair_students = np.unique(
+            codes, return_index=True, return_inverse=True, return_counts=True)
+        self.pair_courses = np.stack((self.pair_codes // max(1, course_amount),
+                                      self.pair_codes % max(1, course_amount)), axis=1)
+        self.pair_slots = course_table.count_bits(shared_masks[first_idxs])
+        smaller_course = np.minimum(self.course_students[self.pair_courses[:, 0]],
+                                    self.course_students[self.pair_courses[:, 1]]) if len(self.pair_codes) else np.zeros(0)
+        self.pair_alternating = (self.pair_slots == 1) & (self.pair_students >= ALTERNATING_MIN_STUDENTS) & \
+            (self.pair_students >= ALTERNATING_SHARE * smaller_course)
+        # amount of conflicts per course, one per student and conflicting pair
+        self.course_conflicts = np.bincount(self.pair_courses.ravel(), weights=np.repeat(self.pair_students, 2),
+                                            minlength=course_amount).astype(np.int64)
+        # amount of conflicting pairs per student not explained by courses taking place every other week
+        self.student_unexplained = np.bincount(students_of_pairs[~self.pair_alternating[pair_inverse.ravel()]],
+                                               minlength=len(students))
+
+    def get_layout(self, school: str) -> read_time_table.SlotLayout:
+        return self.layouts.get(school, read_time_table.DEFAULT_LAYOUT)
+
+    def get_course_label(self, course_id: int) -> str:
+        course = self.table.courses[course_id]
+        return dataset.get_school_key(
+            course.school, f"{course.full_label} ({course.time_table_subject} {course.teacher_abbreviation})")
+
+    # students with conflicts not explained by courses taking place every other week
+    def get_unexplained_students(self) -> List[sort_data.Student]:
+        return [self.students[idx] for idx in np.flatnonzero(self.student_unexplained)]
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        course_order = np.argsort(-self.course_conflicts, kind="stable")[:top]
+        return {
+            "students": {dataset.get_student_key(self.students[idx].school, self.students[idx].name):
+                         int(self.student_conflicts[idx]) for idx in np.flatnonzero(self.student_conflicts)},
+            "slots": {dataset.get_school_key(school, " ".join(
+                          str(value) for value in self.get_layout(school).get_slot(int(slot_bit)))):
+                      int(slot_conflicts[slot_bit])
+                      for school, slot_conflicts in self.slot_conflicts.items()
+                      for slot_bit in np.flatnonzero(slot_conflicts)},
+            "courses": {self.get_course_label(course_id): int(self.course_conflicts[course_id])
+                        for course_id in course_order if self.course_conflicts[course_id] != 0},
+            "pairs": [{"courses": [self.get_course_label(first), self.get_course_label(second)],
+                       "students": int(students), "slots": int(slots), "alternating": bool(alternating)}
+                      for (first, second), students, slots, alternating
+                      in zip(self.pair_courses, self.pair_students, self.pair_slots, self.pair_alternating)],
+        }
+
+    def print(self, top: int = 10) -> None:
+        report = self.to_dict(top)
+        print(f"{len(report['students'])} of {len(self.students)} students have conflicts, "
+              f"{len(self.get_unexplained_students())} not explained by courses taking place every other week")
+        for school, slot_conflicts in self.slot_conflicts.items():
+            for slot_bit in np.flatnonzero(slot_conflicts):
+                day, period = self.get_layout(school).get_slot(int(slot_bit))
+                print(f"  {school + ': ' if school else ''}{read_time_table.get_day_name(day)} {period}. period: "
+                      f"{slot_conflicts[slot_bit]} students")
+        print("courses causing the most conflicts:")
+        for label, amount in report["courses"].items():
+            print(f"  {label}: {amount} conflicts")
+        print("likely every other week:")
+        for pair in report["pairs"]:
+            if pair["alternating"]:
+                print(f"  {pair['courses'][0]} and {pair['courses'][1]}: {pair['students']} students")
+
+
+# students of the snapshot with their courses taken from the current time tables
+# the course choices of the students don't depend on the time tables and course corrections,
+# so these are only parsed again when nothing else changed, otherwise all students are resolved again
+def get_students() -> List[sort_data.Student]:
+    schools = dataset.get_schools()
+    course_paths = {file_path for school in schools
+                    for file_path in [school.course_corrections_path] + list(school.get_day_paths().values())}
+    input_hashes = incremental_build.get_input_hashes(sort_data.get_page_paths())
+    students = snapshot.load(snapshot.SNAPSHOT_PATH, input_hashes, course_paths)
+    if students is None:
+        return list(snapshot.get_students(snapshot.SNAPSHOT_PATH).values())
+    for school in schools:
+        courses = read_time_table.get_courses(school)
+        for student in students.values():
+            if student.school == school.name:
+                sort_data.set_courses(student, courses)
+    return list(students.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-conflicts", type=int, default=None,
+                        help="fail when more students have conflicts not explained by courses taking place every other week")
+    parser.add_argument("--json", default=None, help="write the full report to this file")
+    parser.add_argument("--top", type=int, default=10, help="amount of courses causing the most conflicts to show")
+    args = parser.parse_args()
+    report = ConflictReport(get_students())
+    report.print(args.top)
+    if args.json is not None:
+        with open(args.json, "w+", encoding="utf-8") as file:
+            json.dump(report.to_dict(args.top), file, ensure_ascii=False, indent=4)
+    if args.max_conflicts is not None and len(report.get_unexplained_students()) > args.max_conflicts:
+        print(f"Critical: {len(report.get_unexplained_students())} students have conflicts, "
+              f"at most {args.max_conflicts} allowed.")
+        sys.exit(1)
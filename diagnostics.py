@@ -0,0 +1,161 @@
+"""
+problems found in the input data
+by default the first critical problem stops the program
+in collect mode all problems are collected instead and the page, student line or student they belong to is skipped,
+so a single run finds all problems of the dataset (see write_report)
+lines of pages are counted after empty lines are removed, lines of time tables are periods
+"""
+
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Set, Tuple
+import json
+import os
+import sys
+
+collecting = False
+
+
+class Diagnostic:
+    __slots__ = ("severity", "rule", "message", "file_path", "line", "student")
+
+    def __init__(self, severity: str, rule: str, message: str, file_path: Optional[str] = None,
+                 line: Optional[int] = None, student: Optional[str] = None):
+        # critical or warning
+        self.severity = severity
+        # short name of the violated check, e.g. p-level
+        self.rule = rule
+        self.message = message
+        self.file_path = file_path
+        self.line = line
+        self.student = student
+
+    def get_key(self) -> Tuple[Any, ...]:
+        return (self.severity, self.rule, self.message, self.file_path, self.line, self.student)
+
+    def __eq__(self, other: object):
+        if not isinstance(other, Diagnostic):
+            return NotImplemented
+        return self.get_key() == other.get_key()
+
+    def __hash__(self):
+        return hash(self.get_key())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"severity": self.severity, "rule": self.rule, "message": self.message,
+                "file": self.file_path, "line": self.line, "student": self.student}
+
+    def __str__(self):
+        return f"{self.severity.capitalize()}: {self.message}"
+
+
+# raised in collect mode, the caller skips what the problem belongs to
+class Invalid(Exception):
+    pass
+
+
+# each diagnostic is kept once, in order of appearance
+class Sink:
+    def __init__(self):
+        self.diagnostics: List[Diagnostic] = []
+        self.seen: Set[Diagnostic] = set()
+        # each message is printed once
+        self.printed: Set[str] = set()
+
+    def add(self, diagnostic: Diagnostic) -> None:
+        if diagnostic not in self.seen:
+            self.seen.add(diagnostic)
+            self.diagnostics.append(diagnostic)
+
+    def print_once(self, diagnostic: Diagnostic) -> None:
+        if diagnostic.message not in self.printed:
+            self.printed.add(diagnostic.message)
+            print(diagnostic)
+
+
+sink = Sink()
+# file path, line and student of the current check, innermost last
+locations: List[Dict[str, Any]] = []
+
+
+# everything reported inside the with statement belongs to this location, e.g.:
+# with diagnostics.Location(file_path=file_path):
+class Location:
+    __slots__ = ("values",)
+
+    def __init__(self, **values: Any):
+        self.values = values
+
+    def __enter__(self) -> "Location":
+        locations.append(self.values)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        locations.pop()
+
+
+def add(severity: str, rule: str, message: str) -> Diagnostic:
+    values: Dict[str, Any] = {}
+    for location_values in locations:
+        values.update(location_values)
+    diagnostic = Diagnostic(severity, rule, message, **values)
+    sink.add(diagnostic)
+    return diagnostic
+
+
+def warning(rule: str, message: str) -> None:
+    sink.print_once(add("warning", rule, message))
+
+
+# stops the program unless collecting, the caller may go on checking the same thing
+# and has to raise Invalid afterwards
+def report(rule: str, message: str) -> None:
+    diagnostic = add("critical", rule, message)
+    if not collecting:
+        print(diagnostic)
+        sys.exit(1)
+
+
+# stops the program unless collecting, then raises Invalid
+def critical(rule: str, message: str) -> NoReturn:
+    report(rule, message)
+    raise Invalid(message)
+
+
+def enable() -> None:
+    global collecting
+    collecting = True
+
+
+# run function in collect mode and return its result, None when it has been skipped, and all new diagnostics
+# used in worker processes whose diagnostics would be lost otherwise
+def collect_call(function: Callable[..., Any], *args: Any) -> Tuple[Any, List[Diagnostic]]:
+    enable()
+    start = len(sink.diagnostics)
+    try:
+        result = function(*args)
+    except Invalid:
+        result = None
+    return result, sink.diagnostics[start:]
+
+
+# add diagnostics of a worker process
+def merge(diagnostics: List[Diagnostic]) -> None:
+    for diagnostic in diagnostics:
+        sink.add(diagnostic)
+
+
+def get_criticals() -> List[Diagnostic]:
+    return [diagnostic for diagnostic in sink.diagnostics if diagnostic.severity == "critical"]
+
+
+def write_report(file_path: str) -> None:
+    counts: Dict[str, int] = {}
+    for diagnostic in sink.diagnostics:
+        counts[diagnostic.rule] = counts.get(diagnostic.rule, 0) + 1
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w+", encoding="utf-8") as file:
+        json.dump({
+            "criticals": len(get_criticals()),
+            "warnings": len(sink.diagnostics) - len(get_criticals()),
+            "rules": counts,
+            "diagnostics": [diagnostic.to_dict() for diagnostic in sink.diagnostics],
+        }, file, indent=4, ensure_ascii=False)
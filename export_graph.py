@@ -0,0 +1,143 @@
+"""
+write networks in other formats than gexf
+every exporter gets the same data as write_gexf.write_gexf: nodes with an id, a label and the given attributes,
+and connections[i] containing all connections of the node with id i
+numpy is required for npz, pyarrow for parquet
+"""
+
+from typing import Any, Callable, List, Dict, Sequence, Tuple
+import csv
+import sys
+from datetime import date
+from xml.sax.saxutils import quoteattr
+
+import write_gexf
+# optional
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None  # type: ignore
+
+# gexf type, graphml type
+GRAPHML_TYPES = {"string": "string", "integer": "int"}
+
+
+# all edges in order of write_gexf.iter_edges
+def get_edges(connections: Sequence[Dict[int, int]]) -> Tuple[List[int], List[int], List[int]]:
+    sources: List[int] = []
+    targets: List[int] = []
+    weights: List[int] = []
+    for source, connected in enumerate(connections):
+        for target, weight in connected.items():
+            sources.append(source)
+            targets.append(target)
+            weights.append(weight)
+    return sources, targets, weights
+
+
+def write_gexf_file(out_file: str, attributes: List[Tuple[str, str]],
+                    nodes: Sequence[Any], connections: Sequence[Dict[int, int]]) -> None:
+    write_gexf.write_gexf(out_file, date.today().strftime("%Y-%m-%d"), attributes, nodes, connections)
+
+
+def write_graphml(out_file: str, attributes: List[Tuple[str, str]],
+                  nodes: Sequence[Any], connections: Sequence[Dict[int, int]]) -> None:
+    with open(out_file, "w+", encoding="utf-8", buffering=1 << 16) as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                   '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
+        for attribute_id, attribute_type in attributes:
+            file.write(f'  <key id="{attribute_id}" for="node" attr.name="{attribute_id}" '
+                       f'attr.type="{GRAPHML_TYPES[attribute_type]}"/>\n')
+        file.write('  <key id="weight" for="edge" attr.name="weight" attr.type="int"/>\n'
+                   '  <graph edgedefault="undirected">\n')
+        for node in nodes:
+            data = "".join(f"<data key={quoteattr(attribute_id)}>{escape_text(getattr(node, attribute_id))}</data>"
+                           for attribute_id, _ in attributes)
+            file.write(f'    <node id="{node.id}"><data key="label">{escape_text(node.label)}</data>{data}</node>\n')
+        file.writelines(f'    <edge source="{source}" target="{target}"><data key="weight">{weight}</data></edge>\n'
+                        for source, connected in enumerate(connections) for target, weight in connected.items())
+        file.write("  </graph>\n</graphml>\n")
+
+
+def escape_text(value: Any) -> str:
+    return str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+# source, target and weight arrays of all edges plus id, label and attribute arrays of all nodes
+def write_npz(out_file: str, attributes: List[Tuple[str, str]],
+              nodes: Sequence[Any], connections: Sequence[Dict[int, int]]) -> None:
+    if np is None:
+        print("Critical: npz export requires numpy.")
+        sys.exit(1)
+    sources, targets, weights = get_edges(connections)
+    arrays: Dict[str, Any] = {
+        "source": np.array(sources, dtype=np.int32),
+        "target": np.array(targets, dtype=np.int32),
+        "weight": np.array(weights, dtype=np.int32),
+        "id": np.array([node.id for node in nodes], dtype=np.int32),
+        "label": np.array([node.label for node in nodes], dtype=str),
+    }
+    for attribute_id, attribute_type in attributes:
+        arrays[attribute_id] = np.array([getattr(node, attribute_id) for node in nodes],
+                                        dtype=np.int32 if attribute_type == "integer" else str)
+    with open(out_file, "wb") as file:
+        np.savez_compressed(file, **arrays)
+
+
+# two csv files, nodes and edges, both with a header line
+def write_csv(out_file: str, attributes: List[Tuple[str, str]],
+              nodes: Sequence[Any], connections: Sequence[Dict[int, int]]) -> None:
+    base = out_file[:-len(".csv")] if out_file.endswith(".csv") else out_file
+    with open(f"{base}_nodes.csv", "w+", encoding="utf-8", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=";", quotechar='"')
+        csv_writer.writerow(["id", "label"] + [attribute_id for attribute_id, _ in attributes])
+        csv_writer.writerows([node.id, node.label] + [getattr(node, attribute_id) for attribute_id, _ in attributes]
+                             for node in nodes)
+    with open(f"{base}_edges.csv", "w+", encoding="utf-8", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=";", quotechar='"')
+        csv_writer.writerow(["source", "target", "weight"])
+        csv_writer.writerows((source, target, weight)
+                             for source, connected in enumerate(connections) for target, weight in connected.items())
+
+
+# two parquet files, nodes and edges
+def write_parquet(out_file: str, attributes: List[Tuple[str, str]],
+                  nodes: Sequence[Any], connections: Sequence[Dict[int, int]]) -> None:
+    if pyarrow is None:
+        print("Critical: parquet export requires pyarrow.")
+        sys.exit(1)
+    base = out_file[:-len(".parquet")] if out_file.endswith(".parquet") else out_file
+    node_columns: Dict[str, List[Any]] = {"id": [node.id for node in nodes],
+                                          "label": [node.label for node in nodes]}
+    for attribute_id, _ in attributes:
+        node_columns[attribute_id] = [getattr(node, attribute_id) for node in nodes]
+    pyarrow.parquet.write_table(pyarrow.table(node_columns), f"{base}_nodes.parquet")
+    sources, targets, weights = get_edges(connections)
+    pyarrow.parquet.write_table(pyarrow.table({"source": sources, "target": targets, "weight": weights}),
+                                f"{base}_edges.parquet")
+
+
+# key: format, also used as file extension, value: exporter
+EXPORTERS: Dict[str, Callable[[str, List[Tuple[str, str]], Sequence[Any], Sequence[Dict[int, int]]], None]] = {
+    "gexf": write_gexf_file,
+    "graphml": write_graphml,
+    "npz": write_npz,
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
+
+
+# write the network in all given formats, out_base is the output path without extension
+def export(out_base: str, formats: Sequence[str], attributes: List[Tuple[str, str]],
+           nodes: Sequence[Any], connections: Sequence[Dict[int, int]]) -> None:
+    for format in formats:
+        if format not in EXPORTERS:
+            print(f"Critical: unknown graph format {format}.")
+            sys.exit(1)
+        EXPORTERS[format](f"{out_base}.{format}", attributes, nodes, connections)
@@ -0,0 +1,170 @@
+"""
+generate a synthetic school in the layout of the files folder
+course pages contain the ocr errors fixed by files/replace_list.csv, the p-level aliases and the fuzzy name matching
+run with: python3 generate_school.py OUT_DIR [--students N] [--seed N] [--no-noise]
+"""
+
+from typing import List, Dict, Tuple
+import argparse
+import os
+import random
+import shutil
+
+import dataset
+import diagnostics
+
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Emil", "Frieda", "Greta", "Hannes", "Ida", "Jonas",
+               "Klara", "Lukas", "Mila", "Noah", "Oskar", "Paula", "Quirin", "Rosa", "Simon", "Tilda"]
+# no P, tutor abbreviations followed by a p-level would be read as a p-level
+ABBREVIATION_CHARACTERS = "ABCDEFGHKLMNRSTWZ"
+GROUPS = ["A", "B"]
+# amount of courses per group, one page each
+LK_COURSES = 10
+P_COURSES = 10
+COVER_COURSES = 42
+TEACHERS = 40
+# key: correct text, value: misread text, the misread text is added to replace_list.csv
+PAGE_ERRORS = {"Kursliste": "Kurs1iste", "Kursleiter": "Kurs1eiter"}
+# key: correct character in a name, value: misread text, fixed by the fuzzy name matching
+NAME_ERRORS = {"m": "rn", "l": "1", "i": "ı", "o": "0"}
+# key: p-level, value: misread p-levels, see read_course_file.get_p_level
+P_LEVEL_ERRORS = {1: ["Pi", "PI", "Pt"], 4: ["PA", "Pa"], 5: ["PS", "Ps"]}
+# share of page headers, names and p-levels with an ocr error
+ERROR_RATE = 0.2
+
+
+class SyntheticCourse:
+    def __init__(self, idx: int, kind: str, teacher: Tuple[str, str]):
+        self.abbreviation = f"K{idx}"[:4]
+        self.name = f"Fach {idx}"
+        self.teacher_abbreviation, self.teacher = teacher
+        self.time_table_subject = f"s{idx}"
+        # lk, p or cover
+        self.kind = kind
+        # name and p-level, 0 for cover courses
+        self.students: List[Tuple[str, int]] = []
+
+
+def get_names(amount: int, rng: random.Random) -> List[str]:
+    names: Dict[str, None] = {}
+    while len(names) < amount:
+        last_name = "".join(rng.choice("bdfghklmnprstwz") + rng.choice("aeiou")
+                            for _ in range(rng.randint(4, 5))).capitalize()
+        names[f"{last_name}, {rng.choice(FIRST_NAMES)}"] = None
+    return list(names.keys())
+
+
+def get_teachers(rng: random.Random) -> List[Tuple[str, str]]:
+    abbreviations: Dict[str, None] = {}
+    while len(abbreviations) < TEACHERS:
+        abbreviations["".join(rng.choice(ABBREVIATION_CHARACTERS) for _ in range(3))] = None
+    return [(abbreviation, f"Lehrer{idx}") for idx, abbreviation in enumerate(abbreviations)]
+
+
+# misread a single character of the name
+def get_name_error(name: str, rng: random.Random) -> str:
+    idxs = [idx for idx, character in enumerate(name) if idx > 0 and character in NAME_ERRORS]
+    if len(idxs) == 0:
+        return name
+    idx = rng.choice(idxs)
+    return name[:idx] + NAME_ERRORS[name[idx]] + name[idx + 1:]
+
+
+# ocr text of the course list of a single course
+def get_page(course: SyntheticCourse, group: str, tutors: Dict[str, str], rng: random.Random, noise: bool) -> str:
+    lines = ["Schule Musterstadt",
+             "Kursliste",
+             f"  {course.abbreviation} - {course.name}              Stand 2021",
+             f"Kursleiter: {course.teacher}      ",
+             f"GRUPPE {group}",
+             "  Nr   Name                  Tutor  Kurs",
+             ""]
+    for line_idx, line in enumerate(lines):
+        for text, error in PAGE_ERRORS.items():
+            if noise and line.startswith(text) and rng.random() < ERROR_RATE:
+                lines[line_idx] = error + line[len(text):]
+    for idx, (name, p_level) in enumerate(course.students, 1):
+        shown_name = get_name_error(name, rng) if noise and rng.random() < ERROR_RATE else name
+        p_text = f"P{p_level}" if p_level != 0 else ""
+        if noise and p_level in P_LEVEL_ERRORS and rng.random() < ERROR_RATE:
+            p_text = rng.choice(P_LEVEL_ERRORS[p_level])
+        # numbers with three digits would be read as part of the name, the printed list starts again after 99
+        lines.append(f"  {(idx - 1) % 99 + 1}    {shown_name}       {tutors[name]}    {p_text}".rstrip())
+    return "\n".join(lines) + "\n"
+
+
+# write files/ into root with students_per_group students in each group
+# the templates are copied from template_dir, which must not be the files folder written to
+def generate(root: str, students_per_group: int = 40, seed: int = 0, noise: bool = True,
+             template_dir: str = "files") -> None:
+    files_dir = os.path.join(root, "files")
+    if os.path.isdir(files_dir) and os.path.samefile(files_dir, template_dir):
+        diagnostics.critical("out-dir", f"{files_dir} contains the templates, it would be overwritten.")
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(files_dir, "time_table"), exist_ok=True)
+    names = get_names(len(GROUPS) * students_per_group, rng)
+    teachers = get_teachers(rng)
+    # key: day, value: time table entries of each period
+    time_table: List[List[List[str]]] = [[[] for _ in range(dataset.PERIODS_PER_DAY)]
+                                         for _ in range(dataset.DAYS)]
+    corrections: List[str] = []
+    course_idx = 0
+
+    for group_idx, group in enumerate(GROUPS):
+        os.makedirs(os.path.join(files_dir, f"12_{group}"), exist_ok=True)
+        students = names[group_idx * students_per_group:(group_idx + 1) * students_per_group]
+        courses: List[SyntheticCourse] = []
+        for kind, amount in [("lk", LK_COURSES), ("p", P_COURSES), ("cover", COVER_COURSES)]:
+            for _ in range(amount):
+                course_idx += 1
+                # round robin, every tutor teaches a course
+                courses.append(SyntheticCourse(course_idx, kind, teachers[course_idx % len(teachers)]))
+        tutors = {name: rng.choice(teachers)[0] for name in students}
+        for name in students:
+            for p_level, course in enumerate(rng.sample([course for course in courses if course.kind == "lk"], 3), 1):
+                course.students.append((name, p_level))
+            for p_level, course in zip((4, 5), rng.sample([course for course in courses if course.kind == "p"], 2)):
+                course.students.append((name, p_level))
+            for course in rng.sample([course for course in courses if course.kind == "cover"], 4):
+                course.students.append((name, 0))
+
+        for page_idx, course in enumerate(courses, 1):
+            # a few cover courses are missing in the time table
+            in_time_table = course.kind != "cover" or rng.random() >= 0.05
+            identifier = f"{course.teacher_abbreviation} {course.time_table_subject}" if in_time_table else ""
+            corrections.append(f"{course.name} {course.abbreviation} {course.teacher};{identifier};"
+                               f"{course.teacher};Full {course.name}.")
+            if in_time_table:
+                slots = [(day, period) for day in range(dataset.DAYS)
+                         for period in range(dataset.PERIODS_PER_DAY)]
+                for day, period in rng.sample(slots, rng.randint(2, 5)):
+                    # the time table isn't consistent in case
+                    teacher_abbreviation = course.teacher_abbreviation.lower() if noise and rng.random() < 0.1 \
+                        else course.teacher_abbreviation
+                    time_table[day][period].append(
+                        f"{teacher_abbreviation} {course.time_table_subject} R{rng.randint(100, 130)}")
+            with open(os.path.join(files_dir, f"12_{group}", f"pg_{page_idx:04d}.txt"), "w+", encoding="utf-8") as file:
+                file.write(get_page(course, group, tutors, rng, noise))
+        with open(os.path.join(files_dir, "students.csv"), "a" if group_idx else "w+", encoding="utf-8") as file:
+            file.writelines(f"{group};{name}\n" for name in students)
+
+    for day, periods in enumerate(time_table):
+        with open(os.path.join(files_dir, "time_table", f"{day}.csv"), "w+", encoding="utf-8") as file:
+            file.writelines(";".join(entries) + "\n" for entries in periods)
+    with open(os.path.join(files_dir, "course_corrections.csv"), "w+", encoding="utf-8") as file:
+        file.writelines(f"{correction}\n" for correction in corrections)
+    with open(os.path.join(files_dir, "replace_list.csv"), "w+", encoding="utf-8") as file:
+        file.writelines(f"{error};{text}\n" for text, error in PAGE_ERRORS.items())
+    for file_name in os.listdir(template_dir):
+        if "template" in file_name or "macros" in file_name:
+            shutil.copy(os.path.join(template_dir, file_name), files_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("out_dir", help="directory the files folder is created in")
+    parser.add_argument("--students", type=int, default=40, help="amount of students per group")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-noise", action="store_true", help="don't add ocr errors")
+    args = parser.parse_args()
+    generate(args.out_dir, args.students, args.seed, not args.no_noise)
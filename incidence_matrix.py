@@ -0,0 +1,125 @@
+"""
+vectorized student and course networks
+both networks are projections of one incidence matrix B (rows: students, columns: courses),
+the student network is B·Bᵀ and the course network Bᵀ·B
+requires numpy and scipy, create_gephi falls back to pure python without them
+"""
+
+from typing import Hashable, List, Dict, Tuple
+import numpy as np
+import scipy.sparse
+
+import sort_data
+import read_time_table
+
+
+# sparse row-major incidence data
+# each row is a list of column keys, the same key may appear multiple times in one row
+class Incidence:
+    def __init__(self, rows: List[List[Hashable]], weights: List[List[int]]):
+        column_ids: Dict[Hashable, int] = {}
+        row_idxs: List[int] = []
+        column_idxs: List[int] = []
+        positions: List[int] = []
+        for row_idx, row in enumerate(rows):
+            for position, key in enumerate(row):
+                row_idxs.append(row_idx)
+                column_idxs.append(column_ids.setdefault(key, len(column_ids)))
+                positions.append(position)
+        self.shape = (len(rows), len(column_ids))
+        self.row_idxs = np.array(row_idxs, dtype=np.int64)
+        self.column_idxs = np.array(column_idxs, dtype=np.int64)
+        # position of each entry in its row
+        self.positions = np.array(positions, dtype=np.int64)
+        self.weights = np.array(
+            [weight for row in weights for weight in row], dtype=np.int64)
+
+    def get_matrix(self, values: np.ndarray, mask: "np.ndarray | slice" = slice(None)) -> scipy.sparse.csr_matrix:
+        return scipy.sparse.csr_matrix(
+            (values[mask], (self.row_idxs[mask], self.column_idxs[mask])), shape=self.shape, dtype=np.int64)
+
+    # 1 when the row contains the key at least once
+    def get_binary(self) -> scipy.sparse.csr_matrix:
+        return self.get_matrix(np.ones(len(self.row_idxs), dtype=np.int64)).sign()
+
+
+# all entries strictly below the diagonal
+# key: row * size + column, sorted
+def get_lower(matrix: scipy.sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+    lower = scipy.sparse.tril(matrix, k=-1).tocsr()
+    lower.sum_duplicates()
+    lower.sort_indices()
+    rows = np.repeat(np.arange(lower.shape[0], dtype=np.int64),
+                     np.diff(lower.indptr))
+    return rows * lower.shape[1] + lower.indices, lower.data
+
+
+def get_bit_length(values: np.ndarray) -> np.ndarray:
+    remaining = values.copy()
+    bit_length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        higher = remaining >> shift
+        has_higher = higher > 0
+        remaining = np.where(has_higher, higher, remaining)
+        bit_length += np.where(has_higher, shift, 0)
+    return bit_length + (remaining > 0)
+
+
+# connect every row with all rows with a lower index sharing a key
+# returns connections weighted by the values of the row entries and by the amount of row entries
+# the order of the connections is the same as with the pure python implementation:
+# by position of the first shared key in the row, then by connected row index
+def get_connections(incidence: Incidence, values: np.ndarray) -> Tuple[List[Dict[int, int]], List[Dict[int, int]]]:
+    size = incidence.shape[0]
+    binary_t = incidence.get_binary().T.tocsr()
+    # one product for both weightings, weights may be zero
+    base = len(incidence.row_idxs) + 1
+    keys, encoded = get_lower(incidence.get_matrix(
+        values * base + 1) @ binary_t)
+    weighted = encoded // base
+    counted = encoded % base
+
+    # each position is one bit, the highest shared bit is the first shared position
+    # the positions are split into chunks fitting into 62 bits
+    first = np.full(len(keys), -1, dtype=np.int64)
+    chunk_size = 62
+    for chunk_start in range(0, int(incidence.positions.max(initial=0)) + 1, chunk_size):
+        mask = (chunk_start <= incidence.positions) & (
+            incidence.positions < chunk_start + chunk_size)
+        bits = np.left_shift(1, chunk_size - 1 -
+                             (incidence.positions - chunk_start))
+        chunk_keys, chunk_bits = get_lower(
+            incidence.get_matrix(bits, mask) @ binary_t)
+        chunk_first = chunk_start + chunk_size - get_bit_length(chunk_bits)
+        idxs = np.searchsorted(keys, chunk_keys)
+        # earlier chunks take precedence
+        unset = first[idxs] == -1
+        first[idxs[unset]] = chunk_first[unset]
+
+    rows = keys // size
+    columns = keys % size
+    order = np.argsort((rows * (int(first.max(initial=0)) + 1) + first) * size + columns)
+    bounds = np.searchsorted(rows[order], np.arange(size + 1)).tolist()
+    columns = columns[order].tolist()
+    all_connections: List[List[Dict[int, int]]] = []
+    for weights in (weighted[order].tolist(), counted[order].tolist()):
+        all_connections.append([dict(zip(columns[bounds[row]:bounds[row + 1]], weights[bounds[row]:bounds[row + 1]]))
+                                for row in range(size)])
+    return all_connections[0], all_connections[1]
+
+
+# same as create_gephi.get_student_connections
+def get_student_connections(students: List[sort_data.Student]) -> Tuple[List[Dict[int, int]], List[Dict[int, int]]]:
+    all_courses = [student.get_all_courses() for student in students]
+    incidence = Incidence(
+        [[course.full_label for course in courses] for courses in all_courses],
+        [[len(course.time_slots) for course in courses] for courses in all_courses])
+    return get_connections(incidence, incidence.weights)
+
+
+# same as create_gephi.get_course_connections
+def get_course_connections(courses: List[read_time_table.Course]) -> List[Dict[int, int]]:
+    incidence = Incidence(
+        [[student.name for student in course.students] for course in courses],
+        [[0] * len(course.students) for course in courses])
+    return get_connections(incidence, incidence.weights)[1]
@@ -0,0 +1,107 @@
+"""
+only re-parse and re-render what changed since the last run
+inputs are compared by content hashes stored in the build state
+"""
+
+from typing import Any, List, Dict, Optional, Set, Tuple
+import os
+import json
+import pickle
+import hashlib
+
+import dataset
+
+# inputs affecting every student, besides the inputs of the schools
+GLOBAL_INPUT_PATHS = [dataset.MANIFEST_PATH, "files/student_print_out_template.md",
+                      "files/student_print_out_template.html", "files/cohort_print_out_template.html",
+                      "files/print_out_macros.html"]
+
+
+def hash_file(file_path: str) -> str:
+    with open(file_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def get_global_input_paths() -> List[str]:
+    return GLOBAL_INPUT_PATHS + [file_path for school in dataset.get_schools() for file_path in school.get_input_paths()]
+
+
+# key: input path, value: content hash
+def get_input_hashes(page_paths: List[str]) -> Dict[str, str]:
+    return {file_path: hash_file(file_path) for file_path in get_global_input_paths() + page_paths
+            if os.path.isfile(file_path)}
+
+
+# input hashes and dependencies of the last run
+class BuildState:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        # key: input path, value: content hash
+        self.input_hashes: Dict[str, str] = {}
+        # key: page path, value: names of all students on that page
+        self.page_students: Dict[str, List[str]] = {}
+        # kinds of print-outs kept up to date, e.g. md, html or cohort
+        self.outputs: List[str] = ["md"]
+        if os.path.isfile(file_path):
+            with open(file_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            self.input_hashes = state["input_hashes"]
+            self.page_students = state["page_students"]
+            self.outputs = state.get("outputs", self.outputs)
+
+    def get_changed_inputs(self, input_hashes: Dict[str, str]) -> Set[str]:
+        return {file_path for file_path in set(input_hashes) | set(self.input_hashes)
+                if input_hashes.get(file_path) != self.input_hashes.get(file_path)}
+
+    # names of all students whose print-outs have to be rendered again, None when all are affected
+    def get_affected_students(self, changed_inputs: Set[str], page_students: Dict[str, List[str]]) -> Optional[Set[str]]:
+        if len(self.input_hashes) == 0 or any(file_path in changed_inputs for file_path in get_global_input_paths()):
+            return None
+        affected: Set[str] = set()
+        for file_path in changed_inputs:
+            affected.update(self.page_students.get(file_path, []))
+            affected.update(page_students.get(file_path, []))
+        return affected
+
+    # outputs not kept up to date by the last run, they have to be created for all students
+    def get_new_outputs(self, outputs: List[str]) -> List[str]:
+        return [output for output in outputs if output not in self.outputs]
+
+    def save(self, input_hashes: Dict[str, str], page_students: Dict[str, List[str]], outputs: List[str]) -> None:
+        self.input_hashes = input_hashes
+        self.page_students = page_students
+        self.outputs = outputs
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "w+", encoding="utf-8") as file:
+            json.dump({"input_hashes": self.input_hashes,
+                       "page_students": self.page_students,
+                       "outputs": self.outputs}, file, ensure_ascii=False)
+
+
+# parsed pages of the last runs
+# only valid for the same replacements
+class PageCache:
+    def __init__(self, file_path: str, replacements_hash: str):
+        self.file_path = file_path
+        self.replacements_hash = replacements_hash
+        # key: page path, value: content hash and parsed read_course_file.File
+        self.pages: Dict[str, Tuple[str, Any]] = {}
+        if os.path.isfile(file_path):
+            with open(file_path, "rb") as file:
+                stored_hash, pages = pickle.load(file)
+            if stored_hash == replacements_hash:
+                self.pages = pages
+
+    def get(self, file_path: str) -> Optional[Any]:
+        page = self.pages.get(file_path)
+        if page is None or page[0] != hash_file(file_path):
+            return None
+        return page[1]
+
+    def put(self, file_path: str, parsed: Any) -> None:
+        self.pages[file_path] = (hash_file(file_path), parsed)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "wb") as file:
+            pickle.dump((self.replacements_hash, self.pages), file)
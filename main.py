@@ -1,16 +1,177 @@
+from typing import List, Optional, Sequence
+import argparse
+import os
+import sys
+
 import create_print_out
 import sort_data
 import create_gephi
+import export_graph
+import incremental_build
+import snapshot
+import profiler
+import diagnostics
 
 
-def main() -> None:
-    students = sort_data.get_students()
-    for student in students.values():
-        create_print_out.create_student_print_out(student)
+PAGE_CACHE_PATH = "out/cache/pages.pickle"
+BUILD_STATE_PATH = "out/cache/build_state.json"
+
+
+def main(workers: int = 1, use_match_cache: bool = True, use_snapshot: bool = True,
+         render_workers: int = 1, render_processes: bool = False, show_timings: bool = False,
+         html: bool = False, cohort: bool = False, graph_formats: Sequence[str] = ("gexf",),
+         use_incidence_matrix: bool = False) -> None:
+    match_cache_path = sort_data.MATCH_CACHE_PATH if use_match_cache else None
+    if use_snapshot:
+        students = snapshot.get_students(
+            snapshot.SNAPSHOT_PATH, workers=workers, match_cache_path=match_cache_path)
+    else:
+        students = sort_data.get_students(workers, match_cache_path)
+    with profiler.stage("print-outs"):
+        timings = create_print_out.create_student_print_outs(
+            list(students.values()), render_workers, render_processes)
+    if show_timings:
+        print(f"print-outs: {timings}")
+    if html:
+        with profiler.stage("html print-outs"):
+            timings = create_print_out.create_student_html_print_outs(
+                list(students.values()), render_workers, render_processes)
+        if show_timings:
+            print(f"html print-outs: {timings}")
+    if cohort:
+        with profiler.stage("cohort print-out"):
+            timings = create_print_out.create_cohort_print_out(
+                list(students.values()))
+        if show_timings:
+            print(f"cohort print-out: {timings}")
     # create_print_out.create_student_comparison_print_out(
     #     list(students.values()))
-    create_gephi.create_gefx(list(students.values()))
+    create_gephi.create_gefx(
+        list(students.values()), use_incidence_matrix, graph_formats)
+
+
+# only parse changed pages and only render print-outs of affected students
+# print-outs of a kind not created by the last incremental run are created for all students
+def main_incremental(workers: int = 1, use_match_cache: bool = True,
+                     render_workers: int = 1, render_processes: bool = False, show_timings: bool = False,
+                     html: bool = False, cohort: bool = False, graph_formats: Sequence[str] = ("gexf",),
+                     use_incidence_matrix: bool = False) -> None:
+    state = incremental_build.BuildState(BUILD_STATE_PATH)
+    outputs = ["md"] + (["html"] if html else []) + (["cohort"] if cohort else [])
+    new_outputs = state.get_new_outputs(outputs)
+    input_hashes = incremental_build.get_input_hashes(
+        sort_data.get_page_paths())
+    changed_inputs = state.get_changed_inputs(input_hashes)
+    if len(changed_inputs) == 0 and len(new_outputs) == 0:
+        print("nothing changed")
+        return
+
+    students = sort_data.get_students(
+        workers, sort_data.MATCH_CACHE_PATH if use_match_cache else None, PAGE_CACHE_PATH)
+    page_students = sort_data.get_page_students(students)
+    affected_students = state.get_affected_students(
+        changed_inputs, page_students)
+
+    # missing print-outs are always created
+    def get_outdated_students(output: str) -> List[sort_data.Student]:
+        return [student for key, student in students.items()
+                if affected_students is None or output in new_outputs or key in affected_students or
+                not os.path.isfile(create_print_out.get_print_out_path(student, output))]
+
+    with profiler.stage("print-outs"):
+        timings = create_print_out.create_student_print_outs(
+            get_outdated_students("md"), render_workers, render_processes)
+    if show_timings:
+        print(f"print-outs: {timings}")
+    if html:
+        with profiler.stage("html print-outs"):
+            timings = create_print_out.create_student_html_print_outs(
+                get_outdated_students("html"), render_workers, render_processes)
+        if show_timings:
+            print(f"html print-outs: {timings}")
+    # a single document of all students, created again when anything changed
+    if cohort:
+        with profiler.stage("cohort print-out"):
+            timings = create_print_out.create_cohort_print_out(
+                list(students.values()))
+        if show_timings:
+            print(f"cohort print-out: {timings}")
+    create_gephi.create_gefx(
+        list(students.values()), use_incidence_matrix, graph_formats)
+    state.save(input_hashes, page_students, outputs)
+
+
+# check the whole dataset and write all problems to report_path instead of stopping at the first one
+# nothing is written to out/students or out/gephi
+# returns the amount of critical problems
+def validate(report_path: str, workers: int = 1, use_match_cache: bool = True) -> int:
+    diagnostics.enable()
+    students = sort_data.get_students(workers, sort_data.MATCH_CACHE_PATH if use_match_cache else None)
+    # conflicting time slots are otherwise only found when rendering the print-outs
+    for student in students.values():
+        with diagnostics.Location(student=student.name):
+            create_print_out.get_time_table(student)
+    diagnostics.write_report(report_path)
+    criticals = len(diagnostics.get_criticals())
+    print(f"{criticals} critical problems and {len(diagnostics.sink.diagnostics) - criticals} warnings, "
+          f"see {report_path}")
+    return criticals
+
+
+def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="create time tables and student networks from the files folder")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="amount of processes parsing course list files")
+    parser.add_argument("--no-match-cache", action="store_true",
+                        help=f"don't use or update the fuzzy match decisions in {sort_data.MATCH_CACHE_PATH}")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only process inputs changed since the last incremental run")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help=f"always resolve the students instead of loading them from {snapshot.SNAPSHOT_PATH}")
+    parser.add_argument("--render-workers", type=int, default=1,
+                        help="amount of threads rendering print-outs")
+    parser.add_argument("--render-processes", action="store_true",
+                        help="render print-outs with processes instead of threads")
+    parser.add_argument("--timings", action="store_true",
+                        help="print the time spent in each phase of rendering the print-outs")
+    parser.add_argument("--html", action="store_true",
+                        help="also create a self-contained html print-out for each student")
+    parser.add_argument("--cohort", action="store_true",
+                        help=f"also create a single html document with all print-outs in {create_print_out.COHORT_PRINT_OUT_PATH}")
+    parser.add_argument("--graph-formats", nargs="+", default=["gexf"], choices=list(export_graph.EXPORTERS.keys()),
+                        help="formats of the networks in out/gephi")
+    parser.add_argument("--incidence-matrix", action="store_true",
+                        help="compute the student and course networks with sparse matrices, requires numpy and scipy")
+    parser.add_argument("--validate", default=None, metavar="REPORT",
+                        help="only check the input files and write all problems as json to this file")
+    parser.add_argument("--profile", default=None, metavar="REPORT",
+                        help="time each stage of the pipeline, print the result and write it as json to this file")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, trace the peak memory allocated by python, slows down the run")
+    parser.add_argument("--cprofile", default=None, metavar="STATS",
+                        help="run under cProfile and write the stats to this file")
+    return parser.parse_args(args)
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.profile is not None:
+        profiler.enable(args.profile_memory)
+    criticals = 0
+    with profiler.cprofile(args.cprofile):
+        if args.validate is not None:
+            criticals = validate(args.validate, args.workers, not args.no_match_cache)
+        elif args.incremental:
+            main_incremental(args.workers, not args.no_match_cache,
+                             args.render_workers, args.render_processes, args.timings, args.html, args.cohort,
+                             args.graph_formats, args.incidence_matrix)
+        else:
+            main(args.workers, not args.no_match_cache, not args.no_snapshot,
+                 args.render_workers, args.render_processes, args.timings, args.html, args.cohort,
+                 args.graph_formats, args.incidence_matrix)
+    if args.profile is not None:
+        profiler.print_report()
+        profiler.write_report(args.profile)
+    if criticals != 0:
+        sys.exit(1)
@@ -0,0 +1,152 @@
+"""
+time and count what the pipeline does
+disabled by default, then stages and counters do nothing
+stages and counters of worker processes are not collected
+reports of separate programs of the same run, e.g. convert_print_outs.py, are merged with merge_report
+"""
+
+from typing import Any, Dict, Iterator, Optional, Tuple
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+enabled = False
+# peak memory is only traced when requested, tracing slows down allocations
+trace_memory = False
+
+
+class Stage:
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.calls = 0
+
+
+# key: stage name, value: accumulated times
+stages: Dict[str, Stage] = {}
+# key: counter name, value: amount
+counters: Dict[str, int] = {}
+# peak memory and whether it was traced, taken from a merged report
+merged_memory: Optional[Tuple[Optional[int], bool]] = None
+
+
+class StageTimer:
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self) -> "StageTimer":
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        stage = stages.setdefault(self.name, Stage())
+        stage.wall += time.perf_counter() - self.wall
+        stage.cpu += time.process_time() - self.cpu
+        stage.calls += 1
+
+
+class DisabledStage:
+    def __enter__(self) -> "DisabledStage":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+DISABLED_STAGE = DisabledStage()
+
+
+# time everything inside the with statement, e.g.: with profiler.stage("parse pages"):
+def stage(name: str) -> Any:
+    if not enabled:
+        return DISABLED_STAGE
+    return StageTimer(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    if enabled:
+        counters[name] = counters.get(name, 0) + amount
+
+
+def enable(with_memory: bool = False) -> None:
+    global enabled, trace_memory
+    enabled = True
+    trace_memory = with_memory
+    if with_memory:
+        tracemalloc.start()
+
+
+def get_peak_memory() -> Optional[int]:
+    if trace_memory:
+        return tracemalloc.get_traced_memory()[1]
+    try:
+        import resource
+    except ImportError:
+        return None
+    # kibibytes on linux, bytes on macos
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def get_report() -> Dict[str, Any]:
+    # the memory of the pipeline is of interest, not of a program merged into its report
+    peak_memory, memory_traced = merged_memory if merged_memory is not None else (get_peak_memory(), trace_memory)
+    return {
+        "stages": {name: {"wall": stage.wall, "cpu": stage.cpu, "calls": stage.calls}
+                   for name, stage in stages.items()},
+        "counters": dict(counters),
+        "peak_memory": peak_memory,
+        "memory_traced": memory_traced,
+    }
+
+
+# add the stages and counters of a report written by another program of the same run
+def merge_report(file_path: str) -> None:
+    global merged_memory
+    with open(file_path, "r", encoding="utf-8") as file:
+        report = json.load(file)
+    for name, values in report["stages"].items():
+        stage = stages.setdefault(name, Stage())
+        stage.wall += values["wall"]
+        stage.cpu += values["cpu"]
+        stage.calls += values["calls"]
+    for name, amount in report["counters"].items():
+        counters[name] = counters.get(name, 0) + amount
+    merged_memory = (report["peak_memory"], report["memory_traced"])
+
+
+def write_report(file_path: str) -> None:
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w+", encoding="utf-8") as file:
+        json.dump(get_report(), file, indent=4)
+
+
+def print_report() -> None:
+    for name, stage in stages.items():
+        print(f"{name}: {stage.wall:.3f}s wall, {stage.cpu:.3f}s cpu, {stage.calls} calls")
+    for name, amount in counters.items():
+        print(f"{name}: {amount}")
+
+
+# run everything inside the with statement under cProfile and write the stats to file_path
+# the stats can be viewed with: python3 -m pstats file_path
+@contextlib.contextmanager
+def cprofile(file_path: Optional[str]) -> Iterator[None]:
+    if file_path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        profile.dump_stats(file_path)
@@ -0,0 +1,287 @@
+"""
+answer questions about the resolved students over http with json, e.g. from a browser or curl
+the students are loaded once and indexed by name, course, room and time slot, answers are cached
+days are counted from 0 (monday) like in the time table files, periods from 1, each school has its own amount of both
+students, course labels and rooms of a named school are prefixed with its name, e.g. north/R101 (see dataset.get_school_key),
+the slash has to be quoted as %2F in a path
+    /students                               all student names
+    /students/NAME                          time table of a student
+    /students/NAME/contacts[?day=D]         students sharing a room with the student, optionally on one day only
+    /courses                                all course labels
+    /courses/LABEL                          time slots and students of a course
+    /rooms                                  all rooms
+    /rooms/ROOM[?day=D][&period=P]          occupied time slots of a room with courses and students
+    /slots/D/P                              all occupied rooms in a time slot
+run with: python3 query_server.py [--host 127.0.0.1] [--port 8000] [--cache-size 1024]
+"""
+
+from typing import cast, Any, Callable, Dict, ItemsView, List, Optional, Tuple
+import argparse
+import functools
+import http.server
+import json
+import urllib.parse
+
+import dataset
+import read_time_table
+import sort_data
+import contact_graph
+import room_index
+import snapshot
+
+
+class QueryError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def get_slot_dict(day: int, period: int, room: str) -> Dict[str, Any]:
+    return {"day": day, "period": period, "room": room}
+
+
+def get_course_dict(course: read_time_table.Course) -> Dict[str, Any]:
+    return {"label": course.full_label,
+            "teacher": course.teacher,
+            "teacher_abbreviation": course.teacher_abbreviation,
+            "subject": course.time_table_subject,
+            "time_slots": [get_slot_dict(time_slot.day, time_slot.period, time_slot.room)
+                           for time_slot in course.time_slots]}
+
+
+# day and period of all bits set in a weekly mask, see read_time_table.SlotLayout.get_slot_bit
+def get_mask_slots(mask: int, layout: read_time_table.SlotLayout) -> List[Tuple[int, int]]:
+    slots: List[Tuple[int, int]] = []
+    while mask:
+        lowest = mask & -mask
+        slots.append(layout.get_slot(lowest.bit_length() - 1))
+        mask ^= lowest
+    return slots
+
+
+def get_int(value: str, name: str) -> int:
+    if not value.isdecimal():
+        raise QueryError(400, f"{name} has to be a number, not '{value}'.")
+    return int(value)
+
+
+class QueryIndex:
+    def __init__(self, students: List[sort_data.Student], cache_size: int = 1024):
+        self.students = students
+        graph = contact_graph.ContactGraph(students)
+        # key: room key, value: room id
+        self.room_ids = graph.room_ids
+        self.rooms = list(self.room_ids.keys())
+        # key: room id, value: weekly mask of all time slots in that room, per student
+        self.occupancies = graph.occupancies
+        # time slots of each student
+        self.layouts = graph.layouts
+        self.room_index = room_index.RoomIndex(students)
+        # longest week of all schools
+        self.days = max((layout.days for layout in self.layouts), default=dataset.DAYS)
+        self.periods_per_day = max((layout.periods_per_day for layout in self.layouts), default=dataset.PERIODS_PER_DAY)
+        # key of each student, see dataset.get_student_key
+        self.student_keys = [dataset.get_student_key(student.school, student.name) for student in students]
+        # key: student key, value: student id, also by lower case key
+        self.student_ids: Dict[str, int] = {}
+        for id, key in enumerate(self.student_keys):
+            self.student_ids.setdefault(key.lower(), id)
+        for id, key in enumerate(self.student_keys):
+            self.student_ids[key] = id
+        # key: student id, value: weekly mask of shared time slots per contact, in both directions
+        self.contacts: List[Dict[int, int]] = [{} for _ in students]
+        for id, contacts in enumerate(graph.contacts):
+            for other_id, shared in contacts.items():
+                self.contacts[id][other_id] = shared
+                self.contacts[other_id][id] = shared
+        # key: course label key, value: all courses with this label and the ids of their students
+        # courses of a school with the same label are the same course like in the networks
+        self.courses: Dict[str, Tuple[List[read_time_table.Course], List[int]]] = {}
+        for id, student in enumerate(students):
+            for course in student.get_all_courses():
+                courses, student_ids = self.courses.setdefault(
+                    dataset.get_school_key(course.school, course.full_label), ([], []))
+                if all(other is not course for other in courses):
+                    courses.append(course)
+                if len(student_ids) == 0 or student_ids[-1] != id:
+                    student_ids.append(id)
+        # key: room id * SLOTS + slot bit, like room_index.RoomIndex, value: ids of all students in that cell
+        self.cell_students: Dict[int, List[int]] = {}
+        for id, occupancy in enumerate(self.occupancies):
+            for room_id, mask in occupancy.items():
+                while mask:
+                    lowest = mask & -mask
+                    self.cell_students.setdefault(
+                        room_id * room_index.SLOTS + lowest.bit_length() - 1, []).append(id)
+                    mask ^= lowest
+        # key: request path with query, value: status and json body
+        self.get_response: Callable[[str], Tuple[int, bytes]] = functools.lru_cache(maxsize=cache_size)(
+            self.get_uncached_response)
+
+    def get_student_id(self, name: str) -> int:
+        if name in self.student_ids:
+            return self.student_ids[name]
+        if name.lower() in self.student_ids:
+            return self.student_ids[name.lower()]
+        raise QueryError(404, f"Can't find student '{name}'.")
+
+    def get_room_id(self, room: str) -> int:
+        if room not in self.room_ids:
+            raise QueryError(404, f"Can't find room '{room}'.")
+        return self.room_ids[room]
+
+    def get_student(self, name: str) -> Dict[str, Any]:
+        student = self.students[self.get_student_id(name)]
+        time_table = sorted((time_slot.day, time_slot.period, time_slot.room, course.full_label)
+                            for course in student.get_all_courses() for time_slot in course.time_slots)
+        return {"name": student.name,
+                "school": student.school,
+                "group": student.group,
+                "tutor": student.tutor,
+                "tutor_abbreviation": student.tutor_abbreviation,
+                "amount_courses": student.amount_courses,
+                "weekly_periods": student.weekly_periods,
+                "p_courses": {p_level: get_course_dict(course) for p_level, course in
+                              cast("ItemsView[int, read_time_table.Course]", student.p_courses.items())},
+                "cover_courses": [get_course_dict(course) for course in student.cover_courses],
+                "time_table": [dict(get_slot_dict(day, period, room), course=label)
+                               for day, period, room, label in time_table]}
+
+    # students sharing a room with the student, most shared periods first
+    def get_contacts(self, name: str, day: Optional[int] = None) -> List[Dict[str, Any]]:
+        id = self.get_student_id(name)
+        layout = self.layouts[id]
+        days_mask = layout.get_days_mask([day]) if day is not None else -1
+        contacts: List[Dict[str, Any]] = []
+        for other_id, shared in self.contacts[id].items():
+            if shared & days_mask == 0:
+                continue
+            time_slots = sorted((slot_day, period, self.rooms[room_id])
+                                for room_id, mask in self.occupancies[id].items()
+                                for slot_day, period in get_mask_slots(
+                                    mask & self.occupancies[other_id].get(room_id, 0) & days_mask, layout))
+            contacts.append({"name": self.student_keys[other_id],
+                             "periods": contact_graph.count_bits(shared & days_mask),
+                             "time_slots": [get_slot_dict(*time_slot) for time_slot in time_slots]})
+        contacts.sort(key=lambda contact: (-contact["periods"], contact["name"]))
+        return contacts
+
+    def get_course(self, label: str) -> Dict[str, Any]:
+        if label not in self.courses:
+            raise QueryError(404, f"Can't find course '{label}'.")
+        courses, student_ids = self.courses[label]
+        return {"label": label,
+                "courses": [get_course_dict(course) for course in courses],
+                "students": [self.student_keys[id] for id in student_ids],
+                # every student of the course is in contact with all others
+                "contact_pairs": len(student_ids) * (len(student_ids) - 1) // 2}
+
+    # all occupied cells of a room, only of the given day and period when given
+    def get_room(self, room: str, day: Optional[int] = None, period: Optional[int] = None) -> List[Dict[str, Any]]:
+        room_id = self.get_room_id(room)
+        layout = self.room_index.get_layout(room)
+        cells: List[Dict[str, Any]] = []
+        for cell_day in range(layout.days) if day is None else [day]:
+            for cell_period in range(1, layout.periods_per_day + 1) if period is None else [period]:
+                if not layout.has_slot(cell_day, cell_period):
+                    continue
+                student_ids = self.cell_students.get(
+                    room_id * room_index.SLOTS + layout.get_slot_bit(cell_day, cell_period), [])
+                if len(student_ids) == 0:
+                    continue
+                cells.append(dict(get_slot_dict(cell_day, cell_period, room),
+                                  headcount=len(student_ids),
+                                  courses=[course.full_label for course in
+                                           self.room_index.get_courses(room, cell_day, cell_period)],
+                                  students=[self.student_keys[id] for id in student_ids]))
+        return cells
+
+    def get_slot(self, day: int, period: int) -> List[Dict[str, Any]]:
+        cells: List[Dict[str, Any]] = []
+        for room in self.rooms:
+            cells.extend(self.get_room(room, day, period))
+        return cells
+
+    # answer a request path like /students/NAME/contacts?day=2, raises QueryError
+    def query(self, path: str) -> Any:
+        url = urllib.parse.urlsplit(path)
+        parts = [urllib.parse.unquote(part) for part in url.path.strip("/").split("/")]
+        parameters = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+        day = get_int(parameters["day"], "day") if "day" in parameters else None
+        period = get_int(parameters["period"], "period") if "period" in parameters else None
+        if day is not None and not 0 <= day < self.days:
+            raise QueryError(400, f"day {day} out of range.")
+        if period is not None and not 1 <= period <= self.periods_per_day:
+            raise QueryError(400, f"period {period} out of range.")
+
+        if parts == ["students"]:
+            return self.student_keys
+        if len(parts) == 2 and parts[0] == "students":
+            return self.get_student(parts[1])
+        if len(parts) == 3 and parts[0] == "students" and parts[2] == "contacts":
+            return self.get_contacts(parts[1], day)
+        if parts == ["courses"]:
+            return list(self.courses.keys())
+        if len(parts) == 2 and parts[0] == "courses":
+            return self.get_course(parts[1])
+        if parts == ["rooms"]:
+            return self.rooms
+        if len(parts) == 2 and parts[0] == "rooms":
+            return self.get_room(parts[1], day, period)
+        if len(parts) == 3 and parts[0] == "slots":
+            slot_day, slot_period = get_int(parts[1], "day"), get_int(parts[2], "period")
+            if not (0 <= slot_day < self.days and 1 <= slot_period <= self.periods_per_day):
+                raise QueryError(400, f"time slot on {slot_day}. day {slot_period}. period out of range.")
+            return self.get_slot(slot_day, slot_period)
+        raise QueryError(404, f"Unknown query '{url.path}'.")
+
+    def get_uncached_response(self, path: str) -> Tuple[int, bytes]:
+        try:
+            status, body = 200, self.query(path)
+        except QueryError as error:
+            status, body = error.status, {"error": str(error)}
+        return status, json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def get_handler(index: QueryIndex, log: bool = False) -> type:
+    class QueryHandler(http.server.BaseHTTPRequestHandler):
+        # keep connections open for more requests, headers and body are sent without waiting for acks
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            status, body = index.get_response(self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            if log:
+                super().log_message(format, *args)
+
+    return QueryHandler
+
+
+# port 0 picks a free port, see server.server_address
+def create_server(index: QueryIndex, host: str = "127.0.0.1", port: int = 8000,
+                  log: bool = False) -> http.server.ThreadingHTTPServer:
+    return http.server.ThreadingHTTPServer((host, port), get_handler(index, log))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--cache-size", type=int, default=1024, help="amount of cached answers")
+    parser.add_argument("--log", action="store_true", help="print every request")
+    args = parser.parse_args()
+    index = QueryIndex(list(snapshot.get_students(snapshot.SNAPSHOT_PATH).values()), args.cache_size)
+    server = create_server(index, args.host, args.port, args.log)
+    host, port = server.server_address[:2]
+    print(f"{len(index.students)} students, serving on http://{host!s}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -3,30 +3,56 @@ parse all the data from a single file into a File object
 no data interpretation
 """
 
-from typing import List, Dict, Optional, Tuple, Union
-import sys
+from typing import List, Dict, Optional, Pattern, Tuple, Union
 import re
 import csv
 
+import profiler
+import diagnostics
+
+# the first match of each header pattern is used
+COURSE_PATTERN = re.compile(
+    r"Kursliste(?:\n.*\n)?\n?\s*?([\w\d]{2,4}) *- *(.+?\S)(?:   +| *?\n)", re.MULTILINE)
+TEACHER_PATTERN = re.compile(
+    r"Kursleiter:(?:\n.*\n)?\n?\s*?(\S.*?\S)(?:   +| *?\n)", re.MULTILINE)
+GROUP_PATTERN = re.compile(r"GRUPPE *([A-Z])", re.MULTILINE)
+# a student row: name, then tutor and p-level or only the tutor
+# the name starts with a word of at least 3 characters after at least 2 spaces
+# following words belong to the name while they are separated by a single space and have 1 or at least 3 characters
+# or separated by 2 to 15 spaces and have 4 or at least 6 characters, the name ends before a space
+# words are only matched as a whole, so backtracking is bounded by the amount of words in the row
+# for the same matches as the former r"  +(\S{3,}(?:\S{2,}|(?: \S| {,15}\S{4}))+) +(?:(\w*) *([Pp]+\S)|(\w*))",
+# which took exponential time on long words
+STUDENT_PATTERN = re.compile(
+    r"(?<! )  +(\S{3,}(?!\S)(?: (?:\S|\S{3,})(?!\S)| {2,15}(?:\S{4}|\S{6,})(?!\S))+|\S{5,}(?!\S))"
+    r" +(?:(\w*) *([Pp]+\S)|(\w*))")
+
 
 # represent a single student line in from a file
 class Student:
-    def __init__(self, name: str, tutor_abbreviation: str, p_level: int):
+    # line in the page, see diagnostics
+    line: Optional[int] = None
+
+    def __init__(self, name: str, tutor_abbreviation: str, p_level: int, line: Optional[int] = None):
         self.name = name
         self.tutor_abbreviation = tutor_abbreviation
         self.p_level = p_level
+        self.line = line
         self.check_integrity()
 
     def check_integrity(self) -> None:
+        valid = True
         if self.name == "":
-            print("Critical: Student name empty.")
-            sys.exit(1)
+            diagnostics.report("student-name", "Student name empty.")
+            valid = False
         if self.tutor_abbreviation == "":
-            print("Critical: Tutor name empty.")
-            sys.exit(1)
+            diagnostics.report("tutor-name", "Tutor name empty.")
+            valid = False
         if not 0 <= self.p_level <= 5:
-            print("Critical: Invalid P-level.")
-            sys.exit(1)
+            diagnostics.report("p-level", "Invalid P-level.")
+            valid = False
+        if not valid:
+            raise diagnostics.Invalid()
 
     def is_lk(self) -> bool:
         return 1 <= self.p_level <= 3
@@ -37,6 +63,7 @@ class Student:
 
 # contains all the interesing information from a single file
 class File:
+    file_path = ""
     raw = ""
     course_name = ""
     course_abbreviation = ""
@@ -49,26 +76,29 @@ class File:
 
     # is this object ok to be used
     def check_integrity(self) -> None:
+        valid = True
         if self.raw == "":
-            print("Critical: Raw is empty.")
-            sys.exit(1)
+            diagnostics.report("raw-empty", "Raw is empty.")
+            valid = False
         if self.course_name == "":
-            print("Critical: Course name empty.")
-            sys.exit(1)
+            diagnostics.report("course-name", "Course name empty.")
+            valid = False
         if self.course_abbreviation == "":
-            print("Critical: Course abbreviation empty.")
-            sys.exit(1)
+            diagnostics.report("course-abbreviation", "Course abbreviation empty.")
+            valid = False
         if self.teacher == "":
-            print("Critical: Teacher empty.")
-            sys.exit(1)
+            diagnostics.report("teacher", "Teacher empty.")
+            valid = False
         if self.group != "A" and self.group != "B":
-            print("Critical: Course group broken.")
-            sys.exit(1)
+            diagnostics.report("group", "Course group broken.")
+            valid = False
         for student in self.students:
             student.check_integrity()
         if any([student.is_lk() for student in self.students]) and not all([student.is_lk() for student in self.students]):
-            print("Critical: Some but not all students have this as one of their LKs.")
-            sys.exit(1)
+            diagnostics.report("lk", "Some but not all students have this as one of their LKs.")
+            valid = False
+        if not valid:
+            raise diagnostics.Invalid()
 
     def __repr__(self):
         students_repr = "\n".join(str(student) for student in self.students)
@@ -81,9 +111,9 @@ students: {students_repr}"""
 
 
 # load low level replacements from file
-def get_replacements() -> Dict[str, str]:
+def get_replacements(file_path: str = "files/replace_list.csv") -> Dict[str, str]:
     corrections: Dict[str, str] = {}
-    with open("files/replace_list.csv", "r", encoding="utf-8", newline="") as csv_file:
+    with open(file_path, "r", encoding="utf-8", newline="") as csv_file:
         csv_reader = csv.reader(csv_file, delimiter=";", quotechar='"')
         for row in csv_reader:
             # escape line breaks
@@ -98,6 +128,102 @@ def apply_replacements(text: str, replacements: Dict[str, str]) -> str:
     return text
 
 
+# does a proper suffix of first equal a prefix of second
+def suffix_is_prefix(first: str, second: str) -> bool:
+    if second == "":
+        return False
+    idx = first.find(second[0], max(1, len(first) - len(second) + 1))
+    while idx != -1:
+        if second.startswith(first[idx:]):
+            return True
+        idx = first.find(second[0], idx + 1)
+    return False
+
+
+# can an occurrence of one string overlap with an occurrence of the other one
+def overlaps(first: str, second: str) -> bool:
+    return first in second or second in first or suffix_is_prefix(first, second) or suffix_is_prefix(second, first)
+
+
+# does the result of the later replacement depend on the earlier one being applied before
+def depends(earlier_key: str, earlier_value: str, key: str) -> bool:
+    # the later key could match text created by the earlier replacement
+    if overlaps(earlier_value, key):
+        return True
+    # an occurrence of the later key may contain the earlier key
+    if earlier_key in key:
+        return True
+    # an occurrence of the later key may start before an overlapping occurrence of the earlier key
+    return suffix_is_prefix(key, earlier_key)
+
+
+# regex matching any of the keys, sharing common prefixes
+# python regex tries alternatives one after another, a prefix tree only tries the matching branches
+# longer keys are preferred over their prefixes
+def get_trie_pattern(keys: List[str]) -> str:
+    # key: character, value: subtree, "" marks the end of a key
+    trie: Dict[str, Dict] = {}
+    for key in keys:
+        node = trie
+        for character in key:
+            node = node.setdefault(character, {})
+        node[""] = {}
+    return get_trie_node_pattern(trie)
+
+
+def get_trie_node_pattern(node: Dict[str, Dict]) -> str:
+    branches = [re.escape(character) + get_trie_node_pattern(child)
+                for character, child in node.items() if character != ""]
+    if len(branches) == 0:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if "" in node:
+        pattern = f"(?:{pattern})?"
+    return pattern
+
+
+# apply replacements with the same result as apply_replacements but in less passes over the text
+# replacements that don't depend on each other are applied in a single regex pass,
+# where the earlier replacement wins when two keys match at the same position
+class Replacer:
+    def __init__(self, replacements: Dict[str, str]):
+        # each stage is applied in a single pass
+        self.stages: List[Dict[str, str]] = []
+        # pairs of keys whose order matters, earlier key first
+        self.chains: List[Tuple[str, str]] = []
+        for key, value in replacements.items():
+            # the last stage with a replacement that has to stay before this one
+            last_stage_idx = -1
+            for stage_idx, stage in enumerate(self.stages):
+                for stage_key, stage_value in stage.items():
+                    if depends(stage_key, stage_value, key) or depends(key, value, stage_key):
+                        self.chains.append((stage_key, key))
+                        last_stage_idx = stage_idx
+            # can this replacement be part of that stage or does it need a later one
+            if last_stage_idx == -1 or any(depends(stage_key, stage_value, key)
+                                           for stage_key, stage_value in self.stages[last_stage_idx].items()):
+                last_stage_idx += 1
+            if last_stage_idx == len(self.stages):
+                self.stages.append({})
+            self.stages[last_stage_idx][key] = value
+        self.patterns = [re.compile(get_trie_pattern(list(stage.keys()))) if len(stage) > 1 else None
+                         for stage in self.stages]
+
+    def apply(self, text: str) -> str:
+        for stage, pattern in zip(self.stages, self.patterns):
+            if pattern is None:
+                # single replacements are faster with str.replace
+                for key, value in stage.items():
+                    if profiler.enabled:
+                        profiler.count("replacements applied", text.count(key))
+                    text = text.replace(key, value)
+            else:
+                text, amount = pattern.subn(
+                    lambda match: stage[match.group(0)], text)
+                profiler.count("replacements applied", amount)
+        return text
+
+
 def read_file(file_path: str) -> str:
     with open(file_path, "r", encoding="utf-8") as file:
         raw_text = file.read()
@@ -107,15 +233,12 @@ def read_file(file_path: str) -> str:
     return "\n".join(lines)
 
 
-# find regex pattern
-def get_element(text: str, pattern: str) -> List[str]:
-    # todo: shouldn't be iter
-    matches = list(re.finditer(pattern, text, re.MULTILINE))
-    if len(matches) != 0:
-        return list(matches[0].groups())
-    else:
-        print(f"Critical: Can't find \"{pattern}\":\n{text}")
-        sys.exit(1)
+# find the first match of the pattern
+def get_element(text: str, pattern: Pattern[str]) -> List[str]:
+    match = pattern.search(text)
+    if match is None:
+        diagnostics.critical("header", f"Can't find \"{pattern.pattern}\":\n{text}")
+    return list(match.groups())
 
 
 def get_p_level(input_str: str) -> int:
@@ -132,51 +255,69 @@ def get_p_level(input_str: str) -> int:
     }
     if character in aliases:
         character = aliases[character]
+    if not character.isdecimal():
+        diagnostics.critical("p-level", f"Invalid P-level '{input_str}'.")
     return int(character)
 
 
+# position of the first student row, the line after the name tag
+# everything before the name tag can't be used
+def get_student_rows_start(text: str) -> int:
+    line_start = 0
+    while line_start <= len(text):
+        line_end = text.find("\n", line_start)
+        if line_end == -1:
+            line_end = len(text)
+        if "name" in text[line_start:line_end].lower():
+            return line_end + 1
+        line_start = line_end + 1
+    diagnostics.critical("name-tag", f"Can't find Name tag in: {text}")
+
+
 # parse all students from a single file
+# in collect mode invalid student lines are skipped
 def get_students(text: str) -> List[Student]:
-    # everything before name tag can't be used
-    name_line_idx: Optional[int] = None
-    for line_idx, line in enumerate(text.split("\n")):
-        if "name" in line.lower():
-            name_line_idx = line_idx
-            break
-    if name_line_idx is None:
-        print(f"Critical: Can't find Name tag in: {text}")
-        sys.exit(1)
-    cut_text = "\n".join(text.split("\n")[name_line_idx + 1:])
-
-    # find with regex
-    matches = re.finditer(
-        r"  +(\S{3,}(?:\S{2,}|(?: \S| {,15}\S{4}))+) +(?:(\w*) *([Pp]+\S)|(\w*))", cut_text)
     students: List[Student] = []
-    for match in matches:
+    position = 0
+    line = 1
+    for match in STUDENT_PATTERN.finditer(text, get_student_rows_start(text)):
+        line += text.count("\n", position, match.start())
+        position = match.start()
         groups = match.groups()
-        # when this course is a p-course
-        if groups[3] is None:
-            students.append(
-                Student(groups[0], groups[1], get_p_level(groups[2])))
-        # when not a p-course
-        else:
-            students.append(Student(groups[0], groups[3], 0))
+        with diagnostics.Location(line=line, student=groups[0]):
+            try:
+                # when this course is a p-course
+                if groups[3] is None:
+                    students.append(
+                        Student(groups[0], groups[1], get_p_level(groups[2]), line))
+                # when not a p-course
+                else:
+                    students.append(Student(groups[0], groups[3], 0, line))
+            except diagnostics.Invalid:
+                continue
     return students
 
 
 # load file from disk into File object
-def parse_file(file_path: str, replacements: Dict[str, str]) -> File:
-    text = read_file(file_path)
-    text = apply_replacements(text, replacements)
-    file = File(text)
-
-    file.course_abbreviation, file.course_name = get_element(
-        file.raw, r"Kursliste(?:\n.*\n)?\n?\s*?([\w\d]{2,4}) *- *(.+?\S)(?:   +| *?\n)")
-    file.teacher = get_element(
-        file.raw, r"Kursleiter:(?:\n.*\n)?\n?\s*?(\S.*?\S)(?:   +| *?\n)")[0]
-    file.group = get_element(file.raw, r"GRUPPE *([A-Z])")[0]
-    file.students = get_students(text)
-
-    file.check_integrity()
+# in collect mode diagnostics.Invalid is raised for pages that can't be used
+def parse_file(file_path: str, replacer: Replacer) -> File:
+    with diagnostics.Location(file_path=file_path):
+        with profiler.stage("read pages"):
+            text = read_file(file_path)
+        with profiler.stage("replacements"):
+            text = replacer.apply(text)
+        file = File(text)
+        file.file_path = file_path
+
+        with profiler.stage("extract students"):
+            file.course_abbreviation, file.course_name = get_element(
+                file.raw, COURSE_PATTERN)
+            file.teacher = get_element(file.raw, TEACHER_PATTERN)[0]
+            file.group = get_element(file.raw, GROUP_PATTERN)[0]
+            file.students = get_students(text)
+        profiler.count("pages")
+        profiler.count("student lines", len(file.students))
+
+        file.check_integrity()
 
     return file
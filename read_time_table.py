@@ -1,10 +1,81 @@
-from typing import Any, cast, List, Tuple, Dict
-import sys
+from typing import Any, cast, Iterable, List, Tuple, Dict, Optional
 import csv
 
+import dataset
+import diagnostics
+
+
+DAY_NAMES = ["Mon.", "Tues.", "Wed.", "Thurs.", "Fr.", "Sat.", "Sun."]
+
+
+# days after the days of a week are numbered
+def get_day_name(day: int) -> str:
+    return DAY_NAMES[day] if 0 <= day < len(DAY_NAMES) else f"{day + 1}. day"
+
+
+# time slots of a school can be stored as bits in weekly masks, one bit per period of a day
+# the amount of days and periods is checked against dataset.MAX_SLOTS when the manifest is loaded
+class SlotLayout:
+    __slots__ = ("days", "periods_per_day", "slots")
+
+    def __init__(self, days: int = dataset.DAYS, periods_per_day: int = dataset.PERIODS_PER_DAY):
+        self.days = days
+        self.periods_per_day = periods_per_day
+        self.slots = days * periods_per_day
+
+    def __eq__(self, other: object):
+        if not isinstance(other, SlotLayout):
+            return NotImplemented
+        return (self.days, self.periods_per_day) == (other.days, other.periods_per_day)
+
+    def __hash__(self):
+        return hash((self.days, self.periods_per_day))
+
+    def __repr__(self):
+        return f"{self.days} days with {self.periods_per_day} periods"
+
+    # get bit index of a time slot in a weekly mask
+    def get_slot_bit(self, day: int, period: int) -> int:
+        if not self.has_slot(day, period):
+            diagnostics.critical("time-slot-range", f"time slot on {day}. day {period}. period out of range.")
+        return day * self.periods_per_day + period - 1
+
+    def has_slot(self, day: int, period: int) -> bool:
+        return 0 <= day < self.days and 1 <= period <= self.periods_per_day
+
+    # day and period of a bit index
+    def get_slot(self, slot_bit: int) -> Tuple[int, int]:
+        return slot_bit // self.periods_per_day, slot_bit % self.periods_per_day + 1
+
+    # get mask of all time slots of a single day
+    def get_day_mask(self, day: int) -> int:
+        return ((1 << self.periods_per_day) - 1) << (day * self.periods_per_day)
+
+    # get mask of all time slots of these days, of the whole week when no days are given
+    def get_days_mask(self, days: Optional[Iterable[int]] = None) -> int:
+        days_mask = 0
+        for day in range(self.days) if days is None else days:
+            if 0 <= day < self.days:
+                days_mask |= self.get_day_mask(day)
+        return days_mask
+
+    def get_day_names(self) -> List[str]:
+        return [get_day_name(day) for day in range(self.days)]
+
+
+# the layout of the files folder
+DEFAULT_LAYOUT = SlotLayout()
+
+
+def get_layout(school: dataset.School) -> SlotLayout:
+    return SlotLayout(school.days, school.periods_per_day)
+
 
 # represent chronological and spacial location of a period
+# equal and hashed by time only, the room doesn't matter
 class TimeSpaceSlot:
+    __slots__ = ("day", "period", "room")
+
     def __init__(self, day: int, period: int, room: str):
         self.day = day
         self.period = period
@@ -15,18 +86,27 @@ class TimeSpaceSlot:
             return NotImplemented
         return self.day == cast("TimeSpaceSlot", other).day and self.period == cast("TimeSpaceSlot", other).period
 
+    def __hash__(self):
+        return hash((self.day, self.period))
+
     def __repr__(self):
-        days = ["Mon.", "Tues.", "Wed.", "Thurs.", "Fr."]
-        return f"at {days[self.day]} {self.period}. period in {self.room}"
+        return f"at {get_day_name(self.day)} {self.period}. period in {self.room}"
 
 
 # represent single course
 # all information in here is supposed to be clean, not fuzzy
 class Course:
-    def __init__(self, teacher_abbreviation: str, time_table_subject: str):
+    def __init__(self, teacher_abbreviation: str, time_table_subject: str, school: str = "",
+                 layout: SlotLayout = DEFAULT_LAYOUT):
         self.teacher_abbreviation = teacher_abbreviation
         self.time_table_subject = time_table_subject
+        # see dataset.School.name
+        self.school = school
+        # time slots of a week of the school
+        self.layout = layout
         self.time_slots: List[TimeSpaceSlot] = []
+        # weekly mask of all time slots, one bit per period (see SlotLayout.get_slot_bit)
+        self.occupancy = 0
         # better label
         self.full_label = ""
         # full teacher name
@@ -36,26 +116,31 @@ class Course:
         self.students: List[Any] = []
 
     def add_time_slot(self, day: int, period: int, room: str):
-        new_time_slot = TimeSpaceSlot(day, period, room)
-        if new_time_slot in self.time_slots:
-            print("Critical: doubled course in time table.")
-            sys.exit(1)
-        self.time_slots.append(new_time_slot)
+        slot_mask = 1 << self.layout.get_slot_bit(day, period)
+        if self.occupancy & slot_mask:
+            diagnostics.critical("doubled-time-slot", "doubled course in time table.")
+        self.occupancy |= slot_mask
+        self.time_slots.append(TimeSpaceSlot(day, period, room))
 
     # courses without any periods are still supported but not integer in the sense of this method
-    def check_integrity(self) -> None:
-        if not 2 <= len(self.time_slots) <= 5:
-            print(f"Invalid amount of time slots for {self}")
-            sys.exit(1)
+    def check_integrity(self, min_time_slots: int = dataset.MIN_TIME_SLOTS,
+                        max_time_slots: int = dataset.MAX_TIME_SLOTS) -> None:
+        if not min_time_slots <= len(self.time_slots) <= max_time_slots:
+            diagnostics.critical("time-slot-amount", f"Invalid amount of time slots for {self}")
 
     def __repr__(self):
         return f"{self.time_table_subject} {self.teacher_abbreviation} ({self.full_label} {self.teacher}) in {', '.join([str(time_slot) for time_slot in self.time_slots])}"
 
 
+# layout of the time slots of these courses, e.g. of all courses of a student, they are all of the same school
+def get_courses_layout(courses: Iterable[Course]) -> SlotLayout:
+    return next((course.layout for course in courses), DEFAULT_LAYOUT)
+
+
 # load new courses and add time slots to existing ones
 def update_courses(course_identifiers: List[str],
                    day_idx: int, period_idx: int,
-                   courses: Dict[str, Course]) -> None:
+                   courses: Dict[str, Course], school: str = "", layout: SlotLayout = DEFAULT_LAYOUT) -> None:
     for identifier in course_identifiers:
         identifier = identifier.strip()
         if identifier == "":
@@ -67,41 +152,64 @@ def update_courses(course_identifiers: List[str],
         course_name = f"{teacher_abbreviation} {subject}"
         # search for existing course
         if course_name not in courses:
-            courses[course_name] = Course(teacher_abbreviation, subject)
-        courses[course_name].add_time_slot(day_idx, period_idx, room)
+            courses[course_name] = Course(teacher_abbreviation, subject, school, layout)
+        # in collect mode invalid time slots are skipped
+        try:
+            courses[course_name].add_time_slot(day_idx, period_idx, room)
+        except diagnostics.Invalid:
+            continue
 
 
-# load all time table files
-def load_time_table() -> Dict[str, Course]:
+# load all time table files of the school
+def load_time_table(school: Optional[dataset.School] = None) -> Dict[str, Course]:
+    school = school or dataset.School("", "files")
+    layout = get_layout(school)
     time_table_courses: Dict[str, Course] = {}
-    for day_idx in range(5):
-        file_path = f"files/time_table/{day_idx}.csv"
+    for day_idx, file_path in school.get_day_paths().items():
+        # in collect mode the days after the week are left out
+        if day_idx >= layout.days:
+            try:
+                with diagnostics.Location(file_path=file_path):
+                    diagnostics.critical("time-slot-range", f"day {day_idx} is after the {layout.days} days of the week.")
+            except diagnostics.Invalid:
+                continue
         # parse file
         with open(file_path, "r", encoding="utf-8", newline="") as csv_file:
             csv_reader = csv.reader(csv_file, delimiter=";", quotechar='"')
             for period_idx, row in enumerate(csv_reader, start=1):
-                update_courses(row, day_idx, period_idx, time_table_courses)
-    # check for too many time slots
+                with diagnostics.Location(file_path=file_path, line=period_idx):
+                    update_courses(row, day_idx, period_idx, time_table_courses, school.name, layout)
+    # check for too many time slots, in collect mode these courses are still used
     for course in time_table_courses.values():
-        course.check_integrity()
+        try:
+            course.check_integrity(school.min_time_slots, school.max_time_slots)
+        except diagnostics.Invalid:
+            continue
     # sort
     return {key: value for key, value in sorted(time_table_courses.items(), key=lambda item: item[0])}
 
 
 # key: fuzzy label, value: non fuzzy Course object
-def get_courses() -> Dict[str, Course]:
-    time_table_courses = load_time_table()
+# the files folder when no school is given
+def get_courses(school: Optional[dataset.School] = None) -> Dict[str, Course]:
+    school = school or dataset.School("", "files")
+    time_table_courses = load_time_table(school)
     courses: Dict[str, Course] = {}
-    with open("files/course_corrections.csv", "r", encoding="utf-8") as csv_file:
+    with open(school.course_corrections_path, "r", encoding="utf-8") as csv_file:
         csv_reader = csv.reader(csv_file, delimiter=";", quotechar='"')
-        for row in csv_reader:
+        for line, row in enumerate(csv_reader, start=1):
             if row[1] == "":
                 # create course without periods
                 # this wouldn't work with multiple representations in the fuzzy files of the same course
-                this_course = Course("", row[3][:-1].upper())
-            else:
+                this_course = Course("", row[3][:-1].upper(), school.name, get_layout(school))
+            elif row[1] in time_table_courses:
                 # get course from time table that corresponds with this line
                 this_course = time_table_courses[row[1]]
+            else:
+                # in collect mode the course is left out
+                with diagnostics.Location(file_path=school.course_corrections_path, line=line):
+                    diagnostics.report("unknown-course", f"Can't find '{row[1]}' of '{row[0]}' in the time table.")
+                continue
             # add new info
             this_course.teacher = row[2]
             this_course.full_label = row[3]
@@ -0,0 +1,89 @@
+"""
+render many files from the same jinja templates
+templates are compiled once per process and the compiled bytecode is cached on disk across runs
+"""
+
+from typing import Any, List, Dict, Optional, Tuple
+import os
+import time
+import concurrent.futures
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, StrictUndefined
+
+TEMPLATE_DIR = "files"
+BYTECODE_CACHE_DIR = "out/cache/jinja"
+# size of the write buffer of each output file
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+# time spent in each phase
+class Timings:
+    def __init__(self):
+        # key: phase, value: seconds
+        self.phases: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def update(self, other: "Timings") -> None:
+        for phase, seconds in other.phases.items():
+            self.add(phase, seconds)
+
+    def __repr__(self):
+        return ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases.items())
+
+
+class Renderer:
+    def __init__(self, template_dir: str = TEMPLATE_DIR, bytecode_cache_dir: Optional[str] = BYTECODE_CACHE_DIR):
+        self.template_dir = template_dir
+        self.bytecode_cache_dir = bytecode_cache_dir
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        # same settings as jinja2.Template
+        self.environment = Environment(loader=FileSystemLoader(template_dir),
+                                       bytecode_cache=bytecode_cache,
+                                       undefined=StrictUndefined)
+        self.timings = Timings()
+
+    # template name is relative to the template dir
+    def render(self, template_name: str, **variables: Any) -> str:
+        start = time.perf_counter()
+        # compiled templates are cached by the environment
+        template = self.environment.get_template(template_name)
+        loaded = time.perf_counter()
+        out = template.render(**variables)
+        self.timings.add("load", loaded - start)
+        self.timings.add("render", time.perf_counter() - loaded)
+        return out
+
+    def write(self, template_name: str, out_file: str, **variables: Any) -> None:
+        out = self.render(template_name, **variables)
+        start = time.perf_counter()
+        with open(out_file, "w+", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as file:
+            file.write(out)
+        self.timings.add("write", time.perf_counter() - start)
+
+    # render all jobs, each job is an output file and the variables for that file
+    # workers > 1 renders with a pool of threads or, when use_processes is set, processes
+    def write_batch(self, template_name: str, jobs: List[Tuple[str, Dict[str, Any]]],
+                    workers: int = 1, use_processes: bool = False) -> None:
+        if workers <= 1:
+            for out_file, variables in jobs:
+                self.write(template_name, out_file, **variables)
+            return
+        chunks = [jobs[idx::workers] for idx in range(workers)]
+        executor_class = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+        with executor_class(max_workers=workers) as executor:
+            for timings in executor.map(write_chunk, [self.template_dir] * workers,
+                                        [self.bytecode_cache_dir] * workers, [template_name] * workers, chunks):
+                self.timings.update(timings)
+
+
+# render jobs with an own renderer per worker, environments can't be sent to other processes
+# the template is still only compiled once per worker and loaded from the bytecode cache
+def write_chunk(template_dir: str, bytecode_cache_dir: Optional[str], template_name: str,
+                jobs: List[Tuple[str, Dict[str, Any]]]) -> Timings:
+    renderer = Renderer(template_dir, bytecode_cache_dir)
+    renderer.write_batch(template_name, jobs)
+    return renderer.timings
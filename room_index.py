@@ -0,0 +1,143 @@
+"""
+index the time table by room
+each cell of the index is one room in one time slot and contains all courses and the amount of students in that room
+rooms are named by their key, e.g. R101 in the files folder and north/R101 in the school north (see dataset.get_school_key)
+run with: python3 room_index.py [--csv out/rooms.csv] [--capacities capacities.csv]
+"""
+
+from typing import List, Dict, Optional, Tuple
+import argparse
+import csv
+import sys
+
+import dataset
+import read_time_table
+import sort_data
+import contact_graph
+import snapshot
+
+# cells per room, enough for the time slots of every school
+SLOTS = dataset.MAX_SLOTS
+
+
+class RoomIndex:
+    def __init__(self, students: List[sort_data.Student]):
+        # key: room key, value: room id
+        self.room_ids: Dict[str, int] = {}
+        # a student attending multiple courses in the same room at the same time is counted once
+        occupancies = [contact_graph.get_occupancy(student, self.room_ids)
+                       for student in students]
+        self.rooms = list(self.room_ids.keys())
+        # time slots of each room, like all time slots of its school
+        self.layouts = [read_time_table.DEFAULT_LAYOUT] * len(self.rooms)
+        # cell index: room id * SLOTS + slot bit (see read_time_table.SlotLayout.get_slot_bit)
+        self.cell_courses: List[List[read_time_table.Course]] = [
+            [] for _ in range(len(self.rooms) * SLOTS)]
+        self.cell_students = [0] * (len(self.rooms) * SLOTS)
+        added_courses = set()
+        for student in students:
+            for course in student.get_all_courses():
+                if id(course) in added_courses:
+                    continue
+                added_courses.add(id(course))
+                for time_slot in course.time_slots:
+                    room = dataset.get_school_key(course.school, time_slot.room)
+                    self.layouts[self.room_ids[room]] = course.layout
+                    self.cell_courses[self.get_cell_idx(room, time_slot.day, time_slot.period)].append(course)
+        for occupancy in occupancies:
+            for room_id, mask in occupancy.items():
+                while mask:
+                    lowest = mask & -mask
+                    self.cell_students[room_id * SLOTS + lowest.bit_length() - 1] += 1
+                    mask ^= lowest
+
+    # layout of the school of the room, the default layout for unknown rooms
+    def get_layout(self, room: str) -> read_time_table.SlotLayout:
+        return self.layouts[self.room_ids[room]] if room in self.room_ids else read_time_table.DEFAULT_LAYOUT
+
+    def get_cell_idx(self, room: str, day: int, period: int) -> int:
+        return self.room_ids[room] * SLOTS + self.get_layout(room).get_slot_bit(day, period)
+
+    # all courses in this room at this time, empty for unknown rooms and time slots
+    def get_courses(self, room: str, day: int, period: int) -> List[read_time_table.Course]:
+        if room not in self.room_ids or not self.get_layout(room).has_slot(day, period):
+            return []
+        return self.cell_courses[self.get_cell_idx(room, day, period)]
+
+    # amount of students in this room at this time
+    def get_headcount(self, room: str, day: int, period: int) -> int:
+        if room not in self.room_ids or not self.get_layout(room).has_slot(day, period):
+            return 0
+        return self.cell_students[self.get_cell_idx(room, day, period)]
+
+    # highest headcount of this room with its day and period, only taking the given period of each day into account when given
+    # unknown rooms are empty, their peak is the first time slot with a headcount of 0
+    def get_peak(self, room: str, period: Optional[int] = None) -> Tuple[int, int, int]:
+        layout = self.get_layout(room)
+        slot_bits = range(layout.slots) if period is None else \
+            [layout.get_slot_bit(day, period) for day in range(layout.days)]
+        if room not in self.room_ids:
+            return (0, *layout.get_slot(slot_bits[0]))
+        start = self.room_ids[room] * SLOTS
+        slot_bit = max(slot_bits, key=lambda slot_bit: self.cell_students[start + slot_bit])
+        return (self.cell_students[start + slot_bit], *layout.get_slot(slot_bit))
+
+    # key: room, value: highest headcount, day and period
+    def get_peaks(self) -> Dict[str, Tuple[int, int, int]]:
+        return {room: self.get_peak(room) for room in self.rooms}
+
+    # all cells with more students than the capacity of the room, rooms without a capacity are ignored
+    def get_over_capacity(self, capacities: Dict[str, int]) -> List[Tuple[str, int, int, int]]:
+        over_capacity: List[Tuple[str, int, int, int]] = []
+        for room, capacity in capacities.items():
+            if room not in self.room_ids:
+                continue
+            layout = self.get_layout(room)
+            for slot_bit in range(layout.slots):
+                headcount = self.cell_students[self.room_ids[room] * SLOTS + slot_bit]
+                if headcount > capacity:
+                    over_capacity.append((room, *layout.get_slot(slot_bit), headcount))
+        return over_capacity
+
+    # one row per used cell: room, day, period, headcount and the time table subjects of all courses
+    def write_csv(self, file_path: str) -> None:
+        with open(file_path, "w+", encoding="utf-8", newline="") as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=";", quotechar='"')
+            for room_id, room in enumerate(self.rooms):
+                for slot_bit in range(self.layouts[room_id].slots):
+                    courses = self.cell_courses[room_id * SLOTS + slot_bit]
+                    if len(courses) == 0:
+                        continue
+                    csv_writer.writerow([room, *self.layouts[room_id].get_slot(slot_bit),
+                                         self.cell_students[room_id * SLOTS + slot_bit],
+                                         " ".join(f"{course.teacher_abbreviation} {course.time_table_subject}"
+                                                  for course in courses)])
+
+
+# key: room key, value: maximum amount of students
+def load_capacities(file_path: str) -> Dict[str, int]:
+    capacities: Dict[str, int] = {}
+    with open(file_path, "r", encoding="utf-8", newline="") as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter=";", quotechar='"')
+        for row in csv_reader:
+            if not row[1].strip().isdigit():
+                print(f"Critical: invalid capacity for room {row[0]}.")
+                sys.exit(1)
+            capacities[row[0]] = int(row[1])
+    return capacities
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=None, help="write all occupied cells to this file")
+    parser.add_argument("--capacities", default=None,
+                        help="csv file with room key and maximum amount of students per line")
+    args = parser.parse_args()
+    index = RoomIndex(list(snapshot.get_students(snapshot.SNAPSHOT_PATH).values()))
+    for room, (headcount, day, period) in sorted(index.get_peaks().items(), key=lambda item: -item[1][0]):
+        print(f"{room}: at most {headcount} students at {read_time_table.get_day_name(day)} {period}. period")
+    if args.csv is not None:
+        index.write_csv(args.csv)
+    if args.capacities is not None:
+        for room, day, period, headcount in index.get_over_capacity(load_capacities(args.capacities)):
+            print(f"Warning: {headcount} students in {room} at {read_time_table.get_day_name(day)} {period}. period exceed its capacity")
@@ -0,0 +1,132 @@
+"""
+store the resolved students and courses in a binary snapshot and load them again without parsing and matching
+courses are stored once and referenced by index, students only contain these indices
+a snapshot is stale when any input file changed since it has been written
+"""
+
+from typing import Any, Collection, List, Dict, Optional, Tuple, cast
+import os
+import pickle
+import struct
+
+import dataset
+import read_time_table
+import sort_data
+import incremental_build
+import profiler
+
+SNAPSHOT_PATH = "out/cache/students.snapshot"
+MAGIC = b"STUDSNAP"
+# increase when the stored layout changes
+VERSION = 3
+# magic and version
+HEADER = struct.Struct(f">{len(MAGIC)}sH")
+
+
+# store each course once, key: id of course object, value: index in courses
+def intern_course(course: read_time_table.Course, course_idxs: Dict[int, int], courses: List[Tuple]) -> int:
+    if id(course) not in course_idxs:
+        course_idxs[id(course)] = len(courses)
+        courses.append((course.teacher_abbreviation, course.time_table_subject, course.school, course.full_label,
+                        course.teacher, course.layout.days, course.layout.periods_per_day,
+                        tuple((time_slot.day, time_slot.period, time_slot.room) for time_slot in course.time_slots)))
+    return course_idxs[id(course)]
+
+
+def dump_student(student: sort_data.Student, course_idxs: Dict[int, int], courses: List[Tuple]) -> Tuple:
+    return (student.name, student.group, student.school, student.fuzzy_names, student.fuzzy_tutor_abbreviations, student.file_paths,
+            [(file_course.name, file_course.abbreviation, file_course.teacher, file_course.p_level)
+             for file_course in student.file_courses],
+            [intern_course(course, course_idxs, courses)
+             for course in student.cover_courses],
+            # resolved students have a course for every p-level
+            [intern_course(cast(read_time_table.Course, student.p_courses[p_level]), course_idxs, courses)
+             for p_level in range(1, 6)],
+            student.tutor, student.tutor_abbreviation, student.amount_courses, student.weekly_periods)
+
+
+def load_course(stored: Tuple) -> read_time_table.Course:
+    teacher_abbreviation, time_table_subject, school, full_label, teacher, days, periods_per_day, time_slots = stored
+    course = read_time_table.Course(teacher_abbreviation, time_table_subject, school,
+                                    read_time_table.SlotLayout(days, periods_per_day))
+    course.full_label = full_label
+    course.teacher = teacher
+    for day, period, room in time_slots:
+        course.add_time_slot(day, period, room)
+    return course
+
+
+def load_student(stored: Tuple, courses: List[read_time_table.Course]) -> sort_data.Student:
+    (name, group, school, fuzzy_names, fuzzy_tutor_abbreviations, file_paths, file_courses, cover_course_idxs,
+     p_course_idxs, tutor, tutor_abbreviation, amount_courses, weekly_periods) = stored
+    student = sort_data.Student(name, group, school)
+    student.fuzzy_names = fuzzy_names
+    student.fuzzy_tutor_abbreviations = fuzzy_tutor_abbreviations
+    student.file_paths = file_paths
+    student.file_courses = [sort_data.FileCourse(*file_course)
+                            for file_course in file_courses]
+    # already sorted and checked when the snapshot was written
+    for file_course in student.file_courses:
+        if file_course.p_level == 0:
+            student.cover_file_courses.append(file_course)
+        else:
+            student.p_file_courses[file_course.p_level] = file_course
+    student.cover_courses = [courses[idx] for idx in cover_course_idxs]
+    for p_level, idx in enumerate(p_course_idxs, start=1):
+        student.p_courses[p_level] = courses[idx]
+    student.tutor = tutor
+    student.tutor_abbreviation = tutor_abbreviation
+    student.amount_courses = amount_courses
+    student.weekly_periods = weekly_periods
+    return student
+
+
+# input_hashes are the hashes of the inputs the students have been resolved from
+def save(file_path: str, students: Dict[str, sort_data.Student], input_hashes: Dict[str, str]) -> None:
+    course_idxs: Dict[int, int] = {}
+    courses: List[Tuple] = []
+    stored_students = [dump_student(student, course_idxs, courses)
+                       for student in students.values()]
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION))
+        pickle.dump((input_hashes, courses, stored_students),
+                    file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# key: see dataset.get_student_key, value: Student object
+# None when there is no usable snapshot or it is older than the given input hashes, ignored paths aren't compared
+def load(file_path: str, input_hashes: Optional[Dict[str, str]] = None,
+         ignored_paths: Collection[str] = ()) -> Optional[Dict[str, sort_data.Student]]:
+    if not os.path.isfile(file_path):
+        return None
+    with open(file_path, "rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) != HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION):
+            print(f"Warning: ignoring snapshot {file_path} with unknown format")
+            return None
+        stored: Tuple[Dict[str, str], List[Tuple], List[Tuple]] = pickle.load(file)
+    stored_hashes, stored_courses, stored_students = stored
+    if input_hashes is not None and \
+            {input_path: input_hash for input_path, input_hash in stored_hashes.items() if input_path not in ignored_paths} != \
+            {input_path: input_hash for input_path, input_hash in input_hashes.items() if input_path not in ignored_paths}:
+        return None
+    courses = [load_course(stored_course) for stored_course in stored_courses]
+    students = [load_student(stored_student, courses)
+                for stored_student in stored_students]
+    return {dataset.get_student_key(student.school, student.name): student for student in students}
+
+
+# load students from the snapshot when it is up to date, otherwise resolve them and write a new snapshot
+# all keyword arguments are passed to sort_data.get_students
+def get_students(file_path: str, **kwargs: Any) -> Dict[str, sort_data.Student]:
+    with profiler.stage("hash inputs"):
+        input_hashes = incremental_build.get_input_hashes(
+            sort_data.get_page_paths())
+    with profiler.stage("load snapshot"):
+        students = load(file_path, input_hashes)
+    if students is None:
+        students = sort_data.get_students(**kwargs)
+        with profiler.stage("save snapshot"):
+            save(file_path, students, input_hashes)
+    return students
@@ -1,11 +1,22 @@
 #!/urs/bin/env python
 from typing import ValuesView, cast, List, Dict, Tuple, Union, Optional, Set
-import sys
+import os
 import csv
-from fuzzywuzzy import fuzz, process
-
+import json
+import hashlib
+import concurrent.futures
+import itertools
+import heapq
+import bisect
+import collections
+from fuzzywuzzy import fuzz, process, utils
+
+import dataset
 import read_course_file
 import read_time_table
+import incremental_build
+import profiler
+import diagnostics
 
 
 # representing a single course from a file
@@ -27,13 +38,17 @@ class FileCourse:
 # represent student with references to courses
 # contains non-fuzzy info
 class Student:
-    def __init__(self, name: str, group: str):
+    def __init__(self, name: str, group: str, school: str = ""):
         self.name = name
         # A or B
         self.group = group
+        # see dataset.School.name
+        self.school = school
         self.fuzzy_names: List[str] = []
         self.fuzzy_tutor_abbreviations: List[str] = []
         self.file_courses: List[FileCourse] = []
+        # paths of all files containing this student
+        self.file_paths: List[str] = []
         # p_level == 0
         self.cover_file_courses: List[FileCourse] = []
         # sorted by p-level
@@ -67,6 +82,7 @@ class Student:
         return courses
 
     def sort_courses(self) -> None:
+        valid = True
         self.file_courses.sort(key=lambda course: course.p_level)
         # sort courses
         for course in self.file_courses:
@@ -77,19 +93,23 @@ class Student:
             else:
                 # when this spot is already taken, something is wrong
                 if self.p_file_courses[course.p_level] is not None:
-                    print(f"Critical: Doubling p_level for {self}")
-                    sys.exit(1)
+                    diagnostics.report("doubled-p-level", f"Doubling p_level for {self}")
+                    valid = False
+                    continue
                 self.p_file_courses[course.p_level] = course
 
         # check for missing courses
         if not 3 <= len(self.cover_file_courses) <= 7:
-            print(f"Critical: Amount of cover courses is invalid for {self}")
-            sys.exit(1)
+            diagnostics.report("cover-courses", f"Amount of cover courses is invalid for {self}")
+            valid = False
         for p_level in self.p_file_courses:
             if self.p_file_courses[p_level] is None:
-                print(f"Critical: Can't find P{p_level} for {self}")
-                sys.exit(1)
+                diagnostics.report("missing-p-level", f"Can't find P{p_level} for {self}")
+                valid = False
+        if not valid:
+            raise diagnostics.Invalid()
 
+    # course_table.CourseTable.get_weekly_periods does the same for all students at once
     def count_stuff(self) -> None:
         self.amount_courses = 0
         self.weekly_periods = 0
@@ -104,25 +124,20 @@ class Student:
         return f"{self.name} tutor: {', '.join(self.fuzzy_tutor_abbreviations)} group: {self.group} courses:\n" + "\n".join([str(course) for course in self.file_courses])
 
 
-# print each warning only once
-printed_warnings: List[str] = []
-
-
-def print_warning(warning: str) -> None:
-    global print_warning
-    if warning not in printed_warnings:
-        printed_warnings.append(warning)
-        print(warning)
+# print each warning only once, the warnings of fuzzy matching are also stored in the match cache
+# rule: see diagnostics.Diagnostic
+def print_warning(warning: str, rule: str = "fuzzy-match") -> None:
+    diagnostics.warning(rule, warning[len("Warning: "):] if warning.startswith("Warning: ") else warning)
 
 
 # get template objects for students
 # key: non-fuzzy student name, value: Student object
-def get_student_templates() -> Dict[str, Student]:
+def get_student_templates(file_path: str = "files/students.csv", school: str = "") -> Dict[str, Student]:
     students: Dict[str, Student] = {}
-    with open("files/students.csv", "r", newline="", encoding="utf-8") as csv_file:
+    with open(file_path, "r", newline="", encoding="utf-8") as csv_file:
         csv_reader = csv.reader(csv_file, delimiter=";", quotechar='"')
         for row in csv_reader:
-            students[row[1]] = (Student(row[1], row[0]))
+            students[row[1]] = (Student(row[1], row[0], school))
     return students
 
 
@@ -132,53 +147,279 @@ def get_match(query: str, collection: List[str]) -> str:
     if collection.count(query) == 1:
         return query
     if collection.count(query) > 1:
-        print(f"Critical: '{query} existent in collection more than once.")
-        sys.exit(1)
-    matches = process.extract(query, collection, limit=2)
+        diagnostics.critical("duplicate", f"'{query} existent in collection more than once.")
+    profiler.count("fuzzy comparisons", len(collection))
+    return pick_match(query, process.extract(query, collection, limit=2))
+
+
+# choose between the two best fuzzy matches
+# all printed warnings are added to warnings
+def pick_match(query: str, matches: List[Tuple[str, int]], warnings: Optional[List[str]] = None) -> str:
+    if warnings is None:
+        warnings = []
     best_matches = [match for match in matches if match[1] >= 80]
 
     # perform post processing and checks
     if len(best_matches) > 1:
-        print_warning(
+        warnings.append(
             f"Warning: multiple matches for '{query}': {best_matches}")
+        print_warning(warnings[-1])
 
     if len(best_matches) == 0:
-        print(
-            f"Critical: Can't find sufficient match for '{query}': {matches}")
-        sys.exit(1)
+        diagnostics.critical(
+            "no-match", f"Can't find sufficient match for '{query}': {matches}")
 
     if abs(matches[0][1] - matches[1][1]) < 5:
         # calculate token set ratio for each match
         set_matches: List[Tuple[str, int, int]] = [
             (match[0], match[1], fuzz.token_set_ratio(query, match[0])) for match in matches]
-        print_warning(
+        warnings.append(
             f"Warning: using token set ratio to determine best match for '{query}': {set_matches}")
+        print_warning(warnings[-1])
         best_match = sorted(
             set_matches, key=lambda match: match[2], reverse=True)[0]
         if abs(set_matches[0][2] - set_matches[1][2]) < 5 or best_match[2] < 80:
-            print("Critical: Can't determine best match with token set ratio.")
-            sys.exit(1)
-    else:
-        best_match = best_matches[0]
-    return best_match[0]
-
-
-# add course date to all students from one file
-def load_students(file: read_course_file.File, student_templates: Dict[str, Student]) -> Dict[str, Student]:
+            diagnostics.critical("ambiguous-match", "Can't determine best match with token set ratio.")
+        return best_match[0]
+    return best_matches[0][0]
+
+
+def get_trigrams(string: str) -> Set[str]:
+    padded = f"  {utils.full_process(string, force_ascii=True)} "
+    return {padded[idx:idx + 3] for idx in range(len(padded) - 2)}
+
+
+# the forms of a string fuzz.WRatio compares, processed like process.extract does, see get_score_bound
+class ScoreForms:
+    def __init__(self, processed: str):
+        self.processed = processed
+        tokens = processed.split()
+        self.tokens = set(tokens)
+        # the token sort and token set forms only differ from the processed string in the order of the tokens,
+        # in single spaces between them and in repeated tokens
+        self.sorted_length = len(" ".join(tokens))
+        self.set_length = len(" ".join(self.tokens))
+        self.spaces = processed.count(" ")
+        self.sorted_spaces = max(len(tokens) - 1, 0)
+        self.set_spaces = max(len(self.tokens) - 1, 0)
+        # key: character but space, value: amount of occurrences
+        self.counts = collections.Counter(processed.replace(" ", ""))
+        self.set_counts = self.counts if len(self.tokens) == len(tokens) else \
+            collections.Counter("".join(self.tokens))
+
+
+def get_query_forms(query: str) -> ScoreForms:
+    return ScoreForms(utils.full_process(utils.full_process(query), force_ascii=True))
+
+
+def get_entry_forms(entry: str) -> ScoreForms:
+    return ScoreForms(utils.full_process(entry, force_ascii=True))
+
+
+# amount of characters both strings could have in common
+def get_overlap(counts: Dict[str, int], other_counts: Dict[str, int]) -> int:
+    if len(counts) > len(other_counts):
+        counts, other_counts = other_counts, counts
+    return sum(min(amount, other_counts.get(character, 0)) for character, amount in counts.items())
+
+
+# upper bound of fuzz.ratio before rounding, at most overlap characters can be matched
+def get_ratio_bound(overlap: int, length: int, other_length: int) -> float:
+    return 2.0 * overlap / (length + other_length)
+
+
+# upper bound of fuzz.partial_ratio before rounding
+# the shorter string is compared with substrings of the longer one of at most the same length
+def get_partial_bound(overlap: int, length: int, other_length: int) -> float:
+    shorter = min(length, other_length)
+    overlap = min(overlap, shorter)
+    if overlap == 0:
+        return 0.0
+    bound = 2.0 * overlap / (shorter + overlap)
+    return 1.0 if bound > .995 else bound
+
+
+# score fuzz.WRatio gives the query and the entry at most, computed from character counts without aligning them
+# follows the steps of fuzz.WRatio, every step is replaced by an upper bound
+def get_score_bound(query: ScoreForms, entry: ScoreForms) -> int:
+    length, other_length = len(query.processed), len(entry.processed)
+    if length == 0 or other_length == 0:
+        return 0
+    overlap = get_overlap(query.counts, entry.counts)
+    set_overlap = overlap if query.set_counts is query.counts and entry.set_counts is entry.counts else \
+        get_overlap(query.set_counts, entry.set_counts)
+    overlap_forms = [(overlap + min(query.spaces, entry.spaces), length, other_length),
+                     (overlap + min(query.sorted_spaces, entry.sorted_spaces),
+                      query.sorted_length, entry.sorted_length),
+                     (set_overlap + min(query.set_spaces, entry.set_spaces), query.set_length, entry.set_length)]
+    # length of the sorted tokens both strings contain, joined by spaces
+    intersection = query.tokens & entry.tokens
+    intersection_length = sum(len(token) + 1 for token in intersection) - 1
+
+    base = utils.intr(100 * get_ratio_bound(*overlap_forms[0]))
+    len_ratio = float(max(length, other_length)) / min(length, other_length)
+    if len_ratio < 1.5:
+        tsor = utils.intr(100 * get_ratio_bound(*overlap_forms[1])) * .95
+        set_bound = get_ratio_bound(*overlap_forms[2])
+        if len(intersection) != 0:
+            # the intersection is the beginning of both token set forms
+            set_bound = max(set_bound,
+                            2.0 * intersection_length / (intersection_length + query.set_length),
+                            2.0 * intersection_length / (intersection_length + entry.set_length))
+        tser = utils.intr(100 * set_bound) * .95
+        return utils.intr(max(base, tsor, tser))
+    partial_scale = .6 if len_ratio > 8 else .90
+    partial = utils.intr(100 * get_partial_bound(*overlap_forms[0])) * partial_scale
+    ptsor = utils.intr(100 * get_partial_bound(*overlap_forms[1])) * .95 * partial_scale
+    # the intersection is a substring of both token set forms
+    ptser = (100 if len(intersection) != 0 else utils.intr(100 * get_partial_bound(*overlap_forms[2]))) * \
+        .95 * partial_scale
+    return utils.intr(max(base, partial, ptsor, ptser))
+
+
+MATCH_CACHE_PATH = "out/cache/match_cache.json"
+
+
+# decisions of fuzzy matches stored on disk across runs
+# decisions are grouped by a hash of the collection, changing the collection invalidates them
+class MatchCache:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        # key: collection hash, value: key: query, value: match and printed warnings
+        self.stored: Dict[str, Dict[str, List]] = {}
+        if os.path.isfile(file_path):
+            with open(file_path, "r", encoding="utf-8") as file:
+                self.stored = json.load(file)
+        # only used collections are saved again
+        self.used: Dict[str, Dict[str, List]] = {}
+
+    def get(self, collection_hash: str, query: str) -> Optional[Tuple[str, List[str]]]:
+        decision = self.stored.get(collection_hash, {}).get(query)
+        if decision is None:
+            return None
+        self.put(collection_hash, query, decision[0], decision[1])
+        return decision[0], decision[1]
+
+    def put(self, collection_hash: str, query: str, match: str, warnings: List[str]) -> None:
+        self.used.setdefault(collection_hash, {})[query] = [match, warnings]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "w+", encoding="utf-8") as file:
+            json.dump(self.used, file, ensure_ascii=False)
+
+
+# same as get_match but prebuilt for one collection
+# exact matches are looked up in a hash map,
+# fuzzy matching only scores a shortlist of entries sharing the most trigrams with the query
+# entries outside the shortlist are only scored when their score bound can change the decision or its warnings,
+# see get_score_bound
+# fuzzy decisions are taken from the cache when possible
+class Matcher:
+    def __init__(self, collection: List[str], shortlist_size: int = 20, cache: Optional[MatchCache] = None):
+        self.collection = collection
+        self.shortlist_size = shortlist_size
+        self.cache = cache
+        self.collection_hash = hashlib.sha256(
+            "\n".join(collection).encode("utf-8")).hexdigest()
+        # key: entry, value: amount of occurrences in collection
+        self.counts: Dict[str, int] = {}
+        # key: trigram, value: indices of all entries containing it
+        self.trigram_index: Dict[str, List[int]] = {}
+        for idx, entry in enumerate(collection):
+            self.counts[entry] = self.counts.get(entry, 0) + 1
+            for trigram in get_trigrams(entry):
+                self.trigram_index.setdefault(trigram, []).append(idx)
+        self.forms = [get_entry_forms(entry) for entry in collection]
+
+    # indices of the entries sharing the most trigrams with the query, ascending
+    def get_shortlist(self, query: str, size: int) -> List[int]:
+        shared: Dict[int, int] = {}
+        for trigram in get_trigrams(query):
+            for idx in self.trigram_index.get(trigram, []):
+                shared[idx] = shared.get(idx, 0) + 1
+        best_idxs = heapq.nsmallest(
+            size, shared, key=lambda idx: (-shared[idx], idx))
+        return sorted(best_idxs)
+
+    def match(self, query: str) -> str:
+        # perfect match
+        if self.counts.get(query, 0) == 1:
+            return query
+        if self.counts.get(query, 0) > 1:
+            diagnostics.critical("duplicate", f"'{query} existent in collection more than once.")
+        if self.cache is not None:
+            decision = self.cache.get(self.collection_hash, query)
+            if decision is not None:
+                profiler.count("match cache hits")
+                for warning in decision[1]:
+                    print_warning(warning)
+                return decision[0]
+        warnings: List[str] = []
+        match = pick_match(query, self.get_matches(query), warnings)
+        if self.cache is not None:
+            self.cache.put(self.collection_hash, query, match, warnings)
+        return match
+
+    # two best matches, same as process.extract on the whole collection
+    # the shortlist is scored first, then all other entries by their score bound until none of them can matter:
+    # either it can't reach the second best match, so the two best matches are found,
+    # or the decision is clear and it can't score 80 or within 5 of the best match,
+    # so pick_match would neither warn about it nor find the match ambiguous
+    def get_matches(self, query: str) -> List[Tuple[str, int]]:
+        query_forms = get_query_forms(query)
+        if query_forms.processed == "" or len(self.collection) <= self.shortlist_size:
+            profiler.count("fuzzy comparisons", len(self.collection))
+            return process.extract(query, self.collection, limit=2)
+        # score and index of all scored entries, best first, ties in collection order like process.extract
+        scored: List[Tuple[int, int]] = []
+        scored_idxs: Set[int] = set()
+
+        def add_score(idx: int) -> None:
+            score = fuzz.WRatio(query_forms.processed, self.forms[idx].processed, full_process=False)
+            bisect.insort(scored, (-score, idx))
+            scored_idxs.add(idx)
+
+        for idx in self.get_shortlist(query, self.shortlist_size):
+            add_score(idx)
+        bounds = [get_score_bound(query_forms, forms) for forms in self.forms]
+        for idx in sorted(range(len(bounds)), key=lambda idx: -bounds[idx]):
+            if idx in scored_idxs:
+                continue
+            best, second = -scored[0][0], -scored[1][0]
+            bound = bounds[idx]
+            if bound < second or (best >= 80 and best - second >= 5 and bound < 80 and bound <= best - 5):
+                break
+            add_score(idx)
+        profiler.count("fuzzy comparisons", len(scored))
+        return [(self.collection[idx], -score) for score, idx in scored[:2]]
+
+
+# non-fuzzy name of each student line of the file
+# in collect mode student lines without a clear match are None
+def match_students(file: read_course_file.File, student_templates: Dict[str, Student],
+                   matcher: Matcher) -> List[Optional[str]]:
+    matches: List[Optional[str]] = []
     for student in file.students:
-        match = get_match(student.name, list(student_templates.keys()))
-        # store data
-        student_templates[match].file_courses.append(
-            FileCourse(file.course_name, file.course_abbreviation, file.teacher, student.p_level))
-        student_templates[match].fuzzy_tutor_abbreviations.append(
-            student.tutor_abbreviation)
-        student_templates[match].fuzzy_names.append(student.name)
-        # check group
-        if student_templates[match].group != file.group:
-            print(f"Critical: Group mismatch found for {student}.")
-            sys.exit(1)
-
-    return student_templates
+        with diagnostics.Location(file_path=file.file_path, line=student.line, student=student.name):
+            try:
+                match = matcher.match(student.name)
+                # check group
+                if student_templates[match].group != file.group:
+                    diagnostics.critical("group-mismatch", f"Group mismatch found for {student}.")
+            except diagnostics.Invalid:
+                match = None
+        matches.append(match)
+    return matches
+
+
+# store the course of the file and the fuzzy data of the student line
+def add_file_student(template: Student, file: read_course_file.File, student: read_course_file.Student) -> None:
+    template.file_courses.append(
+        FileCourse(file.course_name, file.course_abbreviation, file.teacher, student.p_level))
+    template.fuzzy_tutor_abbreviations.append(student.tutor_abbreviation)
+    template.fuzzy_names.append(student.name)
+    template.file_paths.append(file.file_path)
 
 
 # key: teacher abbreviation, value: full teacher name
@@ -221,53 +462,230 @@ def get_fuzzy_tutor(string: str) -> str:
     return string
 
 
-# key: non-fuzzy student name, value: Student object
-def get_students() -> Dict[str, Student]:
-    # load files
-    replacements = read_course_file.get_replacements()
-    students = get_student_templates()
-    for i in range(1, 63):
-        # A
-        file_path = f"files/12_A/pg_{f'000{i}'[-4:]}.txt"
-        file = read_course_file.parse_file(file_path, replacements)
-        students = load_students(file, students)
-        # B
-        file_path = f"files/12_B/pg_{f'000{i}'[-4:]}.txt"
-        file = read_course_file.parse_file(file_path, replacements)
-        students = load_students(file, students)
-
-    # load time table
-    courses = read_time_table.get_courses()
+# all course list files of all schools in processing order
+def get_page_paths() -> List[str]:
+    return [file_path for school in dataset.get_schools() for file_path in school.get_page_paths()]
+
+
+# parse files with a pool of worker processes when workers > 1
+# unchanged files are taken from the page cache when given
+# the files are returned in the same order as the paths
+def parse_files(file_paths: List[str], replacer: read_course_file.Replacer, workers: int = 1,
+                page_cache: Optional[incremental_build.PageCache] = None) -> List[read_course_file.File]:
+    if page_cache is not None:
+        files = {file_path: page_cache.get(file_path)
+                 for file_path in file_paths}
+        missing_paths = [file_path for file_path,
+                         file in files.items() if file is None]
+        for file in parse_files(missing_paths, replacer, workers):
+            files[file.file_path] = file
+            page_cache.put(file.file_path, file)
+        # pages skipped in collect mode stay None
+        return [file for file in files.values() if file is not None]
+    if diagnostics.collecting:
+        return parse_files_collecting(file_paths, replacer, workers)
+    if workers <= 1:
+        return [read_course_file.parse_file(file_path, replacer) for file_path in file_paths]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_course_file.parse_file, file_paths, itertools.repeat(replacer),
+                                 chunksize=max(1, len(file_paths) // (workers * 4))))
+
+
+# same as parse_files in collect mode, pages with critical problems are left out
+# diagnostics of worker processes are sent back with their files
+def parse_files_collecting(file_paths: List[str], replacer: read_course_file.Replacer,
+                           workers: int = 1) -> List[read_course_file.File]:
+    if workers <= 1:
+        results = [diagnostics.collect_call(read_course_file.parse_file, file_path, replacer)
+                   for file_path in file_paths]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(diagnostics.collect_call, itertools.repeat(read_course_file.parse_file),
+                                        file_paths, itertools.repeat(replacer),
+                                        chunksize=max(1, len(file_paths) // (workers * 4))))
+    files: List[read_course_file.File] = []
+    for file, file_diagnostics in results:
+        diagnostics.merge(file_diagnostics)
+        if file is not None:
+            files.append(file)
+    return files
+
+
+# key: file path, value: keys of all students in that file
+def get_page_students(students: Dict[str, Student]) -> Dict[str, List[str]]:
+    page_students: Dict[str, List[str]] = {}
+    for key, student in students.items():
+        for file_path in dict.fromkeys(student.file_paths):
+            page_students.setdefault(file_path, []).append(key)
+    return page_students
+
+
+# match the student lines of a cohort against the students of the cohort
+# returns the matches of each file and the used decisions of the match cache
+def match_cohort(files: List[read_course_file.File], student_templates: Dict[str, Student],
+                 match_cache: Optional[MatchCache] = None) -> Tuple[List[List[Optional[str]]], Dict[str, Dict[str, List]]]:
+    matcher = Matcher(list(student_templates.keys()), cache=match_cache)
+    matches = [match_students(file, student_templates, matcher) for file in files]
+    return matches, match_cache.used if match_cache is not None else {}
+
+
+# each cohort is a shard with its own students, so every student line is only compared with the students of its cohort
+# shards are matched by a pool of worker processes when workers > 1
+# key: non-fuzzy student name, value: Student object, per cohort
+def match_cohorts(school: dataset.School, files: List[read_course_file.File], workers: int = 1,
+                  match_cache: Optional[MatchCache] = None) -> List[Dict[str, Student]]:
+    cohort_idxs = {file_path: idx for idx, cohort in enumerate(school.cohorts) for file_path in cohort.page_paths}
+    cohort_files: List[List[read_course_file.File]] = [[] for _ in school.cohorts]
+    for file in files:
+        cohort_files[cohort_idxs[file.file_path]].append(file)
+    shards = [get_student_templates(cohort.students_path, school.name) for cohort in school.cohorts]
+    results: List[Tuple[Tuple[List[List[Optional[str]]], Dict[str, Dict[str, List]]], List[diagnostics.Diagnostic]]]
+    if workers <= 1 or len(shards) <= 1:
+        if diagnostics.collecting:
+            results = [diagnostics.collect_call(match_cohort, files, student_templates, match_cache)
+                       for files, student_templates in zip(cohort_files, shards)]
+        else:
+            results = [(match_cohort(files, student_templates, match_cache), [])
+                       for files, student_templates in zip(cohort_files, shards)]
+    else:
+        # the used decisions of the match cache are sent back with the matches
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+            if diagnostics.collecting:
+                results = list(executor.map(diagnostics.collect_call, itertools.repeat(match_cohort),
+                                            cohort_files, shards, itertools.repeat(match_cache)))
+            else:
+                results = [(result, []) for result in executor.map(
+                    match_cohort, cohort_files, shards, itertools.repeat(match_cache))]
+    for files, student_templates, ((matches, used), cohort_diagnostics) in zip(cohort_files, shards, results):
+        diagnostics.merge(cohort_diagnostics)
+        if match_cache is not None:
+            for collection_hash, decisions in used.items():
+                match_cache.used.setdefault(collection_hash, {}).update(decisions)
+        for file, file_matches in zip(files, matches):
+            for student, match in zip(file.students, file_matches):
+                if match is not None:
+                    add_file_student(student_templates[match], file, student)
+    return shards
+
+
+# key: non-fuzzy student name, value: Student object, for all cohorts of the school
+def get_school_students(school: dataset.School, replacer: read_course_file.Replacer, workers: int = 1,
+                        match_cache: Optional[MatchCache] = None,
+                        page_cache: Optional[incremental_build.PageCache] = None) -> Dict[str, Student]:
+    # the pages of all cohorts are parsed by the same pool
+    with profiler.stage("parse pages"):
+        files = parse_files(school.get_page_paths(), replacer, workers, page_cache)
+    with profiler.stage("match students"):
+        shards = match_cohorts(school, files, workers, match_cache)
+
+    # load time table, shared by all cohorts
+    with profiler.stage("load time table"):
+        courses = read_time_table.get_courses(school)
     teachers = get_teachers(list(courses.values()))
+    tutor_matcher = Matcher(list(teachers.keys()), cache=match_cache)
 
     # sort data for each student
-    for student in students.values():
-        student.sort_courses()
-        # add updated, non-fuzzy courses
-        for p, p_file_course in student.p_file_courses.items():
-            student.p_courses[p] = courses[cast(
-                "FileCourse", p_file_course).fuzzy_label]
-        for cover_file_course in student.cover_file_courses:
-            student.cover_courses.append(
-                courses[cover_file_course.fuzzy_label])
-        # add tutor
-        found_tutor_abbreviations: List[str] = []
-        for fuzzy_tutor_abbreviation in student.fuzzy_tutor_abbreviations:
-            fuzzy_tutor_abbreviation = get_fuzzy_tutor(
-                fuzzy_tutor_abbreviation)
-            found_tutor_abbreviations.append(
-                get_match(fuzzy_tutor_abbreviation, list(teachers.keys())))
-
-        # get tutor with most matches
-        found_tutor_abbreviations.sort()
-        student.tutor_abbreviation = max(
-            set(found_tutor_abbreviations), key=found_tutor_abbreviations.count)
-        student.tutor = teachers[student.tutor_abbreviation]
-
-        if found_tutor_abbreviations.count(student.tutor_abbreviation) != len(found_tutor_abbreviations):
-            print(
-                f"Warning: not all found tutors are being used {found_tutor_abbreviations} (using {student.tutor_abbreviation})")
-        # count stuff
-        student.count_stuff()
+    with profiler.stage("resolve students"):
+        return resolve_shards(shards, courses, teachers, tutor_matcher)
 
+
+# resolve the students of all cohorts of a school, see resolve_students
+# key: non-fuzzy student name, value: Student object
+def resolve_shards(shards: List[Dict[str, Student]], courses: Dict[str, read_time_table.Course],
+                   teachers: Dict[str, str], tutor_matcher: Matcher) -> Dict[str, Student]:
+    students: Dict[str, Student] = {}
+    for shard in shards:
+        resolve_students(shard, courses, teachers, tutor_matcher)
+        for name, student in shard.items():
+            if name in students:
+                with diagnostics.Location(student=name):
+                    diagnostics.report("duplicate", f"'{name}' is a student of more than one cohort.")
+                continue
+            students[name] = student
     return students
+
+
+# key: see dataset.get_student_key, value: Student object
+# all schools of the manifest, or the files folder without one, when no schools are given
+# decisions of fuzzy matches are cached in match_cache_path when given
+# parsed files are cached in page_cache_path when given
+def get_students(workers: int = 1, match_cache_path: Optional[str] = None,
+                 page_cache_path: Optional[str] = None,
+                 schools: Optional[List[dataset.School]] = None) -> Dict[str, Student]:
+    match_cache = MatchCache(match_cache_path) if match_cache_path is not None else None
+    schools = dataset.get_schools() if schools is None else schools
+    # load files
+    replacements = [read_course_file.get_replacements(school.replacements_path) for school in schools]
+    page_cache: Optional[incremental_build.PageCache] = None
+    if page_cache_path is not None:
+        page_cache = incremental_build.PageCache(page_cache_path, hashlib.sha256(
+            json.dumps([list(school_replacements.items()) for school_replacements in replacements]).encode("utf-8")
+        ).hexdigest())
+    students: Dict[str, Student] = {}
+    for school, school_replacements in zip(schools, replacements):
+        # compiled once for all files of the school
+        replacer = read_course_file.Replacer(school_replacements)
+        for name, student in get_school_students(school, replacer, workers, match_cache, page_cache).items():
+            students[dataset.get_student_key(school.name, name)] = student
+    if page_cache is not None:
+        page_cache.save()
+    if match_cache is not None:
+        match_cache.save()
+    return students
+
+
+# sort courses, replace fuzzy courses with time table courses and find the tutor of each student
+# in collect mode students with critical problems are removed
+def resolve_students(students: Dict[str, Student], courses: Dict[str, read_time_table.Course],
+                     teachers: Dict[str, str], tutor_matcher: Matcher) -> None:
+    invalid_names: List[str] = []
+    for student in students.values():
+        with diagnostics.Location(student=student.name):
+            try:
+                resolve_student(student, courses, teachers, tutor_matcher)
+            except diagnostics.Invalid:
+                invalid_names.append(student.name)
+    for name in invalid_names:
+        del students[name]
+
+
+def get_course(courses: Dict[str, read_time_table.Course], file_course: FileCourse) -> read_time_table.Course:
+    if file_course.fuzzy_label not in courses:
+        diagnostics.critical("unknown-course", f"Can't find '{file_course.fuzzy_label}' in course corrections.")
+    return courses[file_course.fuzzy_label]
+
+
+# add updated, non-fuzzy courses of the sorted file courses
+# also used to update resolved students when only the time table changed
+def set_courses(student: Student, courses: Dict[str, read_time_table.Course]) -> None:
+    for p, p_file_course in student.p_file_courses.items():
+        student.p_courses[p] = get_course(courses, cast("FileCourse", p_file_course))
+    student.cover_courses = [get_course(courses, cover_file_course)
+                             for cover_file_course in student.cover_file_courses]
+    # count stuff
+    student.count_stuff()
+
+
+def resolve_student(student: Student, courses: Dict[str, read_time_table.Course],
+                    teachers: Dict[str, str], tutor_matcher: Matcher) -> None:
+    student.sort_courses()
+    set_courses(student, courses)
+    # add tutor
+    found_tutor_abbreviations: List[str] = []
+    for fuzzy_tutor_abbreviation in student.fuzzy_tutor_abbreviations:
+        fuzzy_tutor_abbreviation = get_fuzzy_tutor(
+            fuzzy_tutor_abbreviation)
+        found_tutor_abbreviations.append(
+            tutor_matcher.match(fuzzy_tutor_abbreviation))
+
+    # get tutor with most matches
+    found_tutor_abbreviations.sort()
+    student.tutor_abbreviation = max(
+        set(found_tutor_abbreviations), key=found_tutor_abbreviations.count)
+    student.tutor = teachers[student.tutor_abbreviation]
+
+    if found_tutor_abbreviations.count(student.tutor_abbreviation) != len(found_tutor_abbreviations):
+        # printed for every student
+        print(diagnostics.add(
+            "warning", "tutor-mismatch",
+            f"not all found tutors are being used {found_tutor_abbreviations} (using {student.tutor_abbreviation})"))
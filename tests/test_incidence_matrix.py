@@ -0,0 +1,41 @@
+from typing import cast, Dict, List
+import pytest
+
+pytest.importorskip("scipy")
+
+import incidence_matrix
+import create_gephi
+import read_time_table
+import benchmark
+
+
+# the order of the connections is part of the result, it decides the edge ids
+def get_items(connections: List[Dict[int, int]]) -> List[List[tuple]]:
+    return [list(connected.items()) for connected in connections]
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 50, 300])
+def test_student_connections(size: int) -> None:
+    students = benchmark.get_synthetic_students(size, seed=size)
+    expected = create_gephi.get_student_connections(students)
+    result = incidence_matrix.get_student_connections(students)
+    assert get_items(result[0]) == get_items(expected[0])
+    assert get_items(result[1]) == get_items(expected[1])
+
+
+# a course taken twice by the same student is counted twice like in the index
+def test_repeated_course() -> None:
+    students = benchmark.get_synthetic_students(30)
+    for student in students[::3]:
+        student.cover_courses.append(cast(read_time_table.Course, student.p_courses[1]))
+    expected = create_gephi.get_student_connections(students)
+    result = incidence_matrix.get_student_connections(students)
+    assert get_items(result[0]) == get_items(expected[0])
+    assert get_items(result[1]) == get_items(expected[1])
+
+
+@pytest.mark.parametrize("size", [0, 2, 50, 300])
+def test_course_connections(size: int) -> None:
+    courses = create_gephi.get_courses(benchmark.get_synthetic_students(size, seed=size))
+    assert get_items(incidence_matrix.get_course_connections(courses)) == \
+        get_items(create_gephi.get_course_connections(courses))
@@ -0,0 +1,41 @@
+import random
+import pytest
+from fuzzywuzzy import process
+
+import sort_data
+import benchmark
+
+NAMES = benchmark.get_synthetic_names(2000)
+
+
+def get_queries(amount: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(amount):
+        query = rng.choice(NAMES)
+        for _ in range(rng.randint(1, 3)):
+            query = benchmark.get_ocr_error(rng, query)
+        # ocr lines missing the first or the last name
+        if rng.random() < .3:
+            query = query.split(", ")[rng.randint(0, 1)]
+        queries.append(query)
+    return queries
+
+
+# the score bound is never below the score process.extract gives
+def test_score_bound() -> None:
+    extra = ["Anna Anna, Ben", "Ab", "Öztürk, Ümit", "x×y", "Müller-Lüdenscheidt, Hans Peter", "12"]
+    for query in get_queries(100, seed=1) + extra:
+        query_forms = sort_data.get_query_forms(query)
+        for entry, score in process.extract(query, NAMES[:50] + extra, limit=None):
+            assert sort_data.get_score_bound(query_forms, sort_data.get_entry_forms(entry)) >= score
+
+
+# same decisions and the same warnings as scoring the whole collection
+# the first queries have a second match outside of the trigram shortlist
+@pytest.mark.parametrize("query", ["Lis0, Lukas", "Nide1u, Noah", "Zcpapo, Lukas", "Nofı, David", "Bakı, Oskar",
+                                   "Higc, Jonas", "Zoka", "Puzc, David"] + get_queries(20))
+def test_same_as_get_match(query: str) -> None:
+    matcher = sort_data.Matcher(NAMES)
+    assert benchmark.get_decision(matcher.match, query) == \
+        benchmark.get_decision(lambda query: sort_data.get_match(query, NAMES), query)
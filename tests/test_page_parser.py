@@ -0,0 +1,19 @@
+import random
+
+import read_course_file
+import benchmark
+
+
+# the precompiled student pattern finds the same rows as the pattern before, see benchmark.LEGACY_STUDENT_PATTERN
+def test_student_pattern_matches_legacy() -> None:
+    rng = random.Random(0)
+    for _ in range(20000):
+        row = benchmark.get_random_row(rng)
+        matches = [match.groups() for match in read_course_file.STUDENT_PATTERN.finditer(row)]
+        assert matches == benchmark.get_legacy_matches(row), row
+
+
+# a long word without a following space
+def test_student_pattern_long_word() -> None:
+    row = "  " + "a" * 100000
+    assert [match.groups() for match in read_course_file.STUDENT_PATTERN.finditer(row)] == []
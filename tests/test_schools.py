@@ -0,0 +1,125 @@
+from typing import Dict, List
+import json
+import os
+import pytest
+
+pytest.importorskip("numpy")
+
+import what_if
+import dataset
+import contact_graph
+import room_index
+import query_server
+import detect_conflicts
+import read_time_table
+import sort_data
+import benchmark
+
+SCHOOLS = ["north", "south"]
+
+
+# the same synthetic students at every school, so rooms, course labels and student names are shared
+def get_school_students(amount: int) -> List[sort_data.Student]:
+    students: List[sort_data.Student] = []
+    for school in SCHOOLS:
+        for student in benchmark.get_synthetic_students(amount):
+            student.school = school
+            for course in student.get_all_courses():
+                course.school = school
+            students.append(student)
+    return students
+
+
+def test_rooms_per_school() -> None:
+    students = get_school_students(40)
+    single = room_index.RoomIndex(benchmark.get_synthetic_students(40))
+    index = room_index.RoomIndex(students)
+    assert sorted(index.rooms) == sorted(f"{school}/{room}" for school in SCHOOLS for room in single.rooms)
+    for room in single.rooms:
+        for day in range(dataset.DAYS):
+            for period in range(1, dataset.PERIODS_PER_DAY + 1):
+                for school in SCHOOLS:
+                    assert index.get_headcount(f"{school}/{room}", day, period) == \
+                        single.get_headcount(room, day, period)
+                    assert len(index.get_courses(f"{school}/{room}", day, period)) == \
+                        len(single.get_courses(room, day, period))
+
+
+def test_query_per_school() -> None:
+    students = get_school_students(40)
+    index = query_server.QueryIndex(students)
+    assert len(set(index.query("/students"))) == len(students)
+    assert index.query("/students/north%2FStudent%201")["school"] == "north"
+    course = index.query("/courses/south%2FCourse%200")
+    assert len(course["students"]) != 0
+    assert all(name.startswith("south/") for name in course["students"])
+    for contact in index.query("/students/north%2FStudent%200/contacts"):
+        assert contact["name"].startswith("north/")
+
+
+def test_what_if_per_school() -> None:
+    students = get_school_students(40)
+    single = what_if.WhatIf(benchmark.get_synthetic_students(40)).get_connections()
+    connections = what_if.WhatIf(students).get_connections()
+    # the students of the second school follow the students of the first school
+    shifted: List[Dict[int, int]] = [{target + len(single): weight for target, weight in connected.items()}
+                                     for connected in single]
+    assert connections == single + shifted
+
+
+def test_conflicts_per_school() -> None:
+    single = detect_conflicts.ConflictReport(benchmark.get_synthetic_students(40)).to_dict()
+    report = detect_conflicts.ConflictReport(get_school_students(40)).to_dict()
+    for key in ["students", "slots"]:
+        assert set(report[key]) == {f"{school}/{name}" for school in SCHOOLS for name in single[key]}
+    # only the courses causing the most conflicts are listed
+    assert set(report["courses"]) <= {f"{school}/{label}" for school in SCHOOLS for label in single["courses"]}
+    assert len(report["pairs"]) == 2 * len(single["pairs"])
+
+
+# a school with six days, only the first half of the students attends the courses on saturday
+def test_six_days(tmp_path: str) -> None:
+    time_table_dir = os.path.join(tmp_path, "time_table")
+    os.makedirs(time_table_dir)
+    for day in range(6):
+        with open(os.path.join(time_table_dir, f"{day}.csv"), "w", encoding="utf-8") as file:
+            # the first and the last period
+            file.write("\n".join([f"T1 s{day} R1;T2 s{day} R2"] + [""] * 6 + [f"T1 s{day} R1;T2 s{day} R2"]))
+    school = dataset.School("six", str(tmp_path), days=6, periods_per_day=8)
+    courses = read_time_table.load_time_table(school)
+    assert str(courses["T1 s5"].time_slots[0]) == "at Sat. 1. period in R1"
+    students: List[sort_data.Student] = []
+    for idx in range(4):
+        student = sort_data.Student(f"Student {idx}", "A", "six")
+        student.p_courses = {}
+        student.cover_courses = [course for course in courses.values() if course.teacher_abbreviation == "T1"
+                                 if idx < 2 or course.time_table_subject != "s5"]
+        students.append(student)
+    graph = contact_graph.ContactGraph(students)
+    assert graph.week_connections[1] == {0: 12}
+    assert graph.day_connections[5][1] == {0: 2}
+    assert graph.get_connections([5])[3] == {}
+    index = room_index.RoomIndex(students)
+    assert index.get_headcount("six/R1", 5, 8) == 2
+    assert index.get_peak("six/R1") == (4, 0, 1)
+    assert query_server.QueryIndex(students).query("/rooms/six%2FR1?day=5&period=8")[0]["headcount"] == 2
+
+
+def test_day_after_week(tmp_path: str) -> None:
+    os.makedirs(os.path.join(tmp_path, "time_table"))
+    with open(os.path.join(tmp_path, "time_table", "5.csv"), "w", encoding="utf-8") as file:
+        file.write("T1 s1 R1")
+    with pytest.raises(SystemExit):
+        read_time_table.load_time_table(dataset.School("", str(tmp_path)))
+
+
+def test_manifest_slots(tmp_path: str) -> None:
+    manifest_path = os.path.join(tmp_path, "manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump({"schools": [{"dir": ".", "days": 6, "periods_per_day": 11}]}, file)
+    with pytest.raises(SystemExit):
+        dataset.load_manifest(manifest_path)
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump({"schools": [{"dir": ".", "days": 6, "periods_per_day": 10}]}, file)
+    school = dataset.load_manifest(manifest_path)[0]
+    assert (school.days, school.periods_per_day) == (6, 10)
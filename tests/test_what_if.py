@@ -0,0 +1,96 @@
+import random
+from typing import Dict, List, Set, Tuple
+import pytest
+
+pytest.importorskip("numpy")
+
+import what_if
+import dataset
+import contact_graph
+import read_time_table
+import sort_data
+import benchmark
+
+
+# students with the changed time slots of every course, absent days removed per student
+def get_changed_students(students: List[sort_data.Student], slots: Dict[int, List[Tuple[int, int, str]]],
+                         absences: List[Set[int]]) -> List[sort_data.Student]:
+    changed_students: List[sort_data.Student] = []
+    for student, absent_days in zip(students, absences):
+        changed = sort_data.Student(student.name, student.group, student.school)
+        changed.p_courses = {}
+        for course in student.get_all_courses():
+            changed_course = read_time_table.Course(course.teacher_abbreviation, course.time_table_subject)
+            for day, period, room in slots[id(course)]:
+                if day not in absent_days:
+                    changed_course.add_time_slot(day, period, room)
+            changed.cover_courses.append(changed_course)
+        changed_students.append(changed)
+    return changed_students
+
+
+# apply random changes and compare the incremental edges with a full rebuild of the contact graph
+@pytest.mark.parametrize("seed", range(5))
+def test_random_changes(seed: int) -> None:
+    rng = random.Random(seed)
+    students = benchmark.get_synthetic_students(80, seed)
+    courses = list({id(course): course for student in students for course in student.get_all_courses()}.values())
+    rooms = sorted({time_slot.room for course in courses for time_slot in course.time_slots})
+    slots = {id(course): [(time_slot.day, time_slot.period, time_slot.room) for time_slot in course.time_slots]
+             for course in courses}
+    absences: List[Set[int]] = [set() for _ in students]
+    model = what_if.WhatIf(students)
+    original = model.get_connections()
+    changed = model.copy()
+    for _ in range(40):
+        course = rng.choice(courses)
+        operation = rng.choice(["remove", "drop", "move", "exclude"])
+        if operation == "remove":
+            changed.remove_course(course)
+            slots[id(course)] = []
+        elif operation == "drop" and len(slots[id(course)]) != 0:
+            day, period, _ = rng.choice(slots[id(course)])
+            changed.drop_time_slot(course, day, period)
+            slots[id(course)] = [slot for slot in slots[id(course)] if (slot[0], slot[1]) != (day, period)]
+        elif operation == "move" and len(slots[id(course)]) != 0:
+            day, period, room = rng.choice(slots[id(course)])
+            free = [(new_day, new_period) for new_day in range(dataset.DAYS)
+                    for new_period in range(1, dataset.PERIODS_PER_DAY + 1)
+                    if all((slot[0], slot[1]) != (new_day, new_period) for slot in slots[id(course)])]
+            new_day, new_period = rng.choice(free)
+            # another room makes students of different courses meet, a new room is added to the room ids
+            new_room = rng.choice(rooms + ["New room"]) if rng.random() < 0.5 else None
+            changed.move_time_slot(course, day, period, new_day, new_period, new_room)
+            slots[id(course)] = [(new_day, new_period, room if new_room is None else new_room)
+                                 if (slot[0], slot[1]) == (day, period) else slot for slot in slots[id(course)]]
+        elif operation == "exclude":
+            group = rng.choice("AB")
+            days = rng.sample(range(dataset.DAYS), rng.randint(1, 2))
+            changed.exclude_group(group, days)
+            for student_id, student in enumerate(students):
+                if student.group == group:
+                    absences[student_id].update(days)
+        expected = contact_graph.ContactGraph(get_changed_students(students, slots, absences)).week_connections
+        assert changed.get_connections() == expected
+    # the copy doesn't change the original
+    assert model.get_connections() == original
+    assert model.get_connections() == contact_graph.ContactGraph(students).week_connections
+    # the original keeps working after the copy added rooms
+    course = courses[0]
+    day, period = course.time_slots[0].day, course.time_slots[0].period
+    model.move_time_slot(course, day, period, day, period, "Other new room")
+    slots = {id(other): [(time_slot.day, time_slot.period, time_slot.room) for time_slot in other.time_slots]
+             for other in courses}
+    slots[id(course)][0] = (day, period, "Other new room")
+    changed_students = get_changed_students(students, slots, [set() for _ in students])
+    expected = contact_graph.ContactGraph(changed_students).week_connections
+    assert model.get_connections() == expected
+
+
+def test_unknown_course() -> None:
+    model = what_if.WhatIf(benchmark.get_synthetic_students(20))
+    course = read_time_table.Course("XYZ", "s0")
+    for change in [lambda: model.remove_course(course), lambda: model.drop_time_slot(course, 0, 1),
+                   lambda: model.move_time_slot(course, 0, 1, 0, 2)]:
+        with pytest.raises(ValueError):
+            change()
@@ -0,0 +1,42 @@
+import os
+import pytest
+
+import create_gephi
+import create_print_out
+import write_gexf
+import benchmark
+
+TODAY = "2021-01-01"
+FILES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "files")
+
+
+def read(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+# the streamed networks are the same as the ones rendered from the jinja templates
+@pytest.mark.parametrize("size", [0, 1, 40])
+def test_student_network(tmp_path, size: int) -> None:
+    students = benchmark.get_synthetic_students(size)
+    connections = create_gephi.get_student_connections(students)[0]
+    graph_students = create_gephi.create_graph_students(students, connections)
+    create_print_out.write_template(
+        os.path.join(FILES_DIR, "gephi_students_template.gexf"), str(tmp_path / "template.gexf"), today=TODAY,
+        students=graph_students, edges=create_gephi.get_student_edges(graph_students))
+    write_gexf.write_gexf(
+        str(tmp_path / "stream.gexf"), TODAY, write_gexf.STUDENT_ATTRIBUTES, graph_students, connections)
+    assert read(str(tmp_path / "stream.gexf")) == read(str(tmp_path / "template.gexf"))
+
+
+@pytest.mark.parametrize("size", [0, 1, 40])
+def test_course_network(tmp_path, size: int) -> None:
+    courses = create_gephi.get_courses(benchmark.get_synthetic_students(size))
+    connections = create_gephi.get_course_connections(courses)
+    graph_courses = create_gephi.create_graph_courses(courses, connections)
+    create_print_out.write_template(
+        os.path.join(FILES_DIR, "gephi_courses_template.gexf"), str(tmp_path / "template.gexf"), today=TODAY,
+        courses=graph_courses, edges=create_gephi.get_course_edges(graph_courses))
+    write_gexf.write_gexf(
+        str(tmp_path / "stream.gexf"), TODAY, write_gexf.COURSE_ATTRIBUTES, graph_courses, connections)
+    assert read(str(tmp_path / "stream.gexf")) == read(str(tmp_path / "template.gexf"))
@@ -0,0 +1,267 @@
+"""
+keep the parsed pages, the match results and the resolved students of a school in memory
+and process changes of the files folder
+only changed pages are parsed and matched again and only print-outs of students whose data changed are rendered again
+problems are collected like with main.py --validate and printed after each update instead of stopping the program
+the files folder is polled, changes are noticed by modification time and size
+run with: python3 watch.py [--school NAME] [--interval SECONDS] [--workers N] [--html] [--graph-formats FORMAT ...]
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import dataset
+import diagnostics
+import read_course_file
+import read_time_table
+import sort_data
+import create_print_out
+import create_gephi
+import export_graph
+
+
+# key: file path, value: modification time and size of every file in the folders
+def get_file_states(roots: Sequence[str] = ("files",)) -> Dict[str, Tuple[int, int]]:
+    file_states: Dict[str, Tuple[int, int]] = {}
+    for dir_path, _, file_names in itertools.chain.from_iterable(os.walk(root) for root in roots):
+        for file_name in file_names:
+            file_path = os.path.join(dir_path, file_name)
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                # removed while walking
+                continue
+            file_states[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return file_states
+
+
+# everything the print-outs and the networks of a student are created from
+def get_signature(student: sort_data.Student) -> Tuple[Any, ...]:
+    return (sorted(set(student.fuzzy_names)), student.tutor, student.tutor_abbreviation, student.group,
+            student.amount_courses, student.weekly_periods,
+            [(course.full_label, course.teacher, course.teacher_abbreviation, course.time_table_subject,
+              [(time_slot.day, time_slot.period, time_slot.room) for time_slot in course.time_slots])
+             for course in student.get_all_courses()])
+
+
+# the hot model of a single school, updated by the changed file paths
+class Model:
+    def __init__(self, school_name: Optional[str] = None, workers: int = 1, use_match_cache: bool = True,
+                 html: bool = False, graph_formats: Sequence[str] = ("gexf",)):
+        # the first school when None
+        self.school_name = school_name
+        self.workers = workers
+        self.html = html
+        self.graph_formats = graph_formats
+        self.match_cache = sort_data.MatchCache(sort_data.MATCH_CACHE_PATH) if use_match_cache else None
+        self.page_paths: List[str] = []
+        # key: page path, value: parsed page, missing when the page can't be used
+        self.files: Dict[str, read_course_file.File] = {}
+        # key: page path, value: non-fuzzy name of each student line, None when it has no clear match
+        self.matches: Dict[str, List[Optional[str]]] = {}
+        # key: student name, value: signature of the last written print-out
+        self.signatures: Dict[str, Tuple[Any, ...]] = {}
+        self.students: Dict[str, sort_data.Student] = {}
+
+    # cohorts and pages are found again with every update
+    def load_school(self) -> None:
+        schools = dataset.get_schools()
+        if self.school_name is None:
+            self.school = schools[0]
+        else:
+            school = next((school for school in schools if school.name == self.school_name), None)
+            if school is None:
+                diagnostics.critical("manifest", f"school {self.school_name} isn't in {dataset.MANIFEST_PATH}.")
+            self.school = school
+        self.page_paths = self.school.get_page_paths()
+        # key: page path, value: index of its cohort
+        self.cohort_idxs = {file_path: idx for idx, cohort in enumerate(self.school.cohorts)
+                            for file_path in cohort.page_paths}
+
+    # templates are only used for the names and groups, students are created again for each update
+    def load_rosters(self) -> None:
+        self.roster_paths = [cohort.students_path for cohort in self.school.cohorts]
+        self.shard_templates = [sort_data.get_student_templates(roster_path, self.school.name)
+                                for roster_path in self.roster_paths]
+        self.student_matchers = [sort_data.Matcher(list(student_templates.keys()), cache=self.match_cache)
+                                 for student_templates in self.shard_templates]
+        self.matches = {}
+
+    def load_replacer(self) -> None:
+        self.replacer = read_course_file.Replacer(read_course_file.get_replacements(self.school.replacements_path))
+
+    def load_courses(self) -> None:
+        self.courses = read_time_table.get_courses(self.school)
+        self.teachers = sort_data.get_teachers(list(self.courses.values()))
+        self.tutor_matcher = sort_data.Matcher(list(self.teachers.keys()), cache=self.match_cache)
+
+    # matches are kept when group and student lines are the same as before
+    def parse_pages(self, file_paths: List[str]) -> None:
+        # a process pool only pays off for many pages
+        workers = self.workers if len(file_paths) > self.workers else 1
+        files = {file.file_path: file for file in sort_data.parse_files_collecting(
+            [file_path for file_path in file_paths if os.path.isfile(file_path)], self.replacer, workers)}
+        for file_path in file_paths:
+            old_file = self.files.pop(file_path, None)
+            file = files.get(file_path)
+            if file is None:
+                self.matches.pop(file_path, None)
+                continue
+            self.files[file_path] = file
+            if old_file is None or old_file.group != file.group or \
+                    [student.name for student in old_file.students] != [student.name for student in file.students]:
+                self.matches.pop(file_path, None)
+
+    def match_pages(self) -> None:
+        for file_path, file in self.files.items():
+            if file_path not in self.matches:
+                cohort_idx = self.cohort_idxs[file_path]
+                self.matches[file_path] = sort_data.match_students(
+                    file, self.shard_templates[cohort_idx], self.student_matchers[cohort_idx])
+
+    # fresh students from the kept pages and matches, in the order of sort_data.get_students
+    def resolve(self) -> Dict[str, sort_data.Student]:
+        shards = [{name: sort_data.Student(name, template.group, template.school)
+                   for name, template in student_templates.items()} for student_templates in self.shard_templates]
+        for file_path in self.page_paths:
+            if file_path not in self.files:
+                continue
+            file = self.files[file_path]
+            for student, match in zip(file.students, self.matches[file_path]):
+                if match is not None:
+                    sort_data.add_file_student(shards[self.cohort_idxs[file_path]][match], file, student)
+        return sort_data.resolve_shards(shards, self.courses, self.teachers, self.tutor_matcher)
+
+    # render the print-outs of changed students, all of them when render_all is set
+    # the networks are written again when any student changed
+    # returns the amount of rendered print-outs
+    def write(self, render_all: bool = False) -> int:
+        signatures = {name: get_signature(student) for name, student in self.students.items()}
+        changed_students = [student for name, student in self.students.items()
+                            if render_all or self.signatures.get(name) != signatures[name]]
+        if len(changed_students) != 0:
+            create_print_out.create_student_print_outs(changed_students)
+            if self.html:
+                create_print_out.create_student_html_print_outs(changed_students)
+        if len(changed_students) != 0 or signatures.keys() != self.signatures.keys():
+            # the students of each course are collected again by create_gefx
+            for course in self.courses.values():
+                course.students = []
+            create_gephi.create_gefx(list(self.students.values()), formats=self.graph_formats)
+        self.signatures = signatures
+        return len(changed_students)
+
+    # process changed, added or removed files of the files folder, everything when changed_paths is None
+    def update(self, changed_paths: Optional[List[str]] = None) -> int:
+        if changed_paths is None or dataset.MANIFEST_PATH in changed_paths:
+            self.load_school()
+            self.load_rosters()
+            self.load_replacer()
+            self.load_courses()
+            self.files = {}
+            self.parse_pages(self.page_paths)
+            render_all = True
+        else:
+            changed = set(changed_paths)
+            old_page_paths = set(self.page_paths)
+            self.load_school()
+            if any(roster_path in changed for roster_path in self.roster_paths) or \
+                    self.roster_paths != [cohort.students_path for cohort in self.school.cohorts]:
+                self.load_rosters()
+            # removed pages
+            for file_path in old_page_paths.difference(self.page_paths):
+                self.files.pop(file_path, None)
+                self.matches.pop(file_path, None)
+            if self.school.replacements_path in changed:
+                self.load_replacer()
+                self.parse_pages(self.page_paths)
+            else:
+                self.parse_pages([file_path for file_path in self.page_paths
+                                  if file_path in changed or file_path not in old_page_paths])
+            if self.school.course_corrections_path in changed or \
+                    any(os.path.dirname(file_path) == self.school.time_table_dir for file_path in changed):
+                self.load_courses()
+            # print-out templates and everything else in the folder
+            known_paths = old_page_paths | set(self.page_paths) | set(self.school.get_input_paths())
+            render_all = any(file_path not in known_paths and os.path.dirname(file_path) != self.school.time_table_dir
+                             for file_path in changed)
+        self.match_pages()
+        self.students = self.resolve()
+        if self.match_cache is not None:
+            self.match_cache.save()
+        return self.write(render_all)
+
+
+def print_criticals() -> None:
+    for diagnostic in diagnostics.get_criticals():
+        location = ":".join(str(value) for value in (diagnostic.file_path, diagnostic.line) if value is not None)
+        if location or diagnostic.student:
+            print(f"{diagnostic} ({location or diagnostic.student})")
+        else:
+            print(diagnostic)
+
+
+# run update with the diagnostics of this update only and print the critical ones
+# returns False when the update couldn't be processed
+def run_update(model: Model, changed_paths: Optional[List[str]] = None) -> bool:
+    diagnostics.sink = diagnostics.Sink()
+    start = time.perf_counter()
+    try:
+        rendered = model.update(changed_paths)
+    except (OSError, IndexError, KeyError, ValueError) as error:
+        # e.g. a csv file in the middle of being saved, it is read again with the next change
+        print(f"Critical: can't process changes: {error!r}")
+        return False
+    except diagnostics.Invalid:
+        # e.g. the school was removed from the manifest
+        print_criticals()
+        return False
+    print_criticals()
+    changes = "all files" if changed_paths is None else f"{len(changed_paths)} changed files"
+    print(f"{changes}, {rendered} print-outs, "
+          f"{len(model.students)} students in {time.perf_counter() - start:.3f}s")
+    return True
+
+
+# the files folder with the templates and the manifest and the folder of the school
+def watch(model: Model, interval: float = 0.5) -> None:
+    file_states = get_file_states(["files", model.school.dir])
+    while True:
+        time.sleep(interval)
+        new_file_states = get_file_states(["files", model.school.dir])
+        changed_paths = sorted(file_path for file_path in file_states.keys() | new_file_states.keys()
+                               if file_states.get(file_path) != new_file_states.get(file_path))
+        file_states = new_file_states
+        if len(changed_paths) != 0:
+            run_update(model, changed_paths)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--school", default=None,
+                        help="name of the school in the manifest, the first one by default")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="seconds between two checks of the files folder")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="amount of processes parsing course list files")
+    parser.add_argument("--no-match-cache", action="store_true",
+                        help=f"don't use or update the fuzzy match decisions in {sort_data.MATCH_CACHE_PATH}")
+    parser.add_argument("--html", action="store_true",
+                        help="also create a self-contained html print-out for each student")
+    parser.add_argument("--graph-formats", nargs="+", default=["gexf"], choices=list(export_graph.EXPORTERS.keys()),
+                        help="formats of the networks in out/gephi")
+    args = parser.parse_args()
+    diagnostics.enable()
+    model = Model(args.school, args.workers, not args.no_match_cache, args.html, args.graph_formats)
+    # nothing to watch without the school
+    if not run_update(model):
+        sys.exit(1)
+    print(f"watching {model.school.dir} every {args.interval}s, stop with ctrl+c")
+    try:
+        watch(model, args.interval)
+    except KeyboardInterrupt:
+        pass
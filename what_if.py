@@ -0,0 +1,206 @@
+"""
+answer what-if questions on the contact graph without running the whole pipeline again
+e.g. what if a course goes remote, a time slot is dropped or a group stays home on some days
+changes only recompute the contacts of the affected students
+requires numpy
+"""
+
+from typing import Iterable, List, Dict, Optional, Set, Tuple
+import copy
+import numpy as np
+
+import dataset
+import read_time_table
+import sort_data
+import contact_graph
+import course_table
+import analyse_network
+
+
+class WhatIf:
+    def __init__(self, students: List[sort_data.Student]):
+        self.students = students
+        graph = contact_graph.ContactGraph(students)
+        # key: room key (see dataset.get_school_key), value: room id
+        self.room_ids = graph.room_ids
+        # key: room id, value: weekly mask of all time slots in that room, per student
+        self.occupancies = graph.occupancies
+        # time slots of each student
+        self.layouts = graph.layouts
+        # key: room id, value: ids of all students using that room
+        self.room_students: Dict[int, Set[int]] = {}
+        for student_id, occupancy in enumerate(self.occupancies):
+            for room_id in occupancy:
+                self.room_students.setdefault(room_id, set()).add(student_id)
+        # key: id of course object, value: current time slots (day, period, room)
+        self.course_slots: Dict[int, List[Tuple[int, int, str]]] = {}
+        # key: id of course object, value: ids of all students attending
+        self.course_students: Dict[int, List[int]] = {}
+        for student_id, student in enumerate(students):
+            for course in student.get_all_courses():
+                if id(course) not in self.course_slots:
+                    self.course_slots[id(course)] = [(time_slot.day, time_slot.period, time_slot.room)
+                                                     for time_slot in course.time_slots]
+                self.course_students.setdefault(id(course), []).append(student_id)
+        # weekly mask of all time slots each student stays at home
+        self.absences = [0] * len(students)
+
+        # key: other student id, value: edge id, per student
+        self.adjacency: List[Dict[int, int]] = [{} for _ in students]
+        sources: List[int] = []
+        targets: List[int] = []
+        masks: List[int] = []
+        for student_id, contacts in enumerate(graph.contacts):
+            for other_id, mask in contacts.items():
+                self.adjacency[student_id][other_id] = len(sources)
+                self.adjacency[other_id][student_id] = len(sources)
+                sources.append(other_id)
+                targets.append(student_id)
+                masks.append(mask)
+        self.edge_amount = len(sources)
+        # weekly mask of shared time slots and amount of shared time slots per edge, growing when edges are added
+        self.sources = np.array(sources, dtype=np.int64)
+        self.targets = np.array(targets, dtype=np.int64)
+        self.masks = np.array(masks, dtype=np.uint64)
+        self.weights = course_table.count_bits(self.masks)
+        self.degrees = np.bincount(self.sources, weights=self.weights, minlength=len(students)).astype(np.int64) + \
+            np.bincount(self.targets, weights=self.weights, minlength=len(students)).astype(np.int64)
+
+    # independent copy to try changes on
+    def copy(self) -> "WhatIf":
+        other = copy.copy(self)
+        other.room_ids = dict(self.room_ids)
+        other.occupancies = [dict(occupancy) for occupancy in self.occupancies]
+        other.room_students = {room_id: set(student_ids) for room_id, student_ids in self.room_students.items()}
+        other.course_slots = {course_id: list(slots) for course_id, slots in self.course_slots.items()}
+        other.absences = list(self.absences)
+        other.adjacency = [dict(adjacent) for adjacent in self.adjacency]
+        for attribute in ["sources", "targets", "masks", "weights", "degrees"]:
+            setattr(other, attribute, getattr(self, attribute).copy())
+        return other
+
+    # only courses of the students are known, raises ValueError for all others
+    def check_course(self, course: read_time_table.Course) -> None:
+        if id(course) not in self.course_slots:
+            raise ValueError(f"No student takes {course.time_table_subject} {course.teacher_abbreviation}.")
+
+    # the course takes place remotely, its students don't meet anymore
+    def remove_course(self, course: read_time_table.Course) -> None:
+        self.check_course(course)
+        self.course_slots[id(course)] = []
+        self.update_students(self.course_students[id(course)])
+
+    def drop_time_slot(self, course: read_time_table.Course, day: int, period: int) -> None:
+        self.check_course(course)
+        self.course_slots[id(course)] = [slot for slot in self.course_slots[id(course)]
+                                         if (slot[0], slot[1]) != (day, period)]
+        self.update_students(self.course_students[id(course)])
+
+    # move a time slot of a course to another time and, when given, another room of the school of the course
+    def move_time_slot(self, course: read_time_table.Course, day: int, period: int,
+                       new_day: int, new_period: int, new_room: Optional[str] = None) -> None:
+        self.check_course(course)
+        self.course_slots[id(course)] = [(new_day, new_period, slot[2] if new_room is None else new_room)
+                                         if (slot[0], slot[1]) == (day, period) else slot
+                                         for slot in self.course_slots[id(course)]]
+        self.update_students(self.course_students[id(course)])
+
+    # all students of the group stay at home on the given days, on all days when not given
+    def exclude_group(self, group: str, days: Optional[Iterable[int]] = None) -> None:
+        days = None if days is None else list(days)
+        student_ids = [student_id for student_id, student in enumerate(self.students) if student.group == group]
+        for student_id in student_ids:
+            self.absences[student_id] |= self.layouts[student_id].get_days_mask(days)
+        self.update_students(student_ids)
+
+    # key: room id, value: weekly mask of all time slots the student is in that room
+    def get_occupancy(self, student_id: int) -> Dict[int, int]:
+        occupancy: Dict[int, int] = {}
+        for course in self.students[student_id].get_all_courses():
+            for day, period, room in self.course_slots[id(course)]:
+                room_id = self.room_ids.setdefault(dataset.get_school_key(course.school, room), len(self.room_ids))
+                occupancy[room_id] = occupancy.get(room_id, 0) | (1 << course.layout.get_slot_bit(day, period))
+        absent = self.absences[student_id]
+        return {room_id: mask & ~absent for room_id, mask in occupancy.items() if mask & ~absent}
+
+    # recompute the occupancies of these students and all their edges
+    def update_students(self, student_ids: Iterable[int]) -> None:
+        student_ids = list(dict.fromkeys(student_ids))
+        for student_id in student_ids:
+            for room_id in self.occupancies[student_id]:
+                self.room_students[room_id].discard(student_id)
+            self.occupancies[student_id] = self.get_occupancy(student_id)
+            for room_id in self.occupancies[student_id]:
+                self.room_students.setdefault(room_id, set()).add(student_id)
+        # key: edge id, value: new weekly mask of shared time slots
+        changed: Dict[int, int] = {}
+        for student_id in student_ids:
+            occupancy = self.occupancies[student_id]
+            # key: other student id, value: weekly mask of shared time slots
+            contacts: Dict[int, int] = {}
+            for room_id, mask in occupancy.items():
+                for other_id in self.room_students[room_id]:
+                    shared = mask & self.occupancies[other_id][room_id]
+                    if shared and other_id != student_id:
+                        contacts[other_id] = contacts.get(other_id, 0) | shared
+            # existing edges not in contacts anymore
+            for other_id, edge in self.adjacency[student_id].items():
+                if other_id not in contacts:
+                    changed[edge] = 0
+            for other_id, shared in contacts.items():
+                if other_id in self.adjacency[student_id]:
+                    edge = self.adjacency[student_id][other_id]
+                else:
+                    edge = self.add_edge(min(student_id, other_id), max(student_id, other_id))
+                changed[edge] = shared
+        self.set_edges(np.fromiter(changed.keys(), dtype=np.int64, count=len(changed)),
+                       np.fromiter(changed.values(), dtype=np.uint64, count=len(changed)))
+
+    # update the masks of all given edges at once
+    def set_edges(self, edges: np.ndarray, masks: np.ndarray) -> None:
+        weights = course_table.count_bits(masks)
+        differences = weights - self.weights[edges]
+        np.add.at(self.degrees, self.sources[edges], differences)
+        np.add.at(self.degrees, self.targets[edges], differences)
+        self.masks[edges] = masks
+        self.weights[edges] = weights
+
+    def add_edge(self, source: int, target: int) -> int:
+        if self.edge_amount == len(self.sources):
+            capacity = max(16, 2 * len(self.sources))
+            for attribute in ["sources", "targets", "masks", "weights"]:
+                array = getattr(self, attribute)
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:len(array)] = array
+                setattr(self, attribute, grown)
+        edge = self.edge_amount
+        self.sources[edge] = source
+        self.targets[edge] = target
+        self.adjacency[source][target] = edge
+        self.adjacency[target][source] = edge
+        self.edge_amount += 1
+        return edge
+
+    # same as contact_graph.ContactGraph.week_connections of the changed time table
+    def get_connections(self) -> List[Dict[int, int]]:
+        connections: List[Dict[int, int]] = [{} for _ in self.students]
+        for edge in np.lexsort((self.sources[:self.edge_amount], self.targets[:self.edge_amount])):
+            if self.weights[edge] > 0:
+                connections[self.targets[edge]][int(self.sources[edge])] = int(self.weights[edge])
+        return connections
+
+    # components and degree statistics of the edges with at least min_weight shared time slots
+    def get_stats(self, min_weight: int = 1) -> Dict[str, float]:
+        weights = self.weights[:self.edge_amount]
+        mask = weights >= max(1, min_weight)
+        components = analyse_network.get_edge_components(
+            len(self.students), self.sources[:self.edge_amount][mask], self.targets[:self.edge_amount][mask])
+        sizes = np.bincount(components, minlength=1)
+        return {
+            "edges": int(mask.sum()),
+            "weight": int(weights[mask].sum()),
+            "components": int(len(sizes)),
+            "largest_component": int(sizes.max()),
+            "mean_degree": float(self.degrees.mean()) if len(self.degrees) else 0.0,
+            "max_degree": int(self.degrees.max(initial=0)),
+        }
@@ -0,0 +1,60 @@
+"""
+stream gexf files for gephi without rendering the whole document in memory
+produces exactly the same output as rendering files/gephi_*_template.gexf with jinja
+"""
+
+from typing import Any, Iterable, Iterator, List, Dict, Sequence, Tuple
+
+# attribute id and gexf type of the node attributes
+STUDENT_ATTRIBUTES = [("tutor", "string"), ("amount_courses", "integer"),
+                      ("weekly_periods", "integer")]
+COURSE_ATTRIBUTES = [("teacher", "string"), ("amount_students", "integer"),
+                     ("weekly_periods", "integer")]
+
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2" xmlns:viz="http://www.gexf.net/1.2draft/viz" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.gexf.net/1.2draft http://www.gexf.net/1.2draft/gexf.xsd">
+    <meta lastmodifieddate="{today}">
+        <creator>Christopher Besch</creator>
+        <description>Student Network</description>
+    </meta>
+    <graph defaultedgetype="undirected">
+        <attributes class="node">
+"""
+
+
+def iter_header(today: str, attributes: List[Tuple[str, str]], node_count: int) -> Iterator[str]:
+    yield HEADER.format(today=today)
+    for attribute_id, attribute_type in attributes:
+        yield f'            <attribute id="{attribute_id}" title="{attribute_id}" type="{attribute_type}" />\n'
+    yield f'        </attributes>\n        <nodes count="{node_count}">\n            '
+
+
+def iter_nodes(nodes: Iterable[Any], attributes: List[Tuple[str, str]]) -> Iterator[str]:
+    for node in nodes:
+        attvalues = "".join(f'\n                    <attvalue for="{attribute_id}" value="{getattr(node, attribute_id)}" />'
+                            for attribute_id, _ in attributes)
+        yield f'\n            <node id="{node.id}" label="{node.label}">\n                <attvalues>{attvalues}\n                </attvalues>\n            </node>\n            '
+
+
+# edges are numbered in order of the connections
+# key: connected node id, value: weight
+def iter_edges(connections: Iterable[Dict[int, int]]) -> Iterator[str]:
+    edge_id = 0
+    for source, connected in enumerate(connections):
+        for target, weight in connected.items():
+            yield f'\n            <edge id="{edge_id}" source="{source}" target="{target}" weight="{weight}" />\n            '
+            edge_id += 1
+
+
+# nodes need the attributes id, label and all attribute ids
+# connections[i] contains all connections of the node with id i
+def write_gexf(out_file: str, today: str, attributes: List[Tuple[str, str]],
+               nodes: Sequence[Any], connections: Sequence[Dict[int, int]]) -> None:
+    edge_count = sum(len(connected) for connected in connections)
+    with open(out_file, "w+", encoding="utf-8", buffering=1 << 16) as file:
+        file.writelines(iter_header(today, attributes, len(nodes)))
+        file.writelines(iter_nodes(nodes, attributes))
+        file.write(
+            f'\n        </nodes>\n        <edges count="{edge_count}">\n            ')
+        file.writelines(iter_edges(connections))
+        file.write("\n        </edges>\n    </graph>\n</gexf>")